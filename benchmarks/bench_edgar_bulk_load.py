@@ -0,0 +1,82 @@
+"""
+Benchmark edgar_bulk_load on a synthetic companyfacts.zip archive with an increasing
+number of worker processes.
+
+Members per second should grow close to linearly with the worker count, up to the number
+of available cores. The full EDGAR archive holds roughly 18,000 companyfacts members.
+
+    python benchmarks/bench_edgar_bulk_load.py
+    python benchmarks/bench_edgar_bulk_load.py --archive companyfacts.zip --workers 1 4 8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from benchmarks.synthetic import synthetic_companyfacts
+from src.tidyxbrl import edgar_bulk_load
+
+
+def write_synthetic_archive(path, membercount, factcount):
+    """
+    Write a companyfacts.zip style archive of membercount synthetic companies.
+    """
+
+    companyfacts = synthetic_companyfacts(factcount)
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zipdata:
+        for cik in range(1, membercount + 1):
+            zipdata.writestr(f"CIK{cik:010d}.json", json.dumps(dict(companyfacts, cik=cik)))
+    return path
+
+
+def bench_edgar_bulk_load(archive, workercounts, output_format="pickle"):
+    """
+    Time edgar_bulk_load of archive for every worker count and return the result rows.
+    """
+
+    results = []
+    for workers in workercounts:
+        with tempfile.TemporaryDirectory() as outputdirectory:
+            starttime = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                summary = edgar_bulk_load(archive, outputdirectory, workers=workers, batch_size=50, output_format=output_format)
+            elapsed = time.perf_counter() - starttime
+        members = int(summary.members.sum())
+        results.append(
+            {
+                "workers": workers,
+                "members": members,
+                "rows": int(summary.rows.sum()),
+                "seconds": round(elapsed, 3),
+                "members_per_sec": round(members / elapsed, 1),
+            }
+        )
+        print(results[-1])
+    return results
+
+
+if __name__ == "__main__":
+    cpucount = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--archive", help="Local companyfacts.zip. Defaults to a synthetic archive.")
+    parser.add_argument("--members", type=int, default=200, help="Members of the synthetic archive.")
+    parser.add_argument("--facts", type=int, default=5000, help="Facts per synthetic member.")
+    parser.add_argument("--workers", type=int, nargs="*", default=sorted({1, 2, 4, cpucount}))
+    parser.add_argument("--format", default="pickle", dest="output_format")
+    arguments = parser.parse_args()
+
+    print(f"CPU count: {cpucount}")
+    if arguments.archive:
+        bench_edgar_bulk_load(arguments.archive, arguments.workers, arguments.output_format)
+    else:
+        with tempfile.TemporaryDirectory() as tempdir:
+            archive = write_synthetic_archive(os.path.join(tempdir, "companyfacts.zip"), arguments.members, arguments.facts)
+            bench_edgar_bulk_load(archive, arguments.workers, arguments.output_format)
@@ -0,0 +1,78 @@
+"""
+Benchmark the tidy = True companyfacts flattener of edgar_query against the melted,
+nested DataFrame output on synthetic companyfacts documents of increasing size.
+
+Both outputs are built from the same decoded JSON, so only the conversion is timed.
+Memory is the deep size of the returned frame, nested DataFrames included.
+
+    python benchmarks/bench_edgar_query_tidy.py
+    python benchmarks/bench_edgar_query_tidy.py 10000 100000 500000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from benchmarks.synthetic import synthetic_companyfacts
+from src.tidyxbrl.edgar_query import _edgar_query_frame, _edgar_query_tidy
+from src.tidyxbrl.http_cache import CachedResponse
+
+DEFAULT_SIZES = [10000, 50000, 200000]
+
+
+def frame_mb(frame):
+    """
+    Return the deep memory usage of frame in MB, counting DataFrames nested in cells.
+    """
+
+    total = frame.memory_usage(deep=True).sum()
+    for column in frame.columns[frame.dtypes == object]:
+        total += sum(value.memory_usage(deep=True).sum() for value in frame[column] if isinstance(value, pd.DataFrame))
+    return round(total / 2 ** 20, 1)
+
+
+def bench_edgar_query_tidy(sizes=None):
+    """
+    Time the nested & tidy conversions for every synthetic size and return the result rows.
+    """
+
+    results = []
+    for factcount in sizes or DEFAULT_SIZES:
+        companyfacts = synthetic_companyfacts(factcount)
+        response = CachedResponse("synthetic", 200, {}, json.dumps(companyfacts).encode())
+
+        starttime = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            nestedframe = _edgar_query_frame(response, parse_pandas=True)
+        nestedseconds = time.perf_counter() - starttime
+
+        starttime = time.perf_counter()
+        tidyframe = _edgar_query_tidy(response.json())
+        tidyseconds = time.perf_counter() - starttime
+
+        results.append(
+            {
+                "facts": factcount,
+                "nested_seconds": round(nestedseconds, 3),
+                "tidy_seconds": round(tidyseconds, 3),
+                "speedup": round(nestedseconds / tidyseconds, 1),
+                "nested_mb": frame_mb(nestedframe),
+                "tidy_mb": frame_mb(tidyframe),
+                "tidy_rows": len(tidyframe),
+            }
+        )
+        print(results[-1])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sizes", nargs="*", type=int)
+    bench_edgar_query_tidy(parser.parse_args().sizes or None)
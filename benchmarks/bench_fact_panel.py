@@ -0,0 +1,79 @@
+"""
+Benchmark fact_panel against the drop_duplicates & pivot_table code a user would write.
+
+Synthetic tidy companyfacts rows of many companies, where every quarter is filed twice,
+are turned into a company x quarter x concept panel keeping the most recently filed value.
+The pandas baseline sorts on filed, drops the duplicated cells & pivots the concepts into
+columns; it is only timed up to --pivot-max companies.
+
+    python benchmarks/bench_fact_panel.py
+    python benchmarks/bench_fact_panel.py 5000 --concepts 200 --periods 40 --filings 1
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from benchmarks.synthetic import synthetic_tidy_facts
+from src.tidyxbrl import fact_panel
+
+DEFAULT_COMPANIES = [100, 1000]
+
+
+def pivot_panel(facts):
+    """
+    Build the wide (cik, period) x concept frame with pandas.
+    """
+
+    latest = facts.sort_values("filed", kind="stable").drop_duplicates(["cik", "concept", "end"], keep="last")
+    return latest.pivot_table(index=["cik", "end"], columns="concept", values="val", aggfunc="first", observed=True)
+
+
+def bench_fact_panel(companies=None, conceptcount=200, periodcount=40, filingsperperiod=2, pivotmax=1000):
+    results = []
+    for companycount in companies or DEFAULT_COMPANIES:
+        facts = synthetic_tidy_facts(companycount, conceptcount, periodcount, filingsperperiod)
+
+        starttime = time.perf_counter()
+        panel = fact_panel(facts)
+        panelseconds = time.perf_counter() - starttime
+        starttime = time.perf_counter()
+        fact_panel(facts.sample(frac=1, random_state=1))
+        shuffledseconds = time.perf_counter() - starttime
+        starttime = time.perf_counter()
+        fact_panel(facts, quarterly=True)
+        quarterlyseconds = time.perf_counter() - starttime
+
+        result = {
+            "facts": len(facts),
+            "shape": panel.values.shape,
+            "panel_mb": round(panel.values.nbytes / 2 ** 20, 1),
+            "panel_seconds": round(panelseconds, 2),
+            "shuffled_seconds": round(shuffledseconds, 2),
+            "quarterly_seconds": round(quarterlyseconds, 2),
+        }
+        if companycount <= pivotmax:
+            starttime = time.perf_counter()
+            wide = pivot_panel(facts)
+            result["pivot_seconds"] = round(time.perf_counter() - starttime, 2)
+            assert numpy.array_equal(
+                wide.to_numpy(), panel.to_frame(list(wide.columns), dropna=False).to_numpy(), equal_nan=True
+            ), "fact_panel should match the pivot"
+        results.append(result)
+        print(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("companies", nargs="*", type=int)
+    parser.add_argument("--concepts", type=int, default=200)
+    parser.add_argument("--periods", type=int, default=40)
+    parser.add_argument("--filings", type=int, default=2)
+    parser.add_argument("--pivot-max", type=int, default=1000)
+    arguments = parser.parse_args()
+    bench_fact_panel(arguments.companies or None, arguments.concepts, arguments.periods, arguments.filings, arguments.pivot_max)
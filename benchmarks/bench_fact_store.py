@@ -0,0 +1,99 @@
+"""
+Benchmark FactStore lookups, range scans & aggregations against boolean masks.
+
+Synthetic tidy companyfacts rows of many companies are queried repeatedly, once with the
+boolean masks over the DataFrame columns that a user would write, and once through the
+sorted keys of a FactStore. The time to build the store is reported separately.
+
+    python benchmarks/bench_fact_store.py
+    python benchmarks/bench_fact_store.py 5000 --concepts 200 --periods 40
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from benchmarks.synthetic import synthetic_tidy_facts
+from src.tidyxbrl import FactStore
+
+DEFAULT_COMPANIES = [100, 1000]
+QUERIES = 200
+
+
+def per_query_ms(query, arguments):
+    """
+    Return the mean milliseconds of query over every argument tuple.
+    """
+
+    starttime = time.perf_counter()
+    for argument in arguments:
+        query(*argument)
+    return 1000 * (time.perf_counter() - starttime) / len(arguments)
+
+
+def bench_fact_store(companies=None, conceptcount=200, periodcount=40):
+    results = []
+    generator = numpy.random.default_rng(1)
+    for companycount in companies or DEFAULT_COMPANIES:
+        facts = synthetic_tidy_facts(companycount, conceptcount, periodcount)
+
+        starttime = time.perf_counter()
+        store = FactStore()
+        store.add(facts)
+        len(store.scan(ciks=[1000000], concepts=["Concept0"]))
+        buildseconds = time.perf_counter() - starttime
+
+        ciks = 1000000 + generator.integers(0, companycount, QUERIES)
+        concepts = [f"Concept{i}" for i in generator.integers(0, conceptcount, QUERIES)]
+        ends = facts["end"].drop_duplicates().sample(QUERIES, replace=True, random_state=1).dt.strftime("%Y-%m-%d").tolist()
+        lookups = list(zip(ciks, concepts))
+        ranges = [(cik, concept, "2003-01-01", "2005-12-31") for cik, concept in lookups]
+        crosssections = list(zip(concepts, ends))
+
+        def mask_lookup(cik, concept):
+            return facts[(facts["cik"] == cik) & (facts["concept"] == concept)]
+
+        def mask_range(cik, concept, start, end):
+            return facts[(facts["cik"] == cik) & (facts["concept"] == concept) & (facts["end"] >= start) & (facts["end"] <= end)]
+
+        def mask_aggregate(concept, end):
+            selected = facts[(facts["concept"] == concept) & (facts["end"] == end)]
+            return selected.groupby("cik")["val"].sum()
+
+        def store_range(cik, concept, start, end):
+            return store.lookup(cik, concept, start=start, end=end)
+
+        def store_aggregate(concept, end):
+            return store.aggregate(concept, by="cik", how="sum", start=end, end=end, latest=False)
+
+        # The masks scan every row, so they are timed on fewer queries
+        masksample = max(5, QUERIES // 20)
+        result = {
+            "facts": len(facts),
+            "build_seconds": round(buildseconds, 2),
+            "mask_lookup_ms": round(per_query_ms(mask_lookup, lookups[:masksample]), 2),
+            "store_lookup_ms": round(per_query_ms(store.lookup, lookups), 3),
+            "mask_range_ms": round(per_query_ms(mask_range, ranges[:masksample]), 2),
+            "store_range_ms": round(per_query_ms(store_range, ranges), 3),
+            "mask_aggregate_ms": round(per_query_ms(mask_aggregate, crosssections[:masksample]), 2),
+            "store_aggregate_ms": round(per_query_ms(store_aggregate, crosssections), 3),
+            "store_positions_us": round(
+                1000 * per_query_ms(lambda cik, concept: store._select([cik], [concept], None, None, None, None, False), lookups), 1
+            ),
+        }
+        results.append(result)
+        print(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("companies", nargs="*", type=int)
+    parser.add_argument("--concepts", type=int, default=200)
+    parser.add_argument("--periods", type=int, default=40)
+    arguments = parser.parse_args()
+    bench_fact_store(arguments.companies or None, arguments.concepts, arguments.periods)
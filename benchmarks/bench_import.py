@@ -0,0 +1,90 @@
+"""
+Benchmark the time to import tidyxbrl and to first look up its public functions.
+
+Every statement runs in a fresh interpreter, so that no module is already loaded, and the
+heavy dependencies it loaded are listed. `import tidyxbrl` loads none of them; the first
+look up of a function loads its submodule. `from tidyxbrl import *` loads every submodule,
+the cost of the package before it was loaded lazily.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --repeat 10 --max-import-ms 50
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+HEAVY_MODULES = ["pandas", "numpy", "bs4", "lxml", "requests", "httpx", "tqdm", "pyarrow"]
+
+IMPORT_STATEMENTS = {
+    "import tidyxbrl": "import tidyxbrl",
+    "tidyxbrl.HttpClient": "import tidyxbrl; tidyxbrl.HttpClient",
+    "tidyxbrl.edgar_cik": "import tidyxbrl; tidyxbrl.edgar_cik",
+    "tidyxbrl.edgar_query": "import tidyxbrl; tidyxbrl.edgar_query",
+    "tidyxbrl.xbrl_parse": "import tidyxbrl; tidyxbrl.xbrl_parse",
+    "from tidyxbrl import *": "from tidyxbrl import *",
+}
+
+# Times the statement inside the child & reports the heavy modules it loaded
+TIMING_PROGRAM = """
+import json, sys, time
+starttime = time.perf_counter()
+exec({statement!r})
+seconds = time.perf_counter() - starttime
+print(json.dumps({{"seconds": seconds, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def time_statement(statement):
+    """
+    Run statement in a fresh interpreter and return its seconds & the heavy modules loaded.
+    """
+
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(ROOT, "src"), ROOT]))
+    completed = subprocess.run(
+        [sys.executable, "-c", TIMING_PROGRAM.format(statement=statement, heavy=HEAVY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=environment,
+        cwd=ROOT,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def bench_import(repeat=5):
+    """
+    Time every statement of IMPORT_STATEMENTS repeat times and return the result rows.
+    """
+
+    results = []
+    for name, statement in IMPORT_STATEMENTS.items():
+        runs = [time_statement(statement) for _ in range(repeat)]
+        results.append(
+            {
+                "statement": name,
+                "median_ms": round(1000 * statistics.median(run["seconds"] for run in runs), 1),
+                "min_ms": round(1000 * min(run["seconds"] for run in runs), 1),
+                "loaded": runs[-1]["loaded"],
+            }
+        )
+        print(results[-1])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, help="fail when `import tidyxbrl` takes longer")
+    arguments = parser.parse_args()
+
+    results = bench_import(arguments.repeat)
+    if arguments.max_import_ms is not None:
+        importresult = results[0]
+        if importresult["median_ms"] > arguments.max_import_ms or importresult["loaded"]:
+            print(f"Regression: import tidyxbrl took {importresult['median_ms']}ms and loaded {importresult['loaded']}")
+            sys.exit(1)
@@ -0,0 +1,88 @@
+"""
+Benchmark the overhead of the stage instrumentation on xbrl_parse.
+
+The same synthetic instance is parsed with no hook installed, which is the default, and
+under a Profiler, and the per call cost of an empty instrumented function is measured in
+both states.
+
+    python benchmarks/bench_instrumentation.py
+    python benchmarks/bench_instrumentation.py 1000 20000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from benchmarks.synthetic import write_synthetic_instance
+from src.tidyxbrl import Profiler, instrumented, xbrl_parse
+
+DEFAULT_SIZES = [1000, 20000]
+CALLS = 200000
+
+
+@instrumented
+def empty_stage():
+    return None
+
+
+def call_seconds(calls=CALLS):
+    """
+    Return the seconds per call of an empty instrumented function.
+    """
+
+    starttime = time.perf_counter()
+    for _ in range(calls):
+        empty_stage()
+    return (time.perf_counter() - starttime) / calls
+
+
+def parse_seconds(path, repeat=3):
+    """
+    Return the best of repeat timings of xbrl_parse on path.
+    """
+
+    timings = []
+    for _ in range(repeat):
+        starttime = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            xbrl_parse(path)
+        timings.append(time.perf_counter() - starttime)
+    return min(timings)
+
+
+def bench_instrumentation(sizes=None):
+    results = []
+    disabledcall = call_seconds()
+    with Profiler():
+        enabledcall = call_seconds()
+    print({"disabled_call_us": round(disabledcall * 1e6, 3), "enabled_call_us": round(enabledcall * 1e6, 3)})
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        for factcount in sizes or DEFAULT_SIZES:
+            path = write_synthetic_instance(os.path.join(tempdir, f"synthetic_{factcount}.xml"), factcount)
+            disabledseconds = parse_seconds(path)
+            with Profiler() as profiler:
+                enabledseconds = parse_seconds(path)
+            result = {
+                "facts": factcount,
+                "disabled_seconds": round(disabledseconds, 4),
+                "enabled_seconds": round(enabledseconds, 4),
+                "overhead_pct": round(100 * (enabledseconds - disabledseconds) / disabledseconds, 2),
+                "stages": len(profiler.totals),
+            }
+            results.append(result)
+            print(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sizes", nargs="*", type=int)
+    arguments = parser.parse_args()
+    bench_instrumentation(arguments.sizes or None)
@@ -0,0 +1,84 @@
+"""
+Benchmark PointInTimeIndex as of queries against a scan & sort per query.
+
+Synthetic tidy companyfacts rows of many companies, where every quarter is filed again a
+year later with a restated value, are queried for the value of one concept known on every
+rebalance date for every company. The pandas baseline masks the facts of the company &
+concept filed by the date and sorts them on (end, filed) for every query; it is timed on
+a sample of the queries.
+
+    python benchmarks/bench_point_in_time.py
+    python benchmarks/bench_point_in_time.py 1000 --concepts 200 --periods 40 --rebalances 120
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy
+import pandas
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from benchmarks.synthetic import synthetic_tidy_facts
+from src.tidyxbrl import PointInTimeIndex
+
+DEFAULT_COMPANIES = [100, 1000]
+SCAN_QUERIES = 20
+
+
+def scan_asof(facts, cik, date, concept):
+    """
+    Return the value of concept known on date for cik with a mask & a sort.
+    """
+
+    known = facts[(facts["cik"] == cik) & (facts["concept"] == concept) & (facts["filed"] <= date)]
+    if not len(known):
+        return numpy.nan
+    return known.sort_values(["end", "filed"], kind="stable")["val"].iloc[-1]
+
+
+def bench_point_in_time(companies=None, conceptcount=200, periodcount=40, rebalancecount=120):
+    results = []
+    for companycount in companies or DEFAULT_COMPANIES:
+        facts = synthetic_tidy_facts(companycount, conceptcount, periodcount)
+
+        starttime = time.perf_counter()
+        index = PointInTimeIndex(facts)
+        buildseconds = time.perf_counter() - starttime
+
+        # Every company on every month end of the synthetic history
+        rebalances = pandas.date_range("2000-06-30", periods=rebalancecount, freq="M")
+        ciks = numpy.tile(1000000 + numpy.arange(companycount), rebalancecount)
+        dates = numpy.repeat(rebalances.to_numpy(), companycount)
+        starttime = time.perf_counter()
+        answers = index.asof(ciks, dates, "Concept7", quarters=1)
+        asofseconds = time.perf_counter() - starttime
+
+        sample = numpy.random.default_rng(1).integers(0, len(ciks), SCAN_QUERIES)
+        starttime = time.perf_counter()
+        expected = [scan_asof(facts, ciks[i], dates[i], "Concept7") for i in sample]
+        scanseconds = (time.perf_counter() - starttime) / SCAN_QUERIES
+        assert numpy.allclose(answers["val"].to_numpy()[sample], expected, equal_nan=True), "asof should match the scan"
+
+        result = {
+            "facts": len(facts),
+            "queries": len(ciks),
+            "build_seconds": round(buildseconds, 2),
+            "asof_seconds": round(asofseconds, 3),
+            "asof_us_per_query": round(1e6 * asofseconds / len(ciks), 2),
+            "scan_ms_per_query": round(1000 * scanseconds, 2),
+        }
+        results.append(result)
+        print(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("companies", nargs="*", type=int)
+    parser.add_argument("--concepts", type=int, default=200)
+    parser.add_argument("--periods", type=int, default=40)
+    parser.add_argument("--rebalances", type=int, default=120)
+    arguments = parser.parse_args()
+    bench_point_in_time(arguments.companies or None, arguments.concepts, arguments.periods, arguments.rebalances)
@@ -0,0 +1,349 @@
+"""
+Offline benchmark suite of the tidyxbrl fetchers & parsers on replayed SEC responses.
+
+Every case calls a public function (xbrl_parse, edgar_query, edgar_frames, edgar_cik &
+xbrl_query) exactly as a user would, with a ReplayClient sending its requests to a local
+ReplayServer, so the timings cover the HTTP round trips, the response parsing & the tidy
+conversions without network access or rate limits. Each case is timed repeat times, then
+run once more under tracemalloc for its peak memory. The results are written as JSON and
+can be compared against an earlier results file.
+
+The fixtures are read from the fixture directory, and missing fixtures are generated
+there from benchmarks/synthetic.py. Recorded responses can be dropped in under the same
+names to benchmark real filings:
+
+    instance_small.xml, instance_medium.xml, instance_huge.xml   XBRL instance documents
+    companyfacts.json                                             companyfacts of a large filer
+    frames.json                                                   a frames response
+    browse_edgar/<start row, 5 digits>.html                       browse-edgar result pages
+    fact_search/<offset, 7 digits>.json                           XBRL US fact/search pages
+
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --profile quick --output quick.json
+    python benchmarks/bench_suite.py --fixtures bench_fixtures/ --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.parse
+import pandas
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from benchmarks.replay import ReplayServer, ReplayClient
+from benchmarks.synthetic import (
+    synthetic_instance,
+    synthetic_companyfacts,
+    synthetic_frames,
+    synthetic_browse_edgar,
+    synthetic_fact_search,
+)
+from src.tidyxbrl import set_default_client, xbrl_parse, edgar_query, edgar_frames, edgar_cik, xbrl_query
+
+# Fixture sizes: instance facts, companyfacts facts, frames rows, browse-edgar companies,
+# fact/search facts & fact/search page limit
+SUITE_PROFILES = {
+    "quick": {
+        "instance_small": 1000,
+        "instance_medium": 5000,
+        "instance_huge": 20000,
+        "companyfacts": 20000,
+        "frames": 2000,
+        "browse_edgar": 250,
+        "fact_search": 5000,
+        "fact_search_limit": 1000,
+    },
+    "full": {
+        "instance_small": 1000,
+        "instance_medium": 20000,
+        "instance_huge": 200000,
+        "companyfacts": 150000,
+        "frames": 8000,
+        "browse_edgar": 1050,
+        "fact_search": 20000,
+        "fact_search_limit": 2000,
+    },
+}
+
+SUITE_CIK = "0000320193"
+SUITE_FRAME = "us-gaap/AccountsPayableCurrent/USD/CY2019Q1I"
+SUITE_CIK_QUERY = "SYNTHETIC"
+
+
+def suite_fixtures(directory, sizes):
+    """
+    Write the fixtures missing from directory and return the paths of every fixture.
+    """
+
+    def fixture(name, build):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            content = build()
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(content if isinstance(content, str) else json.dumps(content))
+        return path
+
+    paths = {}
+    for name in ["instance_small", "instance_medium", "instance_huge"]:
+        paths[name] = fixture(name + ".xml", lambda factcount=sizes[name]: synthetic_instance(factcount))
+    paths["companyfacts"] = fixture("companyfacts.json", lambda: synthetic_companyfacts(sizes["companyfacts"]))
+    paths["frames"] = fixture("frames.json", lambda: synthetic_frames(sizes["frames"]))
+
+    browsedirectory = os.path.join(directory, "browse_edgar")
+    if not os.path.isdir(browsedirectory):
+        for start_row in range(0, sizes["browse_edgar"] + 1, 100):
+            fixture(
+                os.path.join("browse_edgar", f"{start_row:05d}.html"),
+                lambda start_row=start_row: synthetic_browse_edgar(start_row, sizes["browse_edgar"], SUITE_CIK_QUERY),
+            )
+    paths["browse_edgar"] = browsedirectory
+
+    searchdirectory = os.path.join(directory, "fact_search")
+    if not os.path.isdir(searchdirectory):
+        limit = sizes["fact_search_limit"]
+        for offset in range(0, sizes["fact_search"] + 1, limit):
+            fixture(
+                os.path.join("fact_search", f"{offset:07d}.json"),
+                lambda offset=offset: synthetic_fact_search(offset, limit, sizes["fact_search"], SUITE_CIK),
+            )
+    paths["fact_search"] = searchdirectory
+    return paths
+
+
+def suite_routes(server, paths):
+    """
+    Serve the fixtures from server at the paths the fetchers request.
+    """
+
+    def read(path):
+        with open(path, "rb") as file:
+            return file.read()
+
+    jsonheaders = {"Content-Type": "application/json"}
+    for name in ["instance_small", "instance_medium", "instance_huge"]:
+        server.routes[f"/Archives/edgar/data/320193/{name}.xml"] = (200, {"Content-Type": "application/xml"}, read(paths[name]))
+    server.routes[f"/api/xbrl/companyfacts/CIK{SUITE_CIK}.json"] = (200, jsonheaders, read(paths["companyfacts"]))
+    server.routes[f"/api/xbrl/frames/{SUITE_FRAME}.json"] = (200, jsonheaders, read(paths["frames"]))
+
+    browsepages = {
+        int(name.split(".")[0]): read(os.path.join(paths["browse_edgar"], name))
+        for name in os.listdir(paths["browse_edgar"])
+    }
+
+    def browse_edgar(handler):
+        start_row = int(urllib.parse.parse_qs(handler.body.decode()).get("start", ["0"])[0])
+        body = browsepages.get(start_row, b"<html><body><p>No matching companies.</p></body></html>")
+        return 200, {"Content-Type": "text/html"}, body
+
+    server.routes["/cgi-bin/browse-edgar"] = browse_edgar
+
+    searchpages = {
+        int(name.split(".")[0]): read(os.path.join(paths["fact_search"], name))
+        for name in os.listdir(paths["fact_search"])
+    }
+
+    def fact_search(handler):
+        fields = urllib.parse.parse_qs(urllib.parse.urlparse(handler.path).query).get("fields", [""])[0]
+        offset = int(fields.split("fact.offset(")[1].split(")")[0]) if "fact.offset(" in fields else 0
+        body = searchpages.get(offset, json.dumps({"paging": {"offset": offset, "count": 0}, "data": []}).encode())
+        return 200, jsonheaders, body
+
+    server.routes["/api/v1/fact/search"] = fact_search
+
+
+def suite_cases(sizes):
+    """
+    Return the benchmark cases as {name: callable(client)}.
+    """
+
+    def parse(name, engine):
+        url = f"https://www.sec.gov/Archives/edgar/data/320193/{name}.xml"
+        return lambda client: xbrl_parse(url, engine=engine, client=client)
+
+    cases = {}
+    for name in ["instance_small", "instance_medium", "instance_huge"]:
+        cases[f"xbrl_parse.iterparse.{name}"] = parse(name, "iterparse")
+    # The soup engine holds the whole tree, the huge instance is left to iterparse
+    for name in ["instance_small", "instance_medium"]:
+        cases[f"xbrl_parse.soup.{name}"] = parse(name, "soup")
+    cases["edgar_query.companyfacts.tidy"] = lambda client: edgar_query(
+        SUITE_CIK, query_type="companyfacts", tidy=True, client=client
+    )
+    cases["edgar_query.companyfacts"] = lambda client: edgar_query(SUITE_CIK, query_type="companyfacts", client=client)
+    cases["edgar_frames.tidy"] = lambda client: edgar_frames(SUITE_FRAME, tidy=True, client=client)
+    cases["edgar_frames"] = lambda client: edgar_frames(SUITE_FRAME, client=client)
+    cases["edgar_cik.comprehensive"] = lambda client: edgar_cik(
+        SUITE_CIK_QUERY, comprehensive=True, max_start_row=sizes["browse_edgar"] + 100, client=client
+    )
+    cases["xbrl_query.paginate"] = lambda client: xbrl_query(
+        "replay-token",
+        {"entity.cik": SUITE_CIK, "fields": "fact.id,fact.value,concept.local-name,period.fiscal-year"},
+        baseapiurl="https://api.xbrl.us/api/v1/fact/search?",
+        paginate=True,
+        page_limit=sizes["fact_search_limit"],
+        client=client,
+    )
+    return cases
+
+
+def run_case(case, client, server, repeat):
+    """
+    Time repeat calls of case, then measure the peak traced memory of one more call.
+    """
+
+    timings = []
+    requests, bytessent = server.counters()
+    for _ in range(repeat):
+        starttime = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            output = case(client)
+        timings.append(time.perf_counter() - starttime)
+    endrequests, endbytes = server.counters()
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            case(client)
+        peakbytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "rows": len(output) if output is not None else 0,
+        "requests": (endrequests - requests) // repeat,
+        "response_mb": round((endbytes - bytessent) / repeat / 2 ** 20, 3),
+        "min_seconds": round(min(timings), 4),
+        "median_seconds": round(statistics.median(timings), 4),
+        "peak_mb": round(peakbytes / 2 ** 20, 1),
+        "frame_mb": round(output.memory_usage(deep=True).sum() / 2 ** 20, 1) if isinstance(output, pandas.DataFrame) else None,
+    }
+
+
+def suite_metadata(profile, repeat):
+    """
+    Describe the run, so that results files are only compared like for like.
+    """
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "profile": profile,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "pandas": pandas.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare_results(results, baseline, threshold):
+    """
+    Print the median time & peak memory ratios against a baseline results file.
+
+    Returns:
+        list: Names of the cases slower than threshold times the baseline.
+    """
+
+    baselinecases = {result["case"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        previous = baselinecases.get(result["case"])
+        if previous is None:
+            continue
+        timeratio = result["median_seconds"] / max(previous["median_seconds"], 1e-9)
+        memoryratio = result["peak_mb"] / max(previous["peak_mb"], 0.1)
+        regressed = timeratio > threshold
+        if regressed:
+            regressions.append(result["case"])
+        print(
+            f"{result['case']:<40} time x{timeratio:5.2f}  memory x{memoryratio:5.2f}"
+            + ("  REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def bench_suite(profile="full", fixtures=None, repeat=3, cases=None, output="bench_suite_results.json"):
+    """
+    Run the suite and write the results file.
+
+    Args:
+        profile (str): Fixture sizes, a key of SUITE_PROFILES.
+        fixtures (str, optional): Fixture directory, kept between runs. Defaults to a
+        temporary directory.
+        repeat (int): Timed calls per case.
+        cases (list, optional): Names of the cases to run, or their prefixes. Defaults to
+        every case.
+        output (str, optional): Path of the JSON results file, or None.
+
+    Returns:
+        dict: The metadata & the result row of every case.
+    """
+
+    sizes = SUITE_PROFILES[profile]
+    with contextlib.ExitStack() as stack:
+        directory = fixtures or stack.enter_context(tempfile.TemporaryDirectory())
+        paths = suite_fixtures(directory, sizes)
+        server = stack.enter_context(ReplayServer())
+        suite_routes(server, paths)
+        client = stack.enter_context(ReplayClient(server.url))
+        # A request a case does not route through client still never leaves the machine
+        previousclient = set_default_client(client)
+        stack.callback(set_default_client, previousclient)
+
+        results = []
+        for name, case in suite_cases(sizes).items():
+            if cases and not any(name.startswith(prefix) for prefix in cases):
+                continue
+            result = {"case": name, **run_case(case, client, server, repeat)}
+            results.append(result)
+            print(result)
+
+    report = {"metadata": suite_metadata(profile, repeat), "results": results}
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=1)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profile", choices=list(SUITE_PROFILES), default="full")
+    parser.add_argument("--fixtures", help="fixture directory, generated where missing & kept between runs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--case", action="append", help="run only the cases starting with this name")
+    parser.add_argument("--output", default="bench_suite_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    arguments = parser.parse_args()
+
+    report = bench_suite(arguments.profile, arguments.fixtures, arguments.repeat, arguments.case, arguments.output)
+    if arguments.compare:
+        with open(arguments.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline["metadata"].get("profile") != arguments.profile:
+            print("Warning: the baseline was run with the " + str(baseline["metadata"].get("profile")) + " profile")
+        if compare_results(report["results"], baseline, arguments.threshold):
+            sys.exit(1)
@@ -0,0 +1,87 @@
+"""
+Benchmark xbrl_parse on synthetic instance documents of increasing size.
+
+The per fact cost should stay flat as the document grows, i.e. parse time scales
+linearly with the number of facts. Every measurement runs in a fresh interpreter so that
+the peak resident memory of each engine is reported independently.
+
+    python benchmarks/bench_xbrl_parse.py
+    python benchmarks/bench_xbrl_parse.py 1000 10000 100000
+    python benchmarks/bench_xbrl_parse.py --engine iterparse 100000
+    python benchmarks/bench_xbrl_parse.py --engine ixbrl 10000 50000
+
+The ixbrl engine reads a synthetic inline XBRL .htm of the same facts instead.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from benchmarks.synthetic import write_synthetic_instance, write_synthetic_ixbrl
+
+DEFAULT_SIZES = [1000, 5000, 10000, 50000, 100000]
+DEFAULT_ENGINES = ["soup", "iterparse"]
+
+
+def measure_xbrl_parse(path, engine):
+    """
+    Parse path once in the current process and return the timing & memory figures.
+    """
+
+    from src.tidyxbrl import xbrl_parse
+
+    starttime = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        outputframe = xbrl_parse(path, engine=engine)
+    elapsed = time.perf_counter() - starttime
+    return {
+        "rows": len(outputframe),
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def bench_xbrl_parse(sizes=None, engines=None):
+    """
+    Time xbrl_parse for each engine & synthetic document size and return the result rows.
+    """
+
+    results = []
+    with tempfile.TemporaryDirectory() as tempdir:
+        for factcount in sizes or DEFAULT_SIZES:
+            for engine in engines or DEFAULT_ENGINES:
+                if engine == "ixbrl":
+                    path = write_synthetic_ixbrl(os.path.join(tempdir, f"synthetic_{factcount}.htm"), factcount)
+                else:
+                    path = write_synthetic_instance(os.path.join(tempdir, f"synthetic_{factcount}.xml"), factcount)
+                child = subprocess.run(
+                    [sys.executable, __file__, "--measure", path, "--engine", engine],
+                    capture_output=True, text=True, check=True,
+                )
+                result = {"engine": engine, "facts": factcount, "file_mb": round(os.path.getsize(path) / 2 ** 20, 1)}
+                result.update(json.loads(child.stdout.strip().splitlines()[-1]))
+                result["us_per_fact"] = round(result["seconds"] / factcount * 1e6, 1)
+                results.append(result)
+                print(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sizes", nargs="*", type=int)
+    parser.add_argument("--engine", action="append", dest="engines")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+    if arguments.measure:
+        print(json.dumps(measure_xbrl_parse(arguments.measure, arguments.engines[0])))
+    else:
+        bench_xbrl_parse(arguments.sizes or None, arguments.engines)
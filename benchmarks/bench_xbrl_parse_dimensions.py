@@ -0,0 +1,96 @@
+"""
+Benchmark the dimensions = True output of xbrl_parse against the segment column.
+
+Synthetic instance documents whose dimensional contexts carry several explicit members are
+parsed both ways. Memory is the deep size of the returned frame, plus the side table of
+members for dimensions = True. Filtering compares a string match on the segment column,
+which only holds the first member of a context, with xbrl_dimension_filter.
+
+    python benchmarks/bench_xbrl_parse_dimensions.py
+    python benchmarks/bench_xbrl_parse_dimensions.py 10000 100000 --axes 4
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from benchmarks.synthetic import write_synthetic_instance
+from src.tidyxbrl import xbrl_parse, xbrl_dimension_filter
+
+DEFAULT_SIZES = [10000, 50000, 100000]
+REPEATS = 20
+
+
+def frame_mb(frame):
+    """
+    Return the deep memory usage of frame in MB.
+    """
+
+    return frame.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def per_filter_ms(query):
+    """
+    Return the mean milliseconds of REPEATS calls of query.
+    """
+
+    starttime = time.perf_counter()
+    for _ in range(REPEATS):
+        query()
+    return 1000 * (time.perf_counter() - starttime) / REPEATS
+
+
+def bench_xbrl_parse_dimensions(sizes=None, engine="iterparse", axiscount=3):
+    """
+    Parse every synthetic size with & without dimensions and return the result rows.
+    """
+
+    results = []
+    with tempfile.TemporaryDirectory() as tempdir:
+        for factcount in sizes or DEFAULT_SIZES:
+            path = write_synthetic_instance(
+                os.path.join(tempdir, f"synthetic_{factcount}.xml"), factcount, axiscount=axiscount
+            )
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                starttime = time.perf_counter()
+                segmentframe = xbrl_parse(path, engine=engine)
+                segmentseconds = time.perf_counter() - starttime
+                starttime = time.perf_counter()
+                dimensionframe = xbrl_parse(path, engine=engine, dimensions=True)
+                dimensionseconds = time.perf_counter() - starttime
+
+            dimensiontable = dimensionframe.attrs["dimensions"]
+            member = "us-gaap:Product3Member"
+            result = {
+                "facts": factcount,
+                "members": len(dimensiontable),
+                "segment_seconds": round(segmentseconds, 3),
+                "dimensions_seconds": round(dimensionseconds, 3),
+                "segment_mb": round(frame_mb(segmentframe), 2),
+                "dimensions_mb": round(frame_mb(dimensionframe) + frame_mb(dimensiontable), 2),
+                "segment_filter_ms": round(per_filter_ms(lambda: segmentframe[segmentframe["segment"] == member]), 3),
+                "dimensions_filter_ms": round(
+                    per_filter_ms(lambda: xbrl_dimension_filter(dimensionframe, {"srt:ProductOrServiceAxis": member})), 3
+                ),
+                "segment_totals_ms": round(per_filter_ms(lambda: segmentframe[segmentframe["segment"].isna()]), 3),
+                "dimensions_totals_ms": round(per_filter_ms(lambda: xbrl_dimension_filter(dimensionframe)), 3),
+            }
+            result["reduction"] = round(result["segment_mb"] / result["dimensions_mb"], 1)
+            results.append(result)
+            print(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sizes", nargs="*", type=int)
+    parser.add_argument("--engine", default="iterparse")
+    parser.add_argument("--axes", type=int, default=3)
+    arguments = parser.parse_args()
+    bench_xbrl_parse_dimensions(arguments.sizes or None, arguments.engine, arguments.axes)
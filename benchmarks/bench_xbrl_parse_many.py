@@ -0,0 +1,71 @@
+"""
+Benchmark xbrl_parse_many over a local directory of instance documents with an
+increasing number of worker processes.
+
+Parse time should fall close to linearly with the worker count, up to the number of
+available cores.
+
+    python benchmarks/bench_xbrl_parse_many.py
+    python benchmarks/bench_xbrl_parse_many.py --directory filings/ --workers 1 2 4 8
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from benchmarks.synthetic import write_synthetic_instance
+from src.tidyxbrl import xbrl_parse_many
+
+
+def bench_xbrl_parse_many(paths, workercounts, engine="soup"):
+    """
+    Time xbrl_parse_many over paths for every worker count and return the result rows.
+    """
+
+    results = []
+    for workers in workercounts:
+        starttime = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            outputframe = xbrl_parse_many(paths, workers=workers, engine=engine)
+        elapsed = time.perf_counter() - starttime
+        results.append(
+            {
+                "workers": workers,
+                "filings": len(paths),
+                "rows": len(outputframe),
+                "failures": len(outputframe.attrs["failures"]),
+                "seconds": round(elapsed, 3),
+                "speedup": round(results[0]["seconds"] / elapsed, 2) if results else 1.0,
+            }
+        )
+        print(results[-1])
+    return results
+
+
+if __name__ == "__main__":
+    cpucount = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--directory", help="Directory of *.xml instances. Defaults to synthetic filings.")
+    parser.add_argument("--filings", type=int, default=4 * cpucount, help="Number of synthetic filings.")
+    parser.add_argument("--facts", type=int, default=10000, help="Facts per synthetic filing.")
+    parser.add_argument("--workers", type=int, nargs="*", default=sorted({1, 2, 4, cpucount}))
+    parser.add_argument("--engine", default="soup")
+    arguments = parser.parse_args()
+
+    print(f"CPU count: {cpucount}")
+    if arguments.directory:
+        bench_xbrl_parse_many(sorted(glob.glob(os.path.join(arguments.directory, "*.xml"))), arguments.workers, arguments.engine)
+    else:
+        with tempfile.TemporaryDirectory() as tempdir:
+            filingpaths = [
+                write_synthetic_instance(os.path.join(tempdir, f"synthetic_{i}.xml"), arguments.facts)
+                for i in range(arguments.filings)
+            ]
+            bench_xbrl_parse_many(filingpaths, arguments.workers, arguments.engine)
@@ -0,0 +1,71 @@
+"""
+Benchmark the typed = True output of xbrl_parse against the string output on synthetic
+instance documents of increasing size.
+
+Both outputs are converted from the same parsed frame, so only the typing is timed.
+Memory is the deep size of the returned frame.
+
+    python benchmarks/bench_xbrl_parse_typed.py
+    python benchmarks/bench_xbrl_parse_typed.py 10000 100000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from benchmarks.synthetic import write_synthetic_instance
+from src.tidyxbrl.xbrl_parse import xbrl_parse, _xbrl_typed
+
+DEFAULT_SIZES = [10000, 50000, 100000]
+
+
+def frame_mb(frame):
+    """
+    Return the deep memory usage of frame in MB.
+    """
+
+    return round(frame.memory_usage(deep=True).sum() / 2 ** 20, 2)
+
+
+def bench_xbrl_parse_typed(sizes=None, engine="iterparse"):
+    """
+    Time the typed conversion for every synthetic size and return the result rows.
+    """
+
+    results = []
+    with tempfile.TemporaryDirectory() as tempdir:
+        for factcount in sizes or DEFAULT_SIZES:
+            path = write_synthetic_instance(os.path.join(tempdir, f"synthetic_{factcount}.xml"), factcount)
+            starttime = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                stringframe = xbrl_parse(path, engine=engine)
+            parseseconds = time.perf_counter() - starttime
+
+            result = {
+                "facts": factcount,
+                "parse_seconds": round(parseseconds, 3),
+                "string_mb": frame_mb(stringframe),
+            }
+            for numeric in ["float64", "decimal"]:
+                starttime = time.perf_counter()
+                typedframe = _xbrl_typed(stringframe, numeric)
+                result[numeric + "_seconds"] = round(time.perf_counter() - starttime, 3)
+                result[numeric + "_mb"] = frame_mb(typedframe)
+            result["reduction"] = round(result["string_mb"] / result["float64_mb"], 1)
+            results.append(result)
+            print(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sizes", nargs="*", type=int)
+    parser.add_argument("--engine", default="iterparse")
+    arguments = parser.parse_args()
+    bench_xbrl_parse_typed(arguments.sizes or None, arguments.engine)
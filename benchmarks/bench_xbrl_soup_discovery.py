@@ -0,0 +1,123 @@
+"""
+Benchmark the discovery phase of the soup engine of xbrl_parse on large synthetic instances.
+
+The discovery phase finds the descriptive columns, the contexts & the facts of the parsed
+BeautifulSoup tree and reads the column values of every context. The single traversal of
+_xbrl_soup_discover is timed against the previous per element predicate, numpy.unique
+column scan & repeated tag.find lookups, kept below as legacy_discovery, and both are
+reported as a share of the complete soup parse.
+
+    python benchmarks/bench_xbrl_soup_discovery.py
+    python benchmarks/bench_xbrl_soup_discovery.py 10000 50000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import numpy
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from benchmarks.synthetic import synthetic_instance
+from src.tidyxbrl.xbrl_parse import xbrl_parse, _xbrl_soup_discover, _xbrl_soup_context_row
+
+DEFAULT_SIZES = [10000, 50000]
+
+
+def legacy_discovery(soup):
+    """
+    The discovery phase of the soup engine before the single traversal.
+    """
+
+    def xbrlcolumnprefilter(tag):
+        return (
+            tag.name != "body"
+            and tag.name != "xbrl"
+            and tag.name != "html"
+            and tag.prefix == ""
+            and ":" not in tag.name
+        )
+
+    tag_listall = soup.find_all(xbrlcolumnprefilter)
+    empty_tag_list = soup.select("context")
+    columnlist = []
+    for temp_tag in tag_listall:
+        if temp_tag.name not in list(numpy.unique(columnlist)):
+            columnlist.append(temp_tag.name)
+    columnlist = list(columnlist) + ["datacode", "datavalue"]
+
+    contextdata = []
+    for tag in empty_tag_list:
+        row = {}
+        for columnname in columnlist:
+            if columnname == "context":
+                row[columnname] = tag.get("id")
+            else:
+                if tag.find(columnname):
+                    if not tag.find(columnname).findChild():
+                        row[columnname] = tag.find(columnname).text
+                    elif tag.find(columnname).findChild().name not in columnlist:
+                        row[columnname] = tag.find(columnname).findChild().text
+                    else:
+                        row[columnname] = numpy.nan
+        contextdata.append(row)
+    return columnlist, contextdata, soup.findAll(attrs={"contextRef": not None})
+
+
+def discovery(soup):
+    """
+    The discovery phase of the soup engine.
+    """
+
+    columnlist, contexttags, facttags = _xbrl_soup_discover(soup)
+    columnlist = columnlist + ["datacode", "datavalue"]
+    return columnlist, [_xbrl_soup_context_row(tag, columnlist) for tag in contexttags], facttags
+
+
+def bench_xbrl_soup_discovery(sizes=None):
+    """
+    Time the legacy & current discovery phases for every synthetic size and return the
+    result rows.
+    """
+
+    results = []
+    for factcount in sizes or DEFAULT_SIZES:
+        document = synthetic_instance(factcount).encode()
+        soup = BeautifulSoup(document, "xml")
+
+        timings = {}
+        outputs = {}
+        for name, function in [("legacy", legacy_discovery), ("current", discovery)]:
+            starttime = time.perf_counter()
+            outputs[name] = function(soup)
+            timings[name] = time.perf_counter() - starttime
+        assert outputs["legacy"][0] == outputs["current"][0], "The columns should not change"
+        assert outputs["legacy"][1] == outputs["current"][1], "The context rows should not change"
+
+        starttime = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            xbrl_parse(document)
+        parseseconds = time.perf_counter() - starttime
+
+        results.append(
+            {
+                "facts": factcount,
+                "legacy_seconds": round(timings["legacy"], 3),
+                "current_seconds": round(timings["current"], 3),
+                "speedup": round(timings["legacy"] / timings["current"], 1),
+                "parse_seconds": round(parseseconds, 3),
+                "current_share": round(timings["current"] / parseseconds, 3),
+            }
+        )
+        print(results[-1])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sizes", nargs="*", type=int)
+    bench_xbrl_soup_discovery(parser.parse_args().sizes or None)
@@ -0,0 +1,111 @@
+"""
+Offline replay of the SEC & XBRL US endpoints for the benchmarks.
+
+ReplayServer is a local HTTP server answering from a route table, and ReplayClient is an
+HttpClient sending the requests of the fetchers, addressed to sec.gov, data.sec.gov or
+api.xbrl.us, to the replay server instead. The fetchers run unchanged, through the pooled
+session, the response parsing & the tidy conversions, with no network access.
+
+    with ReplayServer() as server:
+        server.routes["/api/xbrl/frames/us-gaap/Revenues/USD/CY2022.json"] = (200, {}, body)
+        edgar_frames("us-gaap/Revenues/USD/CY2022", client=ReplayClient(server.url))
+"""
+
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from src.tidyxbrl import HttpClient
+
+REPLAY_HOSTS = re.compile(r"^https?://(?:www\.sec\.gov|data\.sec\.gov|api\.xbrl\.us)(?=/|$)")
+
+
+class ReplayServer:
+    """
+    The ReplayServer class serves recorded responses on 127.0.0.1.
+
+    Attributes:
+        routes (dict): Maps a path, without the query string, to a (status, headers, body)
+        tuple or to a callable of the request handler returning one. The handler holds the
+        request body in handler.body.
+        requests (int): Requests answered.
+        bytes (int): Response body bytes sent.
+        url (str): Base url of the server.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        replay = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.body = self.rfile.read(length) if length else b""
+                route = replay.routes.get(self.path.split("?")[0], (404, {}, b"not found"))
+                status, headers, body = route(self) if callable(route) else route
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with replay._lock:
+                    replay.requests += 1
+                    replay.bytes += len(body)
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ReplayHandler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def counters(self):
+        """
+        Return the (requests, bytes) answered so far.
+        """
+
+        with self._lock:
+            return self.requests, self.bytes
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ReplayClient(HttpClient):
+    """
+    The ReplayClient class is an HttpClient sending the sec.gov, data.sec.gov &
+    api.xbrl.us requests to a ReplayServer, without rate limit. Other urls are sent
+    unchanged.
+
+    Args:
+        replay_url (str): Base url of the ReplayServer.
+    """
+
+    def __init__(self, replay_url, rate_limit=None, max_retries=0, **kwargs):
+        super().__init__(rate_limit=rate_limit, max_retries=max_retries, **kwargs)
+        self.replay_url = replay_url
+
+    def request(self, method, url, headers=None, data=None, timeout=15):
+        return super().request(method, REPLAY_HOSTS.sub(self.replay_url, url), headers=headers, data=data, timeout=timeout)
@@ -0,0 +1,359 @@
+"""
+Synthetic SEC style XBRL instance documents for benchmarking the tidyxbrl parsers.
+
+The documents mirror the layout of an EDGAR "_htm.xml" instance: a default xbrli
+namespace holding the contexts and units, followed by prefixed us-gaap / dei facts that
+reference them through contextRef and unitRef.
+"""
+
+import numpy
+import pandas
+
+INSTANCE_HEADER = (
+    '<?xml version="1.0" encoding="utf-8"?>\n'
+    '<xbrl xmlns="http://www.xbrl.org/2003/instance"'
+    ' xmlns:dei="http://xbrl.sec.gov/dei/2020"'
+    ' xmlns:iso4217="http://www.xbrl.org/2003/iso4217"'
+    ' xmlns:link="http://www.xbrl.org/2003/linkbase"'
+    ' xmlns:us-gaap="http://fasb.org/us-gaap/2020"'
+    ' xmlns:xbrldi="http://xbrl.org/2006/xbrldi"'
+    ' xmlns:xlink="http://www.w3.org/1999/xlink"'
+    ' xmlns:srt="http://fasb.org/srt/2020">\n'
+    '  <link:schemaRef xlink:href="synthetic.xsd" xlink:type="simple"/>\n'
+)
+
+
+def synthetic_context(contextnumber, cik="0000320193", axiscount=1):
+    """
+    Build the xml of a single context. Every third context is an instant, every fifth
+    context carries a dimensional segment of axiscount explicit members.
+    """
+
+    year = 2000 + contextnumber % 20
+    quarter = contextnumber % 4 + 1
+    if contextnumber % 3 == 0:
+        period = f"<instant>{year}-{quarter * 3:02d}-28</instant>"
+    else:
+        period = (
+            f"<startDate>{year}-{quarter * 3 - 2:02d}-01</startDate>"
+            f"<endDate>{year}-{quarter * 3:02d}-28</endDate>"
+        )
+    segment = ""
+    if contextnumber % 5 == 0:
+        members = [
+            "<xbrldi:explicitMember dimension=\"srt:ProductOrServiceAxis\">"
+            f"us-gaap:Product{contextnumber % 7}Member</xbrldi:explicitMember>"
+        ]
+        members.extend(
+            f"<xbrldi:explicitMember dimension=\"us-gaap:Segment{axis}Axis\">"
+            f"us-gaap:Segment{axis}Member{contextnumber % 11}</xbrldi:explicitMember>"
+            for axis in range(1, axiscount)
+        )
+        segment = "<segment>" + "".join(members) + "</segment>"
+    return (
+        f'  <context id="c{contextnumber}"><entity>'
+        f'<identifier scheme="http://www.sec.gov/CIK">{cik}</identifier>{segment}</entity>'
+        f"<period>{period}</period></context>\n"
+    )
+
+
+def synthetic_instance(factcount, contextcount=None, conceptcount=200, axiscount=1):
+    """
+    Build a synthetic XBRL instance document.
+
+    Args:
+        factcount (int): Number of facts in the document.
+        contextcount (int, optional): Number of contexts. Defaults to a tenth of the facts.
+        conceptcount (int, optional): Number of distinct us-gaap concepts.
+        axiscount (int, optional): Number of explicit members of the dimensional contexts.
+
+    Returns:
+        str: The xml text of the instance document.
+    """
+
+    if contextcount is None:
+        contextcount = max(1, factcount // 10)
+    parts = [INSTANCE_HEADER]
+    parts.extend(synthetic_context(i, axiscount=axiscount) for i in range(contextcount))
+    parts.append('  <unit id="usd"><measure>iso4217:USD</measure></unit>\n')
+    parts.append('  <unit id="shares"><measure>xbrli:shares</measure></unit>\n')
+    parts.append('  <dei:DocumentType contextRef="c1">10-K</dei:DocumentType>\n')
+    for i in range(factcount - 1):
+        unit = "usd" if i % 4 else "shares"
+        parts.append(
+            f'  <us-gaap:Concept{i % conceptcount} contextRef="c{(i * 7919) % contextcount}"'
+            f' decimals="-3" id="f{i}" unitRef="{unit}">{(i * 104729) % 10 ** 9}</us-gaap:Concept{i % conceptcount}>\n'
+        )
+    parts.append("</xbrl>\n")
+    return "".join(parts)
+
+
+def write_synthetic_instance(path, factcount, contextcount=None, axiscount=1):
+    """
+    Write a synthetic XBRL instance document to path and return the path.
+    """
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(synthetic_instance(factcount, contextcount, axiscount=axiscount))
+    return path
+
+
+IXBRL_HEADER = (
+    '<?xml version="1.0" encoding="utf-8"?>\n'
+    '<html xmlns="http://www.w3.org/1999/xhtml"'
+    ' xmlns:ix="http://www.xbrl.org/2013/inlineXBRL"'
+    ' xmlns:ixt="http://www.xbrl.org/inlineXBRL/transformation/2020-02-12"'
+    ' xmlns:xbrli="http://www.xbrl.org/2003/instance"'
+    ' xmlns:dei="http://xbrl.sec.gov/dei/2020"'
+    ' xmlns:iso4217="http://www.xbrl.org/2003/iso4217"'
+    ' xmlns:link="http://www.xbrl.org/2003/linkbase"'
+    ' xmlns:us-gaap="http://fasb.org/us-gaap/2020"'
+    ' xmlns:xbrldi="http://xbrl.org/2006/xbrldi"'
+    ' xmlns:xlink="http://www.w3.org/1999/xlink"'
+    ' xmlns:srt="http://fasb.org/srt/2020">\n'
+    "<head><title>synthetic</title></head>\n<body>\n"
+)
+
+IXBRL_FILLER = (
+    '<p style="margin-top:6pt;margin-bottom:0;text-align:justify"><span style="color:#000000;'
+    'font-family:Helvetica,sans-serif;font-size:9pt;font-weight:400;line-height:120%">'
+    "The Company designs, manufactures and markets products and services in accordance with "
+    "the accounting policies described in Part II, Item 8 of the Annual Report.</span></p>\n"
+)
+
+
+def synthetic_ixbrl(factcount, contextcount=None, conceptcount=200, fillercount=8):
+    """
+    Build a synthetic inline XBRL .htm document holding the same facts as
+    synthetic_instance, displayed in scaled & formatted table cells.
+
+    Args:
+        factcount (int): Number of facts in the document.
+        contextcount (int, optional): Number of contexts. Defaults to a tenth of the facts.
+        conceptcount (int, optional): Number of distinct us-gaap concepts.
+        fillercount (int, optional): Styled text paragraphs per 10 facts, the bulk of the
+        markup of an EDGAR filing.
+
+    Returns:
+        str: The xhtml text of the inline XBRL document.
+    """
+
+    if contextcount is None:
+        contextcount = max(1, factcount // 10)
+    # The xbrli elements are prefixed in ix:resources
+    contexts = "".join(synthetic_context(i) for i in range(contextcount))
+    contexts = contexts.replace("<", "<xbrli:").replace("<xbrli:/", "</xbrli:")
+    contexts = contexts.replace("xbrli:xbrldi:", "xbrldi:")
+    parts = [IXBRL_HEADER, '<div style="display:none"><ix:header><ix:resources>\n', contexts]
+    parts.append('<xbrli:unit id="usd"><xbrli:measure>iso4217:USD</xbrli:measure></xbrli:unit>\n')
+    parts.append('<xbrli:unit id="shares"><xbrli:measure>xbrli:shares</xbrli:measure></xbrli:unit>\n')
+    parts.append("</ix:resources></ix:header></div>\n")
+    parts.append('<p>FORM <ix:nonNumeric contextRef="c1" name="dei:DocumentType">10-K</ix:nonNumeric></p>\n<table>\n')
+    for i in range(factcount - 1):
+        unit = "usd" if i % 4 else "shares"
+        value = (i * 104729) % 10 ** 9
+        parts.append(
+            f'<tr><td style="padding:2px 1pt;text-align:left"><span style="font-size:9pt">Concept {i % conceptcount}</span></td>'
+            f'<td style="padding:2px 1pt;text-align:right"><span style="font-size:9pt">'
+            f'<ix:nonFraction unitRef="{unit}" contextRef="c{(i * 7919) % contextcount}" decimals="-3"'
+            f' name="us-gaap:Concept{i % conceptcount}" format="ixt:num-dot-decimal" scale="3" id="f{i}">'
+            f"{value // 1000:,}</ix:nonFraction></span></td></tr>\n"
+        )
+        if i % 10 == 0:
+            parts.append("</table>\n" + IXBRL_FILLER * fillercount + "<table>\n")
+    parts.append("</table>\n</body>\n</html>\n")
+    return "".join(parts)
+
+
+def write_synthetic_ixbrl(path, factcount, contextcount=None):
+    """
+    Write a synthetic inline XBRL document to path and return the path.
+    """
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(synthetic_ixbrl(factcount, contextcount))
+    return path
+
+
+def synthetic_companyfacts(factcount, conceptcount=500, cik=320193):
+    """
+    Build a synthetic data.sec.gov companyfacts document.
+
+    Args:
+        factcount (int): Number of facts across every concept.
+        conceptcount (int, optional): Number of distinct us-gaap concepts.
+        cik (int, optional): CIK of the reporting company.
+
+    Returns:
+        dict: The decoded companyfacts JSON.
+    """
+
+    concepts = {}
+    for i in range(factcount):
+        concept = concepts.setdefault(
+            f"Concept{i % conceptcount}",
+            {"label": f"Concept {i % conceptcount}", "description": "Synthetic concept.", "units": {"USD": []}},
+        )
+        year = 2009 + (i // conceptcount) % 15
+        quarter = (i // conceptcount) % 4 + 1
+        fact = {
+            "start": f"{year}-{quarter * 3 - 2:02d}-01",
+            "end": f"{year}-{quarter * 3:02d}-28",
+            "val": (i * 104729) % 10 ** 9,
+            "accn": f"{cik:010d}-{year % 100:02d}-{quarter:06d}",
+            "fy": year,
+            "fp": "FY" if quarter == 4 else f"Q{quarter}",
+            "form": "10-K" if quarter == 4 else "10-Q",
+            "filed": f"{year + (quarter == 4)}-{quarter * 3 % 12 + 1:02d}-15",
+        }
+        if i % 3:
+            fact["frame"] = f"CY{year}Q{quarter}"
+        concept["units"]["USD"].append(fact)
+    return {"cik": cik, "entityName": "Synthetic Corp", "facts": {"us-gaap": concepts}}
+
+
+def synthetic_frames(rowcount, period="CY2019Q1I"):
+    """
+    Build a synthetic data.sec.gov frames document of one fact per reporting entity.
+
+    Args:
+        rowcount (int): Number of reporting entities in the frame.
+        period (str, optional): Calendrical period of the frame. Instantaneous periods
+        ending in 'I' have no start date.
+
+    Returns:
+        dict: The decoded frames JSON.
+    """
+
+    instant = period.endswith("I")
+    data = []
+    for i in range(rowcount):
+        record = {
+            "accn": f"{1000000 + i:010d}-19-{i % 1000:06d}",
+            "cik": 1000000 + i,
+            "entityName": f"Synthetic Company {i}",
+            "loc": f"US-{['CA', 'NY', 'TX', 'WA', 'DE'][i % 5]}",
+            "end": "2019-03-31",
+            "val": (i * 104729) % 10 ** 9,
+        }
+        if not instant:
+            record["start"] = "2019-01-01"
+        data.append(record)
+    return {
+        "taxonomy": "us-gaap",
+        "tag": "AccountsPayableCurrent",
+        "ccp": period,
+        "uom": "USD",
+        "label": "Accounts Payable, Current",
+        "description": "Synthetic concept.",
+        "pts": rowcount,
+        "data": data,
+    }
+
+
+def synthetic_browse_edgar(start_row, companycount, query="SYNTHETIC"):
+    """
+    Build one browse-edgar company search page of up to 100 companies, as returned for a
+    'starts-with' search of query from start_row.
+
+    Returns:
+        str: The html text of the page. Past companycount the page holds no result table.
+    """
+
+    rows = range(start_row, min(start_row + 100, companycount))
+    if not rows:
+        return "<html><body><p>No matching companies.</p></body></html>\n"
+    parts = [
+        "<html><body><div id=\"contentDiv\">\n",
+        '<table class="tableFile2" summary="Results">\n',
+        '<tr><th scope="col">CIK</th><th scope="col">Company</th><th scope="col">State/Country</th></tr>\n',
+    ]
+    for i in rows:
+        parts.append(
+            f'<tr><td><a href="/cgi-bin/browse-edgar?action=getcompany&amp;CIK={1000000 + i:010d}">'
+            f"{1000000 + i:010d}</a></td><td>{query} COMPANY {i} INC</td>"
+            f"<td><a href=\"/cgi-bin/browse-edgar?action=getcompany&amp;State=CA\">CA</a></td></tr>\n"
+        )
+    parts.append("</table></div></body></html>\n")
+    return "".join(parts)
+
+
+def synthetic_fact_search(offset, limit, factcount, cik="0000320193"):
+    """
+    Build one page of an XBRL US API fact/search response.
+
+    Args:
+        offset (int): Row offset of the page.
+        limit (int): Rows per page.
+        factcount (int): Number of facts across every page.
+        cik (str, optional): CIK of the reporting company.
+
+    Returns:
+        dict: The decoded page, holding paging & data.
+    """
+
+    rows = [
+        {
+            "fact.id": 100000000 + i,
+            "fact.value": str((i * 104729) % 10 ** 9),
+            "concept.local-name": f"Concept{i % 200}",
+            "period.fiscal-year": 2009 + i % 15,
+            "period.fiscal-period": ["Q1", "Q2", "Q3", "FY"][i % 4],
+            "entity.cik": cik,
+        }
+        for i in range(offset, min(offset + limit, factcount))
+    ]
+    return {"paging": {"limit": limit, "offset": offset, "count": len(rows)}, "data": rows}
+
+
+def synthetic_tidy_facts(companycount, conceptcount=200, periodcount=40, filingsperperiod=2, seed=0):
+    """
+    Build tidy companyfacts rows, as edgar_query(..., tidy=True) returns for many companies,
+    straight as columns.
+
+    Every company reports every concept for periodcount quarters. Each quarter is filed
+    filingsperperiod times (the original filing & later comparatives), the later filings
+    with a restated value.
+
+    Returns:
+        pandas.DataFrame: companycount * conceptcount * periodcount * filingsperperiod rows
+        with the edgar_query tidy columns.
+    """
+
+    generator = numpy.random.default_rng(seed)
+    rowcount = companycount * conceptcount * periodcount * filingsperperiod
+    index = numpy.arange(rowcount, dtype=numpy.int64)
+    filing = index % filingsperperiod
+    period = (index // filingsperperiod) % periodcount
+    concept = (index // (filingsperperiod * periodcount)) % conceptcount
+    company = index // (filingsperperiod * periodcount * conceptcount)
+
+    quarterends = pandas.date_range("2000-03-31", periods=periodcount, freq="Q").to_numpy()
+    end = quarterends[period]
+    start = end - numpy.timedelta64(89, "D")
+    filed = end + numpy.timedelta64(40, "D") + (filing * 365).astype("timedelta64[D]")
+    fy = (2000 + period // 4).astype(numpy.int16)
+    fp = pandas.Categorical.from_codes(period % 4, categories=["Q1", "Q2", "Q3", "FY"])
+    accncodes = (company * periodcount + period) * filingsperperiod + filing
+    values = generator.integers(1, 10 ** 9, size=rowcount).astype(numpy.float64)
+    return pandas.DataFrame(
+        {
+            "cik": 1000000 + company,
+            "taxonomy": pandas.Categorical.from_codes(numpy.zeros(rowcount, dtype=numpy.int8), categories=["us-gaap"]),
+            "concept": pandas.Categorical.from_codes(concept, categories=[f"Concept{i}" for i in range(conceptcount)]),
+            "unit": pandas.Categorical.from_codes(numpy.zeros(rowcount, dtype=numpy.int8), categories=["USD"]),
+            "start": start,
+            "end": end,
+            "val": values,
+            "accn": pandas.Categorical.from_codes(
+                accncodes, categories=[f"A{i:012d}" for i in range(companycount * periodcount * filingsperperiod)]
+            ),
+            "fy": pandas.array(fy, dtype="Int16"),
+            "fp": fp,
+            "form": pandas.Categorical.from_codes((period % 4 == 3).astype(numpy.int8), categories=["10-Q", "10-K"]),
+            "filed": filed,
+            "frame": pandas.Categorical.from_codes(
+                numpy.where(filing == 0, period, -1), categories=[f"CY{2000 + p // 4}Q{p % 4 + 1}" for p in range(periodcount)]
+            ),
+        }
+    )
@@ -1,10 +1,145 @@
 # %%
 # __init__.py
-from tidyxbrl.xbrl_apikey import *
-from tidyxbrl.xbrl_query import *
-from tidyxbrl.xbrl_parse import *
-from tidyxbrl.edgar_query import *
-from tidyxbrl.edgar_cik import *
-from tidyxbrl.edgar_frames import *
+"""
+tidyxbrl loads its submodules on first use: `import tidyxbrl` only reads the table below,
+and `tidyxbrl.edgar_cik` imports tidyxbrl.edgar_cik, with its own dependencies, the first
+time it is looked up. A short lived process therefore pays for pandas, lxml, BeautifulSoup,
+httpx & tqdm only when it calls a function that needs them.
+"""
+
+import importlib
+import sys
+import types
 from src.config.default_headers import *
+
+# Public name -> submodule defining it
+_LAZY_ATTRIBUTES = {
+    # instrumentation
+    "STAGE_METRICS": "instrumentation",
+    "add_instrument_hook": "instrumentation",
+    "remove_instrument_hook": "instrumentation",
+    "instrument_stage": "instrumentation",
+    "instrument_count": "instrumentation",
+    "instrumented_send": "instrumentation",
+    "instrumented_asend": "instrumentation",
+    "instrumented": "instrumentation",
+    "Profiler": "instrumentation",
+    # http_client
+    "RETRY_STATUS_CODES": "http_client",
+    "RateLimiter": "http_client",
+    "HttpClient": "http_client",
+    "retry_delay": "http_client",
+    "set_default_client": "http_client",
+    "client_send": "http_client",
+    # http_cache
+    "DEFAULT_CACHE_TTL": "http_cache",
+    "DEFAULT_CACHE_DIRECTORY": "http_cache",
+    "CachedResponse": "http_cache",
+    "SQLiteCacheBackend": "http_cache",
+    "FileCacheBackend": "http_cache",
+    "ResponseCache": "http_cache",
+    "set_default_cache": "http_cache",
+    "acached_request": "http_cache",
+    "cached_request": "http_cache",
+    # xbrl_apikey, xbrl_token & xbrl_query
+    "xbrl_apikey": "xbrl_apikey",
+    "XbrlTokenManager": "xbrl_token",
+    "XBRL_QUERY_SAFE": "xbrl_query",
+    "xbrl_query": "xbrl_query",
+    "xbrl_query_pages": "xbrl_query",
+    # xbrl_parse & xbrl_parse_many
+    "XBRLI_NAMESPACE": "xbrl_parse",
+    "IX_NAMESPACES": "xbrl_parse",
+    "XHTML_NAMESPACE": "xbrl_parse",
+    "XSI_NIL": "xbrl_parse",
+    "XBRLDI_NAMESPACE": "xbrl_parse",
+    "IXBRL_DATE_FORMATS": "xbrl_parse",
+    "IXBRL_NUMBER_WORDS": "xbrl_parse",
+    "xbrl_load": "xbrl_parse",
+    "xbrl_parse": "xbrl_parse",
+    "xbrl_iter_facts": "xbrl_parse",
+    "xbrl_dimension_filter": "xbrl_parse",
+    "xbrl_parse_many": "xbrl_parse_many",
+    # edgar_query
+    "TIDY_QUERY_TYPES": "edgar_query",
+    "TIDY_COLUMNS": "edgar_query",
+    "SUBMISSIONS_COLUMNS": "edgar_query",
+    "edgar_query": "edgar_query",
+    # cik_index & edgar_cik
+    "CIK_INDEX_SOURCES": "cik_index",
+    "DEFAULT_CIK_INDEX_PATH": "cik_index",
+    "CikIndex": "cik_index",
+    "edgar_cik": "edgar_cik",
+    # edgar_frames
+    "FRAMES_TIDY_COLUMNS": "edgar_frames",
+    "edgar_frames": "edgar_frames",
+    "edgar_frames_many": "edgar_frames",
+    # edgar_bulk & edgar_sync
+    "BULK_OUTPUT_FORMATS": "edgar_bulk",
+    "BULK_MANIFEST": "edgar_bulk",
+    "edgar_bulk_load": "edgar_bulk",
+    "edgar_bulk_read": "edgar_bulk",
+    "SUBMISSIONS_PAGE_URL": "edgar_sync",
+    "SubmissionsSync": "edgar_sync",
+    # parquet_store
+    "STORE_DATASETS": "parquet_store",
+    "STORE_PARTITIONS": "parquet_store",
+    "STORE_FIELDS": "parquet_store",
+    "FILING_COLUMNS": "parquet_store",
+    "STORE_COLUMNS": "parquet_store",
+    "ParquetStore": "parquet_store",
+    # fact_store
+    "FACT_STORE_LABELS": "fact_store",
+    "FACT_STORE_AGGREGATIONS": "fact_store",
+    "FACT_STORE_GROUPS": "fact_store",
+    "FactStore": "fact_store",
+    # fact_panel
+    "PANEL_KEEP": "fact_panel",
+    "FactPanel": "fact_panel",
+    "fact_panel": "fact_panel",
+    # point_in_time
+    "POINT_IN_TIME_COLUMNS": "point_in_time",
+    "PointInTimeIndex": "point_in_time",
+    # async_api
+    "AsyncHttpClient": "async_api",
+    "aedgar_query": "async_api",
+    "aedgar_frames": "async_api",
+    "aedgar_cik": "async_api",
+    "axbrl_parse": "async_api",
+    "aedgar_query_many": "async_api",
+}
+
+__all__ = ["con_headers_default"] + list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    """
+    Import the submodule defining name on first use & keep the value in the package.
+    """
+
+    modulename = _LAZY_ATTRIBUTES.get(name)
+    if modulename is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module("tidyxbrl." + modulename), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+class _LazyPackage(types.ModuleType):
+    """
+    Package module keeping the public functions named like their submodule (xbrl_parse,
+    edgar_query, ...) when the import system binds the submodule to the package.
+    """
+
+    def __setattr__(self, name, value):
+        if name in _LAZY_ATTRIBUTES and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _LazyPackage
 # %%
@@ -0,0 +1,420 @@
+"""
+Asynchronous counterparts of the SEC EDGAR & XBRL fetchers built on httpx.AsyncClient.
+
+Universe wide pulls (i.e. companyfacts for thousands of CIKs) are bound by the network
+round trips when sent one at a time. The coroutines below send requests concurrently
+through an AsyncHttpClient, which caps the requests in flight with a semaphore, holds the
+SEC rate limit with the same token bucket as HttpClient, and retries 429 / 5xx responses.
+Parsing reuses the synchronous functions and, like the reads & writes of a ResponseCache,
+runs on a worker thread so that it does not stall the event loop.
+
+    results = asyncio.run(aedgar_query_many(ciks, query_type='companyfacts'))
+"""
+
+import asyncio
+import contextlib
+import os
+import httpx
+import pandas as pd
+from tidyxbrl.http_cache import acached_request
+from tidyxbrl.http_client import RETRY_STATUS_CODES, RateLimiter, retry_delay
+from tidyxbrl.edgar_query import _edgar_query_url, _edgar_query_frame
+from tidyxbrl.edgar_frames import _edgar_frames_url, _edgar_frames_frame
+from tidyxbrl.edgar_cik import _edgar_cik_payload, _edgar_cik_page, _edgar_cik_index
+from tidyxbrl.xbrl_parse import xbrl_parse
+from tidyxbrl.instrumentation import instrumented, instrument_count
+from src.config.default_headers import con_headers_default
+
+
+class AsyncHttpClient:
+    """
+    The AsyncHttpClient class shares a pooled, concurrency capped, rate limited & retrying
+    httpx.AsyncClient between the asynchronous fetchers.
+
+    Args:
+        rate_limit (float, optional): Maximum requests per second. Defaults to 10, the SEC
+        fair access limit. None disables the limit.
+        max_concurrency (int, optional): Maximum requests in flight. Defaults to 8.
+        max_retries (int, optional): Retries of a request answered with 429 / 5xx or failing
+        to connect. Defaults to 3.
+        backoff_factor (float, optional): Seconds before the first retry, doubled on every
+        further retry. A Retry-After header takes precedence. Defaults to 0.5.
+        headers (dict, optional): Headers sent with every request, below the per request
+        headers.
+        transport (httpx.AsyncBaseTransport, optional): Transport of the underlying
+        httpx.AsyncClient, i.e. httpx.MockTransport for offline tests.
+
+    Attributes:
+        stats (dict): Counters of the client activity.
+            - requests: Requests sent, including retries.
+            - retries: Requests that were retried.
+            - throttled_sec: Seconds spent waiting for the rate limit.
+
+    Examples:
+        async with AsyncHttpClient(rate_limit=10, max_concurrency=16) as client:
+            facts = await aedgar_query('0000789019', 'companyfacts', client=client)
+    """
+
+    def __init__(
+        self, rate_limit=10, max_concurrency=8, max_retries=3, backoff_factor=0.5, headers=None, transport=None
+    ):
+        self.limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.client = httpx.AsyncClient(
+            headers=headers,
+            transport=transport,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self.stats = {"requests": 0, "retries": 0, "throttled_sec": 0.0}
+        self._semaphore = None
+
+    async def request(self, method, url, headers=None, data=None, timeout=15):
+        """
+        Send a request once a concurrency slot & a rate limit token are available, retrying
+        429 / 5xx responses & connection errors with exponential backoff.
+
+        Args:
+            method (str): HTTP method, i.e. "GET" or "POST".
+            url (str): Request url.
+            headers (dict, optional): Request headers.
+            data (dict, optional): Form data of a POST request.
+            timeout: The time in seconds to wait for the server to respond
+
+        Returns:
+            httpx.Response: The final response, which may still be a 429 / 5xx once the
+            retries are exhausted.
+        """
+
+        # Created on first use so that the semaphore belongs to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                if self.limiter is not None:
+                    delay = self.limiter.reserve()
+                    if delay > 0:
+                        self.stats["throttled_sec"] += delay
+                        await asyncio.sleep(delay)
+                self.stats["requests"] += 1
+                try:
+                    response = await self.client.request(method, url, headers=headers, data=data, timeout=timeout)
+                except httpx.TransportError:
+                    if attempt >= self.max_retries:
+                        raise
+                    response = None
+                else:
+                    if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                        return response
+                self.stats["retries"] += 1
+                instrument_count(retries=1)
+                await asyncio.sleep(retry_delay(attempt, self.backoff_factor, response))
+                attempt += 1
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    def __repr__(self):
+        return f"<AsyncHttpClient {self.stats}>"
+
+
+# Token bucket shared by the temporary clients, so that concurrent calls made without a
+# client stay within the SEC rate limit together
+_temporary_limiter = RateLimiter(10)
+
+
+@contextlib.asynccontextmanager
+async def _client_scope(client):
+    """
+    Yield client, or a temporary AsyncHttpClient closed on exit when client is None.
+    """
+
+    if client is not None:
+        yield client
+        return
+    async with AsyncHttpClient(rate_limit=None) as temporaryclient:
+        temporaryclient.limiter = _temporary_limiter
+        yield temporaryclient
+
+
+@instrumented
+async def aedgar_query(
+    companycik,
+    query_type,
+    queryextension="",
+    parse_pandas=True,
+    timeout_sec=15,
+    con_headers=con_headers_default,
+    cache=None,
+    client=None,
+    tidy=False,
+):
+    """
+    Asynchronous counterpart of edgar_query. Query SEC data using the Central Index Key (CIK).
+
+    Args:
+        companycik (str): Unique company CIK value pulled in edgar_cik. Note that the CIK is
+        converted to 10 digits with leading 0s.
+        query_type (str): The type of API query. Can be 'submissions', 'companyconcept', or
+        'companyfacts'.
+        queryextension (str, optional): Extension required for the "companyconcept"
+        query_type to specify the report type. Defaults to "".
+        parse_pandas (bool, optional): If True, the data is converted to a pandas DataFrame.
+        timeout_sec: The time in seconds to wait for the server to respond
+        con_headers (dict): The headers to be sent with the initial request.
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (AsyncHttpClient, optional): Client sending the request. Defaults to a
+        temporary client, rate limited along with every other temporary client.
+        tidy (bool, optional): If True, 'companyfacts' & 'companyconcept' are returned as
+        one long frame with a row per fact, as in edgar_query. Defaults to False.
+
+    Returns:
+        pandas.DataFrame: Tidy dataframe housing the report data, as in edgar_query.
+
+    Examples:
+        await aedgar_query('0000789019', query_type = 'companyfacts')
+    """
+
+    dataquery = _edgar_query_url(companycik, query_type, queryextension, tidy)
+    async with _client_scope(client) as activeclient:
+        dataresponse = await acached_request(
+            "GET", dataquery, activeclient.request, headers=con_headers, timeout_sec=timeout_sec, cache=cache
+        )
+    return await asyncio.to_thread(_edgar_query_frame, dataresponse, parse_pandas, tidy)
+
+
+@instrumented
+async def aedgar_frames(
+    urldescriptor="", timeout_sec=15, con_headers=con_headers_default, cache=None, client=None, tidy=False
+):
+    """
+    Asynchronous counterpart of edgar_frames. Aggregates one fact for each reporting entity
+    that is last filed that most closely fits the calendrical period requested.
+
+    Args:
+        urldescriptor: URL description of the frame query, as in edgar_frames
+        (i.e. 'us-gaap/NonoperatingIncomeExpense/USD/CY2019Q1I')
+        timeout_sec: The time in seconds to wait for the server to respond
+        con_headers (dict): The headers to be sent with the initial request.
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (AsyncHttpClient, optional): Client sending the request. Defaults to a
+        temporary client, rate limited along with every other temporary client.
+        tidy (bool, optional): If True, return one flat row per reporting entity, as in
+        edgar_frames. Defaults to False.
+
+    Outputs:
+        return companies: Return a pandas DataFrame of reporting companies and their associated CIK
+
+    Examples:
+        await aedgar_frames(urldescriptor = 'us-gaap/NonoperatingIncomeExpense/USD/CY2019Q1I')
+    """
+
+    dataquery = _edgar_frames_url(urldescriptor)
+    async with _client_scope(client) as activeclient:
+        dataresponse = await acached_request(
+            "GET", dataquery, activeclient.request, headers=con_headers, timeout_sec=timeout_sec, cache=cache
+        )
+    return await asyncio.to_thread(_edgar_frames_frame, dataresponse, tidy)
+
+
+@instrumented
+async def aedgar_cik(
+    query,
+    comprehensive=False,
+    start_row=0,
+    timeout_sec=15,
+    max_start_row=25000,
+    con_headers=con_headers_default,
+    cache=None,
+    client=None,
+    index=None,
+):
+    """
+    Asynchronous counterpart of edgar_cik. Pull the Central Index Key (CIK) for reporting
+    companies. With comprehensive = True the pages are followed in a loop until the results
+    run out or max_start_row is reached.
+
+    Args:
+        query: The company name or ticker symbol to search for
+        comprehensive: Whether to retrieve all available results or just the first 100
+        start_row: The starting index for retrieving results
+        timeout_sec: The time in seconds to wait for the server to respond
+        max_start_row: The maximum starting index for retrieving results
+        con_headers (dict): The headers to be sent with the initial request.
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (AsyncHttpClient, optional): Client sending the requests. Defaults to a
+        temporary client, rate limited along with every other temporary client.
+        index (CikIndex, optional): Local CIK index answering the query in place of
+        browse-edgar, as in edgar_cik.
+
+    Returns:
+        company_df: Pandas DataFrame of company names, CIK, and state
+
+    Examples:
+        await aedgar_cik('App', comprehensive=True)
+    """
+
+    if index is not None:
+        return _edgar_cik_index(index, query, comprehensive, start_row, max_start_row)
+
+    url = "https://www.sec.gov/cgi-bin/browse-edgar"
+    company_pages = []
+    last_company_df = pd.DataFrame()
+    async with _client_scope(client) as activeclient:
+        while True:
+            response = await acached_request(
+                "POST",
+                url,
+                activeclient.request,
+                headers=con_headers,
+                data=_edgar_cik_payload(query, start_row),
+                timeout_sec=timeout_sec,
+                cache=cache,
+            )
+            company_df, single_company = _edgar_cik_page(response.content)
+            if single_company:
+                return company_df
+            if company_df is None:
+                print(f"Final Row Reached At {start_row}")
+                break
+            print(f"Start Row: {start_row} - {company_df.iloc[0]['company']}")
+            company_pages.append(company_df)
+            if not (
+                comprehensive is True
+                and len(company_df) == 100
+                and last_company_df.equals(company_df) is False
+                and start_row < max_start_row
+            ):
+                break
+            last_company_df = company_df
+            start_row += 100
+
+    if not company_pages:
+        return pd.DataFrame()
+    return pd.concat(company_pages).reset_index(drop=True)
+
+
+@instrumented
+async def axbrl_parse(
+    path, timeout_sec=15, con_headers=con_headers_default, engine="soup", cache=None, client=None, typed=False, numeric="float64"
+):
+    """
+    Asynchronous counterpart of xbrl_parse. Download a XBRL file from a website url, or read
+    it from a file path, and parse it on a worker thread.
+
+    Args:
+        path (str or bytes): Filepath or website url corresponding to XBRL data, or the raw
+        content of an XBRL document.
+        timeout_sec: The time in seconds to wait for the server to respond
+        con_headers (dict): The headers to be sent with the initial request.
+        engine (str, optional): xbrl_parse engine, 'soup', 'iterparse' or 'ixbrl'. Defaults to "soup".
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (AsyncHttpClient, optional): Client sending the request. Defaults to a
+        temporary client, rate limited along with every other temporary client.
+        typed (bool, optional): If True, return compact typed columns, as in xbrl_parse.
+        Defaults to False.
+        numeric (str, optional): Type of the typed datavalue column, 'float64' or
+        'decimal'. Defaults to "float64".
+
+    Returns:
+        pandas.DataFrame: DataFrame output of the XBRL file in a tidy format, as in
+        xbrl_parse, or None if the document could not be read.
+
+    Examples:
+        await axbrl_parse('https://www.sec.gov/Archives/edgar/data/320193/000032019321000010/aapl-20201226_htm.xml')
+    """
+
+    if isinstance(path, bytes) or os.path.isfile(path):
+        return await asyncio.to_thread(xbrl_parse, path, engine=engine, typed=typed, numeric=numeric)
+    try:
+        async with _client_scope(client) as activeclient:
+            initialrequest = await acached_request(
+                "GET", path, activeclient.request, headers=con_headers, timeout_sec=timeout_sec, cache=cache
+            )
+    except (ValueError, httpx.HTTPError) as e:
+        print(f"Error: {e}")
+        return None
+    if initialrequest.status_code != 200:
+        print(f"Error: {initialrequest.status_code}: {path}")
+        return None
+    return await asyncio.to_thread(xbrl_parse, initialrequest.content, engine=engine, typed=typed, numeric=numeric)
+
+
+@instrumented
+async def aedgar_query_many(
+    companyciks,
+    query_type,
+    queryextension="",
+    parse_pandas=True,
+    return_exceptions=True,
+    rate_limit=10,
+    max_concurrency=8,
+    timeout_sec=15,
+    con_headers=con_headers_default,
+    cache=None,
+    client=None,
+    tidy=False,
+):
+    """
+    The aedgar_query_many function runs aedgar_query for many CIKs concurrently and returns
+    the results in the order of companyciks.
+
+    Args:
+        companyciks (list): CIK values, converted to 10 digits with leading 0s.
+        query_type (str): The type of API query. Can be 'submissions', 'companyconcept', or
+        'companyfacts'.
+        queryextension (str, optional): Extension required for the "companyconcept"
+        query_type to specify the report type. Defaults to "".
+        parse_pandas (bool, optional): If True, the data is converted to a pandas DataFrame.
+        return_exceptions (bool, optional): If True, a failed CIK holds its exception in the
+        results instead of cancelling the batch. Defaults to True.
+        rate_limit (float, optional): Maximum requests per second of the client created when
+        client is None. Defaults to 10.
+        max_concurrency (int, optional): Maximum requests in flight of the client created
+        when client is None. Defaults to 8.
+        timeout_sec: The time in seconds to wait for the server to respond
+        con_headers (dict): The headers to be sent with the initial request.
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (AsyncHttpClient, optional): Client shared by every request.
+        tidy (bool, optional): If True, 'companyfacts' & 'companyconcept' are returned as
+        one long frame with a row per fact, as in edgar_query. Defaults to False.
+
+    Returns:
+        list: One edgar_query DataFrame (or exception) per CIK, in the order of companyciks.
+
+    Examples:
+        asyncio.run(aedgar_query_many(['0000789019', '0000320193'], query_type = 'companyfacts'))
+    """
+
+    if client is None:
+        async with AsyncHttpClient(rate_limit=rate_limit, max_concurrency=max_concurrency) as client:
+            return await aedgar_query_many(
+                companyciks, query_type, queryextension, parse_pandas, return_exceptions,
+                timeout_sec=timeout_sec, con_headers=con_headers, cache=cache, client=client, tidy=tidy,
+            )
+
+    return list(
+        await asyncio.gather(
+            *[
+                aedgar_query(
+                    companycik, query_type, queryextension, parse_pandas,
+                    timeout_sec=timeout_sec, con_headers=con_headers, cache=cache, client=client, tidy=tidy,
+                )
+                for companycik in companyciks
+            ],
+            return_exceptions=return_exceptions,
+        )
+    )
@@ -0,0 +1,347 @@
+"""
+https://www.sec.gov/os/accessing-edgar-data
+
+Local Central Index Key (CIK) index built from the SEC bulk company files:
+
+    https://www.sec.gov/files/company_tickers_exchange.json
+        CIK, current name, ticker & exchange of every listed company.
+    https://www.sec.gov/Archives/edgar/cik-lookup-data.txt
+        Every name (current & former) of every EDGAR filer as "NAME:CIK:" lines.
+
+CikIndex downloads the files once, keeps them in a gzip compressed tab separated file and
+answers prefix, substring & ticker lookups in memory, without paging through browse-edgar.
+refresh() sends the stored ETag / Last-Modified validators so that only the files the SEC
+changed are downloaded & rebuilt. edgar_cik accepts a CikIndex as its backend:
+
+    index = tidyxbrl.CikIndex()
+    index.refresh()
+    tidyxbrl.edgar_cik('App', comprehensive=True, index=index)
+"""
+
+import bisect
+import gzip
+import json
+import os
+import numpy
+import pandas as pd
+from tidyxbrl.http_client import client_send
+from tidyxbrl.http_cache import DEFAULT_CACHE_DIRECTORY
+from tidyxbrl.instrumentation import instrumented
+from src.config.default_headers import con_headers_default
+
+CIK_INDEX_SOURCES = {
+    "tickers": "https://www.sec.gov/files/company_tickers_exchange.json",
+    "names": "https://www.sec.gov/Archives/edgar/cik-lookup-data.txt",
+}
+
+DEFAULT_CIK_INDEX_PATH = os.path.join(DEFAULT_CACHE_DIRECTORY, "cik_index.tsv.gz")
+
+
+class CikIndex:
+    """
+    The CikIndex class holds the names & tickers of EDGAR filers for in process lookups.
+
+    Args:
+        path (str, optional): Gzip compressed index file. Defaults to
+        ~/.cache/tidyxbrl/cik_index.tsv.gz. An existing file is loaded on creation.
+        urls (dict, optional): Url of every source name. Defaults to CIK_INDEX_SOURCES.
+
+    Attributes:
+        sources (dict): Per source name, the url, validators & rows last downloaded.
+
+    Examples:
+        index = CikIndex()
+        index.refresh()
+        index.prefix('APPLE')
+        index.contains('ZILLOW')
+        index.ticker('MSFT')
+    """
+
+    def __init__(self, path=None, urls=None):
+        self.path = path or DEFAULT_CIK_INDEX_PATH
+        self.urls = dict(urls or CIK_INDEX_SOURCES)
+        self.sources = {}
+        self._build()
+        if os.path.isfile(self.path):
+            self.load()
+
+    @instrumented
+    def refresh(self, sources=None, timeout_sec=60, con_headers=con_headers_default, client=None):
+        """
+        Download the bulk files that changed since the last refresh, rebuild the lookups
+        and save the index.
+
+        Args:
+            sources (list, optional): Names of the sources to refresh ('tickers', 'names').
+            Defaults to every source.
+            timeout_sec: The time in seconds to wait for the server to respond
+            con_headers (dict): The headers to be sent with the request.
+            client (HttpClient, optional): Pooled & rate limited client sending the
+            requests. Defaults to the client installed with set_default_client.
+
+        Returns:
+            list: Names of the sources that were downloaded again.
+
+        Raises:
+            ValueError: If a source is unknown or a download fails.
+        """
+
+        send = client_send(client)
+        updated = []
+        for sourcename in sources or list(self.urls):
+            if sourcename not in self.urls:
+                raise ValueError("sources must be in: " + str(list(self.urls)))
+            url = self.urls[sourcename]
+            previous = self.sources.get(sourcename, {})
+            requestheaders = dict(con_headers or {})
+            if previous.get("etag"):
+                requestheaders["If-None-Match"] = previous["etag"]
+            if previous.get("last_modified"):
+                requestheaders["If-Modified-Since"] = previous["last_modified"]
+
+            response = send("GET", url, headers=requestheaders, timeout=timeout_sec)
+            if response.status_code == 304:
+                continue
+            if response.status_code != 200:
+                raise ValueError(str(response.status_code) + ": " + url)
+            if sourcename == "tickers":
+                names, tickers = _cik_index_tickers(response.content)
+            else:
+                names, tickers = _cik_index_names(response.content), []
+            names.sort(key=lambda pair: pair[1].upper())
+            self.sources[sourcename] = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "names": names,
+                "tickers": tickers,
+            }
+            updated.append(sourcename)
+
+        if updated:
+            self._build()
+            self.save()
+        return updated
+
+    def prefix(self, text, limit=None):
+        """
+        Return the (cik, name) pairs whose name starts with text, case insensitive, in name
+        order.
+        """
+
+        key = _cik_index_key(text)
+        start = bisect.bisect_left(self._keys, key)
+        # Every key starting with key sorts before key + the highest code point
+        stop = bisect.bisect_left(self._keys, key + "\U0010ffff", lo=start)
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return [(self._ciks[i], self._names[i]) for i in range(start, stop)]
+
+    def contains(self, text, limit=None):
+        """
+        Return the (cik, name) pairs whose name contains text, case insensitive, in name
+        order.
+
+        Unlike prefix & ticker, which are binary search & dictionary lookups, contains
+        scans the joined names: about 10 milliseconds on the full SEC list of a million
+        names, less when limit is reached early.
+        """
+
+        key = _cik_index_key(text)
+        matches = []
+        position = self._blob.find(key)
+        while position != -1 and (limit is None or len(matches) < limit):
+            row = int(numpy.searchsorted(self._offsets, position, side="right")) - 1
+            matches.append((self._ciks[row], self._names[row]))
+            # Continue after the matched name so that every name is reported once
+            position = self._blob.find(key, self._offsets[row + 1])
+        return matches
+
+    def ticker(self, symbol):
+        """
+        Return the (cik, name, ticker, exchange) of a ticker symbol, or None if unknown.
+        """
+
+        return self._tickers.get(str(symbol).strip().upper())
+
+    def tickers_of(self, cik):
+        """
+        Return the tickers listed for a CIK.
+        """
+
+        return self._cik_tickers.get(int(cik), [])
+
+    @instrumented
+    def search(self, query, match="starts-with", limit=None):
+        """
+        Look up query & return the matches in the edgar_cik format.
+
+        Args:
+            query (str): Company name, or ticker symbol for match = 'ticker'.
+            match (str, optional): 'starts-with', 'contains' or 'ticker'. Defaults to
+            'starts-with', the browse-edgar company search.
+            limit (int, optional): Maximum number of matches.
+
+        Returns:
+            pandas.DataFrame: Columns cik, cik_str, company, state & ticker. The bulk files
+            carry no state, so state is empty.
+        """
+
+        matchdict = {"starts-with": self.prefix, "contains": self.contains}
+        if match == "ticker":
+            tickerrow = self.ticker(query)
+            matches = [tickerrow[:2]] if tickerrow else []
+        elif match in matchdict:
+            matches = matchdict[match](query, limit)
+        else:
+            raise ValueError("match must be in: " + str(list(matchdict) + ["ticker"]))
+
+        return pd.DataFrame(
+            {
+                "cik": pd.Series([cik for cik, _ in matches], dtype="int64"),
+                "cik_str": [f"{cik:010d}" for cik, _ in matches],
+                "company": [name for _, name in matches],
+                "state": [""] * len(matches),
+                "ticker": [",".join(self.tickers_of(cik)) for cik, _ in matches],
+            }
+        )
+
+    def to_frame(self):
+        """
+        Return every (cik, name) pair of the index as a DataFrame.
+        """
+
+        return pd.DataFrame({"cik": self._ciks, "name": self._names})
+
+    def save(self, path=None):
+        """
+        Write the index to a gzip compressed tab separated file: a JSON header line holding
+        the source validators, then N (name) & T (ticker) rows.
+        """
+
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        header = {
+            sourcename: {key: value for key, value in source.items() if key not in ("names", "tickers")}
+            for sourcename, source in self.sources.items()
+        }
+        temporarypath = path + ".tmp"
+        with gzip.open(temporarypath, "wt", encoding="utf-8", compresslevel=6) as file:
+            file.write(json.dumps(header) + "\n")
+            for sourcename, source in self.sources.items():
+                file.writelines(f"N\t{sourcename}\t{cik}\t{name}\n" for cik, name in source["names"])
+                file.writelines(
+                    f"T\t{sourcename}\t{cik}\t{name}\t{ticker}\t{exchange}\n"
+                    for cik, name, ticker, exchange in source["tickers"]
+                )
+        os.replace(temporarypath, path)
+
+    def load(self, path=None):
+        """
+        Read an index file written by save and rebuild the lookups.
+        """
+
+        with gzip.open(path or self.path, "rt", encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            self.sources = {sourcename: dict(source, names=[], tickers=[]) for sourcename, source in header.items()}
+            for line in file:
+                fields = line.rstrip("\n").split("\t")
+                if fields[0] == "N":
+                    self.sources[fields[1]]["names"].append((int(fields[2]), fields[3]))
+                elif fields[0] == "T":
+                    self.sources[fields[1]]["tickers"].append((int(fields[2]), fields[3], fields[4], fields[5]))
+        self._build()
+
+    def _build(self):
+        """
+        Rebuild the sorted name keys, the substring blob & the ticker lookups from sources.
+        """
+
+        # Names are stored with collapsed whitespace, so upper() is their lookup key. A
+        # name listed in several cases (i.e. 'Zillow Group, Inc.' & 'ZILLOW GROUP, INC.')
+        # is kept once per CIK, as spelled in the tickers file when listed there.
+        pairs = {}
+        self._tickers = {}
+        self._cik_tickers = {}
+        for source in self.sources.values():
+            for cik, name, ticker, exchange in source["tickers"]:
+                pairs.setdefault((cik, name.upper()), name)
+                self._tickers[ticker] = (cik, name, ticker, exchange)
+                tickerlist = self._cik_tickers.setdefault(cik, [])
+                if ticker not in tickerlist:
+                    tickerlist.append(ticker)
+        for source in self.sources.values():
+            for cik, name in source["names"]:
+                pairs.setdefault((cik, name.upper()), name)
+
+        # The sources are saved in key order, which keeps the sort of a loaded index linear
+        pairs = list(pairs.items())
+        order = sorted(range(len(pairs)), key=lambda i: pairs[i][0][1])
+        self._keys = [pairs[i][0][1] for i in order]
+        self._ciks = [pairs[i][0][0] for i in order]
+        self._names = [pairs[i][1] for i in order]
+        # Names are joined by newlines, which never occur in a name, so a substring match
+        # never spans two names. offsets[i] is the start of name i in the blob.
+        self._blob = "\n".join(self._keys)
+        lengths = numpy.fromiter((len(key) + 1 for key in self._keys), dtype=numpy.int64, count=len(self._keys))
+        self._offsets = numpy.concatenate([[0], numpy.cumsum(lengths)])
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return f"<CikIndex {len(self)} names, {len(self._tickers)} tickers: {self.path}>"
+
+
+def _cik_index_key(name):
+    """
+    Normalize a company name for lookups: upper case with collapsed whitespace.
+    """
+
+    return " ".join(str(name).upper().split())
+
+
+def _cik_index_tickers(content):
+    """
+    Parse company_tickers_exchange.json (or company_tickers.json) into (cik, name) pairs
+    and (cik, name, ticker, exchange) rows.
+    """
+
+    data = json.loads(content)
+    if "fields" in data:
+        fields = data["fields"]
+        records = [dict(zip(fields, row)) for row in data["data"]]
+    else:
+        records = [
+            {"cik": row["cik_str"], "name": row["title"], "ticker": row["ticker"], "exchange": ""}
+            for row in data.values()
+        ]
+    tickers = [
+        (int(record["cik"]), _cik_index_clean(record["name"]), str(record["ticker"]).upper(), record.get("exchange") or "")
+        for record in records
+        if record.get("ticker")
+    ]
+    names = [(int(record["cik"]), _cik_index_clean(record["name"])) for record in records]
+    return names, tickers
+
+
+def _cik_index_names(content):
+    """
+    Parse cik-lookup-data.txt "NAME:CIK:" lines into (cik, name) pairs. Names may contain
+    colons, so the CIK is split off from the right.
+    """
+
+    names = []
+    for line in content.decode("latin-1").splitlines():
+        parts = line.rsplit(":", 2)
+        if len(parts) == 3 and parts[1].isdigit():
+            names.append((int(parts[1]), _cik_index_clean(parts[0])))
+    return names
+
+
+def _cik_index_clean(name):
+    """
+    Strip the characters that would break the tab separated index file.
+    """
+
+    return " ".join(str(name).replace("\t", " ").split())
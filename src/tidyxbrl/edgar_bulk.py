@@ -0,0 +1,291 @@
+"""
+https://www.sec.gov/edgar/sec-api-documentation
+
+Bulk data
+The most efficient means to fetch large amounts of API data is the bulk archive ZIP
+files, which are recompiled nightly.
+
+The companyfacts.zip file contains all the data from the XBRL Frame API and the XBRL
+Company Facts API
+https://www.sec.gov/Archives/edgar/daily-index/xbrl/companyfacts.zip
+
+The submissions.zip file contains the public EDGAR filing history for all filers from the
+Submissions API
+https://www.sec.gov/Archives/edgar/daily-index/bulkdata/submissions.zip
+
+-----
+
+edgar_bulk_load reads the members straight out of a local archive, without extracting it,
+flattens them across a pool of processes with the edgar_query tidy logic, and writes the
+output in part files as each batch completes. A manifest of the finished members lets an
+interrupted load resume where it stopped.
+"""
+
+import json
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas
+from tqdm import tqdm
+from tidyxbrl.edgar_query import _edgar_query_tidy, _edgar_submissions_tidy
+from tidyxbrl.instrumentation import instrumented
+
+BULK_OUTPUT_FORMATS = {
+    "parquet": ".parquet",
+    "csv": ".csv.gz",
+    "pickle": ".pkl",
+}
+
+BULK_MANIFEST = "_manifest.json"
+
+
+@instrumented
+def edgar_bulk_load(
+    archive,
+    output_directory,
+    kind=None,
+    workers=None,
+    batch_size=250,
+    output_format="parquet",
+    members=None,
+):
+    """
+    The edgar_bulk_load function flattens every member of a companyfacts.zip or
+    submissions.zip archive into part files of a single long table.
+
+    Members are read from the archive by the worker processes themselves, so only the
+    member names and the part summaries cross process boundaries. Every finished batch is
+    recorded in the output manifest and skipped by the next call on the same directory,
+    while members that failed are tried again.
+
+    Args:
+        archive (str): Path of a local companyfacts.zip or submissions.zip archive.
+        output_directory (str): Directory receiving the part files & the manifest.
+        kind (str, optional): 'companyfacts' or 'submissions'. Defaults to the kind of a
+        resumed load, or else of the first member of the archive that decodes.
+        workers (int, optional): Number of processes. Defaults to the CPU count.
+        batch_size (int, optional): Members flattened into each part file. Defaults to 250.
+        output_format (str, optional): 'parquet', 'csv' or 'pickle'. Defaults to 'parquet',
+        which requires pyarrow or fastparquet.
+        members (list, optional): Member names to load. Defaults to every .json member.
+
+    Returns:
+        pandas.DataFrame: One row per part written by this call (part, members, rows).
+        Members that could not be flattened are listed in attrs["failures"] as
+        {member: error message}, and attrs["skipped"] counts the members already loaded.
+
+    Raises:
+        ValueError: If kind or output_format is not supported.
+
+    Examples:
+        edgar_bulk_load('companyfacts.zip', 'companyfacts/', workers=8)
+        edgar_bulk_load('submissions.zip', 'submissions/', output_format='csv')
+    """
+
+    if output_format not in BULK_OUTPUT_FORMATS:
+        raise ValueError("output_format must be in: " + str(list(BULK_OUTPUT_FORMATS)))
+
+    os.makedirs(output_directory, exist_ok=True)
+    manifest = _edgar_bulk_manifest(output_directory)
+    kind = kind or manifest.get("kind")
+    with zipfile.ZipFile(archive) as zipdata:
+        if members is None:
+            members = [name for name in zipdata.namelist() if name.endswith(".json")]
+        # The kind of the first member that decodes; the broken ones are reported by the
+        # workers, and without any member that decodes every member is reported
+        decoded = False
+        for member in members if kind is None else []:
+            try:
+                data = json.loads(zipdata.read(member))
+            except Exception:
+                continue
+            kind, decoded = _edgar_bulk_kind(data), True
+            break
+    if (kind is not None or decoded) and kind not in ("companyfacts", "submissions"):
+        raise ValueError("kind must be in: " + str(["companyfacts", "submissions"]))
+
+    loaded = {member for part in manifest["parts"].values() for member in part["members"]}
+    pending = [member for member in members if member not in loaded]
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+    summaries = []
+    failures = {}
+    if batches:
+        # Numbered after the last recorded part, so that no finished part is overwritten
+        partnumber = 1 + max((int(partname[5:10]) for partname in manifest["parts"]), default=-1)
+        with ProcessPoolExecutor(max_workers=workers) as processpool:
+            futures = {}
+            for batch in batches:
+                partname = f"part-{partnumber:05d}{BULK_OUTPUT_FORMATS[output_format]}"
+                partnumber += 1
+                future = processpool.submit(
+                    _edgar_bulk_worker, archive, batch, kind, os.path.join(output_directory, partname), output_format
+                )
+                futures[future] = (partname, batch)
+
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Processing Batches"):
+                partname, batch = futures[future]
+                try:
+                    rows, batchfailures = future.result()
+                except Exception as exc:
+                    batchfailures = {member: f"{type(exc).__name__}: {exc}" for member in batch}
+                    rows = None
+                failures.update(batchfailures)
+                if rows is None:
+                    continue
+                # Recorded as soon as the part is on disk, so an interrupted load resumes here
+                manifest["kind"] = kind
+                # Failed members are left out so that the next call retries them
+                manifest["parts"][partname] = {
+                    "members": [member for member in batch if member not in batchfailures],
+                    "rows": rows,
+                }
+                _edgar_bulk_save_manifest(output_directory, manifest)
+                summaries.append({"part": partname, "members": len(batch) - len(batchfailures), "rows": rows})
+
+    for member, message in failures.items():
+        print(f"Error: {member}: {message}")
+
+    summary = pandas.DataFrame(summaries, columns=["part", "members", "rows"])
+    summary = summary.sort_values("part").reset_index(drop=True)
+    summary.attrs["failures"] = failures
+    summary.attrs["skipped"] = len(members) - len(pending)
+    return summary
+
+
+@instrumented
+def edgar_bulk_read(output_directory, columns=None):
+    """
+    The edgar_bulk_read function reads the part files written by edgar_bulk_load back into
+    a single DataFrame.
+
+    Args:
+        output_directory (str): Directory written by edgar_bulk_load.
+        columns (list, optional): Columns to read. Defaults to every column.
+
+    Returns:
+        pandas.DataFrame: The concatenated parts, with categorical columns kept categorical.
+
+    Examples:
+        edgar_bulk_read('companyfacts/', columns=['cik', 'concept', 'end', 'val'])
+    """
+
+    manifest = _edgar_bulk_manifest(output_directory)
+    frames = [
+        _edgar_bulk_read_part(os.path.join(output_directory, partname), columns)
+        for partname, part in sorted(manifest["parts"].items())
+        if part["rows"]
+    ]
+    if not frames:
+        return pandas.DataFrame(columns=columns)
+    categoricals = [name for name in frames[0].columns if isinstance(frames[0][name].dtype, pandas.CategoricalDtype)]
+    outputframe = pandas.concat(frames, ignore_index=True)
+    # Parts hold different categories, which concat turns into object columns
+    for name in categoricals:
+        outputframe[name] = outputframe[name].astype("category")
+    return outputframe
+
+
+def _edgar_bulk_kind(data):
+    """
+    Return the archive kind of a decoded member.
+    """
+
+    if "facts" in data:
+        return "companyfacts"
+    if "filings" in data or "accessionNumber" in data:
+        return "submissions"
+    return None
+
+
+def _edgar_bulk_frame(data, kind, member):
+    """
+    Flatten one decoded member with the edgar_query tidy logic.
+    """
+
+    if kind == "companyfacts":
+        return _edgar_query_tidy(data)
+    # Paged submissions members carry their CIK only in the member name
+    cikmatch = re.search(r"CIK(\d{10})", member)
+    return _edgar_submissions_tidy(data, cik=int(cikmatch.group(1)) if cikmatch else None)
+
+
+def _edgar_bulk_worker(archive, members, kind, partpath, output_format):
+    """
+    Flatten a batch of archive members into one part file.
+
+    Returns:
+        tuple: (rows written, {member: error message}).
+    """
+
+    frames = []
+    failures = {}
+    with zipfile.ZipFile(archive) as zipdata:
+        for member in members:
+            try:
+                frames.append(_edgar_bulk_frame(json.loads(zipdata.read(member)), kind, member))
+            except Exception as exc:
+                failures[member] = f"{type(exc).__name__}: {exc}"
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return 0, failures
+
+    categoricals = [name for name in frames[0].columns if isinstance(frames[0][name].dtype, pandas.CategoricalDtype)]
+    partframe = pandas.concat(frames, ignore_index=True)
+    for name in categoricals:
+        partframe[name] = partframe[name].astype("category")
+    partframe.attrs = {}
+    _edgar_bulk_write_part(partframe, partpath, output_format)
+    return len(partframe), failures
+
+
+def _edgar_bulk_write_part(partframe, partpath, output_format):
+    """
+    Write a part file through a temporary name so that a part on disk is always complete.
+    """
+
+    temporarypath = partpath + ".tmp"
+    if output_format == "parquet":
+        partframe.to_parquet(temporarypath, index=False)
+    elif output_format == "csv":
+        partframe.to_csv(temporarypath, index=False, compression="gzip")
+    else:
+        partframe.to_pickle(temporarypath)
+    os.replace(temporarypath, partpath)
+
+
+def _edgar_bulk_read_part(partpath, columns=None):
+    """
+    Read a part file written by _edgar_bulk_write_part.
+    """
+
+    if partpath.endswith(BULK_OUTPUT_FORMATS["parquet"]):
+        return pandas.read_parquet(partpath, columns=columns)
+    if partpath.endswith(BULK_OUTPUT_FORMATS["csv"]):
+        return pandas.read_csv(partpath, usecols=columns)
+    partframe = pandas.read_pickle(partpath)
+    return partframe[columns] if columns is not None else partframe
+
+
+def _edgar_bulk_manifest(output_directory):
+    """
+    Read the manifest of an output directory, or start an empty one.
+    """
+
+    manifestpath = os.path.join(output_directory, BULK_MANIFEST)
+    if os.path.isfile(manifestpath):
+        with open(manifestpath, "r", encoding="utf-8") as file:
+            return json.load(file)
+    return {"kind": None, "parts": {}}
+
+
+def _edgar_bulk_save_manifest(output_directory, manifest):
+    """
+    Replace the manifest of an output directory in one step.
+    """
+
+    manifestpath = os.path.join(output_directory, BULK_MANIFEST)
+    with open(manifestpath + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(manifest, file)
+    os.replace(manifestpath + ".tmp", manifestpath)
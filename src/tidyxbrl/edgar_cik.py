@@ -14,11 +14,14 @@ import httpx
 from bs4 import element
 from bs4 import BeautifulSoup
 import pandas as pd
+from tidyxbrl.http_cache import cached_request
+from tidyxbrl.instrumentation import instrumented
 from src.config.default_headers import con_headers_default
 
 # %%
 
 
+@instrumented
 def edgar_cik(
     query,
     comprehensive=False,
@@ -26,7 +29,10 @@ def edgar_cik(
     timeout_sec=15,
     last_company_df=pd.DataFrame(),
     max_start_row=25000,
-    con_headers = con_headers_default
+    con_headers = con_headers_default,
+    cache = None,
+    client = None,
+    index = None
 ):
     """
     The edgar_cik function is used to pull Central Index Key (CIK) for reporting companies
@@ -39,6 +45,13 @@ def edgar_cik(
         last_company_df: (comprehensive = True) The previous DataFrame to compare with current
         max_start_row: The maximum starting index for retrieving results
         con_headers (dict): The headers to be sent with the initial request.
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (HttpClient, optional): Pooled & rate limited client sending the requests.
+        Defaults to the client installed with set_default_client.
+        index (CikIndex, optional): Local CIK index answering the query in place of
+        browse-edgar. The names starting with query are returned, with an empty state and
+        an additional ticker column.
 
     Returns:
         company_df: Pandas DataFrame of company names, CIK, and state
@@ -51,23 +64,95 @@ def edgar_cik(
             timeout_sec=15,
             last_company_df=pd.DataFrame(),
             max_start_row=25000,)
+        -  edgar_cik(query = 'App', comprehensive=True, index=CikIndex())
     """
 
+    if index is not None:
+        return _edgar_cik_index(index, query, comprehensive, start_row, max_start_row)
+
     # Read the company JSON from the SEC
 
     url = "https://www.sec.gov/cgi-bin/browse-edgar"  # Replace with your desired CIK
 
-    payload = {
+    response = cached_request(
+        "POST",
+        url,
+        headers=con_headers,
+        data=_edgar_cik_payload(query, start_row),
+        timeout_sec=timeout_sec,
+        cache=cache,
+        client=client,
+        send=httpx.request,
+    )
+
+    company_df, single_company = _edgar_cik_page(response.content)
+    if single_company:
+        return company_df
+
+    if company_df is not None:
+        print(f"Start Row: {start_row} - {company_df.iloc[0]['company']}")
+
+        if (
+            (comprehensive is True)
+            & (len(company_df) == 100)
+            & (last_company_df.equals(company_df) is False)
+            & (start_row < max_start_row)
+        ):
+            new_company_df = edgar_cik(
+                query,
+                comprehensive=comprehensive,
+                start_row=start_row + 100,
+                timeout_sec=timeout_sec,
+                last_company_df=company_df,
+                max_start_row=max_start_row,
+                con_headers=con_headers,
+                cache=cache,
+                client=client,
+            )
+
+            company_df = pd.concat([company_df, new_company_df]).reset_index(drop=True)
+
+        return company_df
+
+    print(f"Final Row Reached At {start_row}")
+    return pd.DataFrame()
+
+
+def _edgar_cik_index(index, query, comprehensive, start_row, max_start_row):
+    """
+    Answer an edgar_cik query from a CikIndex, with the browse-edgar paging: 100 rows from
+    start_row, or every row up to max_start_row + 100 when comprehensive.
+    """
+
+    stop_row = max_start_row + 100 if comprehensive else start_row + 100
+    company_df = index.search(query, match="starts-with", limit=stop_row)
+    return company_df.iloc[start_row:].reset_index(drop=True)
+
+
+def _edgar_cik_payload(query, start_row):
+    """
+    Build the browse-edgar form data of a single page of up to 100 companies.
+    """
+
+    return {
         "company": query,
         "match": "starts-with",
         "count": 100,
         "start": start_row,
     }
 
-    response = httpx.post(url, headers=con_headers, data=payload, timeout=timeout_sec)
+
+def _edgar_cik_page(content):
+    """
+    Parse a browse-edgar page.
+
+    Returns:
+        tuple: (company_df, single_company). single_company is True when the query matched
+        a single company page, and company_df is None when the page holds no result table.
+    """
 
     # Parse the HTML content
-    soup = BeautifulSoup(response.content, "html.parser")
+    soup = BeautifulSoup(content, "html.parser")
 
     # Find the table in the HTML
     table = soup.find("table", {"class": "tableFile2"})
@@ -93,7 +178,7 @@ def edgar_cik(
                 "state": [states],
             }
         )
-        return company_df
+        return company_df, True
 
     # Extract the table rows
     if isinstance(table, element.Tag):
@@ -116,26 +201,8 @@ def edgar_cik(
         company_df = pd.DataFrame(
             {"cik": pd.to_numeric(cik_codes), "cik_str": cik_codes ,"company": company_names, "state": states}
         )
-        print(f"Start Row: {start_row} - {company_df.iloc[0]['company']}")
-
-        if (
-            (comprehensive is True)
-            & (len(company_df) == 100)
-            & (last_company_df.equals(company_df) is False)
-            & (start_row < max_start_row)
-        ):
-            new_company_df = edgar_cik(
-                query,
-                comprehensive=comprehensive,
-                start_row=start_row + 100,
-                last_company_df=company_df,
-            )
-
-            company_df = pd.concat([company_df, new_company_df]).reset_index(drop=True)
+        return company_df, False
 
-        return company_df
-
-    print(f"Final Row Reached At {start_row}")
-    return pd.DataFrame()
+    return None, False
 
 # %%
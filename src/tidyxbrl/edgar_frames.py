@@ -17,15 +17,29 @@ Because company financial calendars can start and end on any month or day and ev
 in length from quarter to quarter to according to the day of the week, the frame data is
 assembled by the dates that best align with a calendar quarter or year. Data users should
 be mindful different reporting start and end dates for facts contained in a frame.
+
+-----
+
+tidy = True turns the data array of a frame straight into one flat typed DataFrame, one
+row per entity, and edgar_frames_many pulls many periods of one concept into a single
+frame the same way.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+import numpy
 import pandas
-import requests
 from tqdm import tqdm
+from tidyxbrl.http_cache import cached_request
+from tidyxbrl.edgar_query import _edgar_dates
+from tidyxbrl.instrumentation import instrumented, instrument_stage
 from src.config.default_headers import con_headers_default
 
 
-def edgar_frames(urldescriptor="", timeout_sec = 15, con_headers = con_headers_default):
+FRAMES_TIDY_COLUMNS = ["accn", "cik", "entityName", "loc", "start", "end", "val"]
+
+
+@instrumented
+def edgar_frames(urldescriptor="", timeout_sec = 15, con_headers = con_headers_default, cache = None, client = None, tidy = False):
     """
     The edgar_frames function aggregates one fact for each reporting entity
     that is last filed that most closely fits the calendrical period requested.
@@ -46,22 +60,116 @@ def edgar_frames(urldescriptor="", timeout_sec = 15, con_headers = con_headers_d
             - dateholder: Date of evaluation (i.e. CY2019Q1I)
         timeout_sec: The time in seconds to wait for the server to respond
         con_headers (dict): The headers to be sent with the initial request.
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (HttpClient, optional): Pooled & rate limited client sending the requests.
+        Defaults to the client installed with set_default_client.
+        tidy (bool, optional): If True, return one flat row per reporting entity instead of
+        the melted frame with nested DataFrames. Defaults to False.
 
     Outputs:
         return companies: Return a pandas DataFrame of reporting companies and their associated CIK
+        With tidy = True the columns are accn, cik, entityName, loc, start, end & val
+        (start is empty for instantaneous frames), and attrs holds the frame header
+        (taxonomy, tag, ccp, uom, label, description, pts).
 
     Examples:
         - edgar_frames(urldescriptor = 'us-gaap/NonoperatingIncomeExpense/USD/CY2019Q1I.json')
+        - edgar_frames(urldescriptor = 'us-gaap/Revenues/USD/CY2022', tidy = True)
     """
 
     # Specify the query url and parameters
-    dataquery = (
+    dataquery = _edgar_frames_url(urldescriptor)
+    # Pull the data, check the response, and convert to a long format
+    dataresponse = cached_request("GET", dataquery, headers=con_headers, timeout_sec=timeout_sec, cache=cache, client=client)
+    with instrument_stage("edgar_frames.frame") as record:
+        outputframe = _edgar_frames_frame(dataresponse, tidy)
+        if isinstance(outputframe, pandas.DataFrame):
+            record["rows"] = len(outputframe)
+    return outputframe
+
+
+@instrumented
+def edgar_frames_many(
+    urldescriptor,
+    periods,
+    workers=4,
+    timeout_sec=15,
+    con_headers=con_headers_default,
+    cache=None,
+    client=None,
+):
+    """
+    The edgar_frames_many function pulls the frames of one concept for many periods and
+    concatenates them into a single tidy DataFrame.
+
+    Args:
+        urldescriptor: URL description of the concept without the period, structured as
+        "finstandard/reporttype/denomination" (i.e. 'us-gaap/Revenues/USD')
+        periods (list): Periods to pull (i.e. ['CY2020', 'CY2021', 'CY2022']).
+        workers (int, optional): Requests sent at the same time. Defaults to 4. The client
+        still holds the SEC rate limit.
+        timeout_sec: The time in seconds to wait for the server to respond
+        con_headers (dict): The headers to be sent with the initial request.
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (HttpClient, optional): Pooled & rate limited client sending the requests.
+        Defaults to the client installed with set_default_client.
+
+    Returns:
+        pandas.DataFrame: A leading categorical frame column (the period) followed by the
+        edgar_frames tidy columns. attrs holds the concept header (taxonomy, tag, uom,
+        label, description), the pts count of every period in attrs["frames"], and the
+        periods that could not be pulled in attrs["failures"] as {period: error message}.
+
+    Examples:
+        - edgar_frames_many('us-gaap/Revenues/USD', ['CY2020', 'CY2021', 'CY2022'])
+    """
+
+    urldescriptor = str(urldescriptor).strip("/")
+    periods = list(dict.fromkeys(periods))
+
+    def pull_frame(period):
+        dataquery = _edgar_frames_url(urldescriptor + "/" + str(period))
+        dataresponse = cached_request("GET", dataquery, headers=con_headers, timeout_sec=timeout_sec, cache=cache, client=client)
+        if dataresponse.status_code != 200:
+            raise ValueError(str(dataresponse.status_code) + ": Error in Response")
+        return dataresponse.json()
+
+    framedocuments = []
+    failures = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as threadpool:
+        futures = [threadpool.submit(pull_frame, period) for period in periods]
+        for period, future in zip(periods, tqdm(futures, desc="Processing Frames")):
+            try:
+                framedocuments.append(future.result())
+            except Exception as exc:
+                failures[str(period)] = f"{type(exc).__name__}: {exc}"
+
+    tidydata = _edgar_frames_tidy(framedocuments, with_frame=True)
+    tidydata.attrs["failures"] = failures
+    return tidydata
+
+
+def _edgar_frames_url(urldescriptor):
+    """
+    Build the data.sec.gov url of an edgar_frames request.
+    """
+
+    return (
         "https://data.sec.gov/api/xbrl/frames/"
         + str(urldescriptor).replace(".json", "")
         + ".json"
     )
-    # Pull the data, check the response, and convert to a long format
-    dataresponse = requests.get(url=dataquery, headers=con_headers, timeout=timeout_sec)
+
+
+def _edgar_frames_frame(dataresponse, tidy=False):
+    """
+    Check an edgar_frames response and convert it to a long format DataFrame.
+    """
+
+    if dataresponse.status_code == 200 and tidy:
+        return _edgar_frames_tidy([dataresponse.json()])
     if dataresponse.status_code == 200:
         try:
             result = pandas.DataFrame(pandas.json_normalize(dataresponse.json()))
@@ -83,3 +191,38 @@ def edgar_frames(urldescriptor="", timeout_sec = 15, con_headers = con_headers_d
                 pass
 
     return longdata
+
+
+def _edgar_frames_tidy(framedocuments, with_frame=False):
+    """
+    Turn the data arrays of one or more frame documents into a single typed DataFrame.
+
+    The records of every document are chained & read in one DataFrame construction, so
+    the periods of edgar_frames_many are concatenated before any column is converted.
+    """
+
+    records = [record for framedocument in framedocuments for record in framedocument.get("data", [])]
+    tidydata = pandas.DataFrame.from_records(records, columns=FRAMES_TIDY_COLUMNS)
+    tidydata["cik"] = pandas.to_numeric(tidydata["cik"]).astype(numpy.int64)
+    tidydata["val"] = pandas.to_numeric(tidydata["val"]).astype(numpy.float64)
+    for name in ["start", "end"]:
+        tidydata[name] = _edgar_dates(tidydata[name])
+    for name in ["accn", "entityName", "loc"]:
+        tidydata[name] = tidydata[name].astype("category")
+
+    header = {}
+    if framedocuments:
+        header = {key: value for key, value in framedocuments[0].items() if key != "data"}
+    if with_frame:
+        periods = [framedocument.get("ccp") for framedocument in framedocuments]
+        lengths = [len(framedocument.get("data", [])) for framedocument in framedocuments]
+        tidydata.insert(
+            0,
+            "frame",
+            pandas.Categorical.from_codes(numpy.repeat(numpy.arange(len(periods), dtype=numpy.int32), lengths), categories=periods),
+        )
+        header.pop("ccp", None)
+        header.pop("pts", None)
+        header["frames"] = {framedocument.get("ccp"): framedocument.get("pts") for framedocument in framedocuments}
+    tidydata.attrs.update(header)
+    return tidydata
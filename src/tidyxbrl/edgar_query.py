@@ -30,16 +30,32 @@ data.sec.gov/api/xbrl/companyfacts/
 This API returns all the company concepts data for a company into a single API call:
 
 https://data.sec.gov/api/xbrl/companyfacts/CIK##########.json
+
+-----
+
+tidy = True flattens the facts -> taxonomy -> concept -> units -> [fact] tree of the
+companyfacts & companyconcept APIs in one pass into a single long frame, one row per
+fact, instead of DataFrames nested inside the cells of the melted JSON.
 """
 
 import pandas
-import requests
 from tqdm import tqdm
 import numpy
+from tidyxbrl.http_cache import cached_request
+from tidyxbrl.instrumentation import instrumented, instrument_stage
 from src.config.default_headers import con_headers_default
 
 
-def edgar_query(companycik, query_type, queryextension="", parse_pandas = True, timeout_sec = 15, con_headers = con_headers_default):
+TIDY_QUERY_TYPES = ["companyconcept", "companyfacts"]
+
+TIDY_COLUMNS = [
+    "cik", "taxonomy", "concept", "unit", "start", "end", "val",
+    "accn", "fy", "fp", "form", "filed", "frame",
+]
+
+
+@instrumented
+def edgar_query(companycik, query_type, queryextension="", parse_pandas = True, timeout_sec = 15, con_headers = con_headers_default, cache = None, client = None, tidy = False):
     """
     Query SEC data using the Central Index Key (CIK).
 
@@ -56,19 +72,44 @@ def edgar_query(companycik, query_type, queryextension="", parse_pandas = True,
         parse_pandas (bool, optional): If True, the data is converted to a pandas DataFrame.
         timeout_sec: The time in seconds to wait for the server to respond
         con_headers (dict): The headers to be sent with the initial request.
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (HttpClient, optional): Pooled & rate limited client sending the requests.
+        Defaults to the client installed with set_default_client.
+        tidy (bool, optional): If True, 'companyfacts' & 'companyconcept' are returned as
+        one long frame with a row per fact. Defaults to False.
 
     Returns:
-        pandas.DataFrame: Tidy dataframe housing the report data.
+        pandas.DataFrame: Tidy dataframe housing the report data. With tidy = True the
+        columns are cik, taxonomy, concept, unit, start, end, val, accn, fy, fp, form,
+        filed & frame, with categorical labels, datetime64 dates & float64 values, and
+        attrs holds the entityName.
 
     Raises:
         ValueError: If query_type is not one of 'submissions', 'companyconcept', or
-        'companyfacts'.
+        'companyfacts', or tidy = True is requested for 'submissions'.
 
     Examples:
         edgar_query('0000789019', query_type = 'submissions')
         edgar_query('0000789019', query_type = 'companyconcept',
         queryextension = '/us-gaap/AccountsPayableCurrent.json')
         edgar_query('0000789019', query_type = 'companyfacts')
+        edgar_query('0000789019', query_type = 'companyfacts', tidy = True)
+    """
+
+    dataquery = _edgar_query_url(companycik, query_type, queryextension, tidy)
+    # Pull the data, check the response, and convert to a long format
+    dataresponse = cached_request("GET", dataquery, headers=con_headers, timeout_sec=timeout_sec, cache=cache, client=client)
+    with instrument_stage("edgar_query.frame") as record:
+        outputframe = _edgar_query_frame(dataresponse, parse_pandas, tidy)
+        if isinstance(outputframe, pandas.DataFrame):
+            record["rows"] = len(outputframe)
+    return outputframe
+
+
+def _edgar_query_url(companycik, query_type, queryextension="", tidy=False):
+    """
+    Build the data.sec.gov url of an edgar_query request.
     """
 
     # Pull one of the urls associated with the query types
@@ -80,13 +121,23 @@ def edgar_query(companycik, query_type, queryextension="", parse_pandas = True,
     # Raise error if the data does not exist
     if query_type not in querydict:
         raise ValueError("parse_type must be in: " + str(querydict))
+    if tidy and query_type not in TIDY_QUERY_TYPES:
+        raise ValueError("tidy output requires query_type in: " + str(TIDY_QUERY_TYPES))
     # Specify the query url and parameters
     urlquery = querydict[query_type]
     dataquery = (
         urlquery + str(companycik) + str(queryextension).replace(".json", "") + ".json"
     )
-    # Pull the data, check the response, and convert to a long format
-    dataresponse = requests.get(url=dataquery, headers=con_headers, timeout=timeout_sec)
+    return dataquery
+
+
+def _edgar_query_frame(dataresponse, parse_pandas=True, tidy=False):
+    """
+    Check an edgar_query response and convert it to a long format DataFrame.
+    """
+
+    if dataresponse.status_code == 200 and tidy:
+        return _edgar_query_tidy(dataresponse.json())
     if dataresponse.status_code == 200:
         try:
             result = pandas.DataFrame(pandas.json_normalize(dataresponse.json()))
@@ -112,3 +163,109 @@ def edgar_query(companycik, query_type, queryextension="", parse_pandas = True,
                     longdata.at[valueholder, "value"] = pandas.DataFrame(loadvalue)
     longdata = longdata.assign(cik = lambda x: pandas.to_numeric(x.cik, errors='coerce'))
     return longdata
+
+
+def _edgar_query_tidy(data):
+    """
+    Flatten a companyfacts or companyconcept JSON document into one row per fact.
+
+    Each units list is read column by column, so the tree is walked once & no per row
+    objects are created. taxonomy, concept & unit are built straight from their codes
+    since the rows of one list share them.
+    """
+
+    if "facts" in data:
+        conceptitems = [
+            (taxonomy, concept, conceptdata.get("units", {}))
+            for taxonomy, concepts in data["facts"].items()
+            for concept, conceptdata in concepts.items()
+        ]
+    elif "units" in data:
+        conceptitems = [(data["taxonomy"], data["tag"], data["units"])]
+    else:
+        raise ValueError("tidy output requires a companyfacts or companyconcept document")
+
+    taxonomies, concepts, units = {}, {}, {}
+    codes = {"taxonomy": [], "concept": [], "unit": []}
+    lengths = []
+    factlists = []
+    for taxonomy, concept, unitdata in conceptitems:
+        taxonomycode = taxonomies.setdefault(taxonomy, len(taxonomies))
+        conceptcode = concepts.setdefault(concept, len(concepts))
+        for unit, facts in unitdata.items():
+            codes["taxonomy"].append(taxonomycode)
+            codes["concept"].append(conceptcode)
+            codes["unit"].append(units.setdefault(unit, len(units)))
+            lengths.append(len(facts))
+            factlists.append(facts)
+
+    lengths = numpy.array(lengths, dtype=numpy.int64)
+    columns = {}
+    for name, categories in [("taxonomy", taxonomies), ("concept", concepts), ("unit", units)]:
+        columns[name] = pandas.Categorical.from_codes(
+            numpy.repeat(numpy.array(codes[name], dtype=numpy.int32), lengths), categories=list(categories)
+        )
+    # One list per field across every units list, in row order
+    fields = {
+        name: [fact.get(name) for facts in factlists for fact in facts]
+        for name in ["start", "end", "val", "accn", "fy", "fp", "form", "filed", "frame"]
+    }
+    for name in ["start", "end", "filed"]:
+        columns[name] = _edgar_dates(fields[name])
+    # numpy reads missing (None) values as NaN
+    columns["val"] = numpy.array(fields["val"], dtype=numpy.float64)
+    columns["fy"] = pandas.array(numpy.array(fields["fy"], dtype=numpy.float64), dtype="Int16")
+    for name in ["accn", "fp", "form", "frame"]:
+        columns[name] = pandas.Categorical(fields[name])
+
+    tidydata = pandas.DataFrame(columns)
+    tidydata.insert(0, "cik", numpy.int64(data.get("cik") or 0))
+    tidydata = tidydata[TIDY_COLUMNS]
+    tidydata.attrs["entityName"] = data.get("entityName")
+    return tidydata
+
+
+SUBMISSIONS_COLUMNS = [
+    "cik", "accessionNumber", "filingDate", "reportDate", "acceptanceDateTime", "act", "form",
+    "fileNumber", "filmNumber", "items", "size", "isXBRL", "isInlineXBRL", "primaryDocument",
+    "primaryDocDescription",
+]
+
+
+def _edgar_submissions_tidy(data, cik=None):
+    """
+    Flatten the columnar filing arrays of a submissions document into one row per filing.
+
+    data is either a CIK##########.json document, whose filings.recent block is read, or
+    one of the CIK##########-submissions-###.json pages listed in filings.files, which
+    holds the arrays at the top level and no CIK.
+    """
+
+    filings = data.get("filings", {}).get("recent", {}) if "filings" in data else data
+    cik = int(data.get("cik") or cik or 0)
+    tidydata = pandas.DataFrame({name: filings.get(name) for name in SUBMISSIONS_COLUMNS[1:] if name in filings})
+    tidydata = tidydata.reindex(columns=SUBMISSIONS_COLUMNS[1:])
+    tidydata.insert(0, "cik", numpy.int64(cik))
+    for name in ["filingDate", "reportDate"]:
+        # Missing report dates are empty strings
+        tidydata[name] = _edgar_dates(tidydata[name].where(tidydata[name].astype(bool), None))
+    tidydata["acceptanceDateTime"] = pandas.to_datetime(tidydata["acceptanceDateTime"], utc=True, errors="coerce")
+    tidydata["size"] = pandas.to_numeric(tidydata["size"], errors="coerce").astype("Int64")
+    for name in ["isXBRL", "isInlineXBRL"]:
+        tidydata[name] = tidydata[name].astype("boolean")
+    for name in ["act", "form"]:
+        tidydata[name] = tidydata[name].astype("category")
+    tidydata.attrs["entityName"] = data.get("name")
+    return tidydata
+
+
+def _edgar_dates(values):
+    """
+    Parse YYYY-MM-DD strings (None for missing) into datetime64 values. Few distinct dates
+    repeat across the facts, so only the distinct dates are parsed.
+    """
+
+    datecodes = pandas.Categorical(values)
+    categories = pandas.to_datetime(numpy.asarray(datecodes.categories, dtype=object), format="%Y-%m-%d")
+    # Missing values hold code -1, which picks the NaT appended at the end
+    return pandas.DatetimeIndex(numpy.append(categories.values, numpy.datetime64("NaT"))[datecodes.codes])
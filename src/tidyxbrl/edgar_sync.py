@@ -0,0 +1,197 @@
+"""
+https://www.sec.gov/edgar/sec-api-documentation
+
+Incremental sync of the data.sec.gov submissions API.
+
+A submissions document lists the most recent filings (at least one year, or up to 1,000)
+newest first in filings.recent, and older filings in the pages listed in filings.files.
+SubmissionsSync remembers the newest accession seen for every CIK, returns only the
+filings accepted since, and follows the filings.files pages once, on the first sync of a
+CIK, for the historical backfill. A daily refresh then scales with the number of new
+filings instead of the length of every filing history.
+
+    sync = tidyxbrl.SubmissionsSync('submissions_state.json')
+    newfilings = sync.sync(['0000320193', '0000789019'])
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas
+from tqdm import tqdm
+from tidyxbrl.http_cache import cached_request
+from tidyxbrl.edgar_query import _edgar_query_url, _edgar_submissions_tidy, SUBMISSIONS_COLUMNS
+from tidyxbrl.instrumentation import instrumented
+from src.config.default_headers import con_headers_default
+
+SUBMISSIONS_PAGE_URL = "https://data.sec.gov/submissions/"
+
+
+class SubmissionsSync:
+    """
+    The SubmissionsSync class pulls the filings of many CIKs that are new since the last
+    sync, as one flat filings index.
+
+    Args:
+        path (str): JSON file holding the sync state. Created on the first sync.
+        backfill (bool, optional): If True, the first sync of a CIK also pulls the older
+        filings listed in filings.files. Defaults to True.
+
+    Attributes:
+        state (dict): Per CIK, the newest accession & acceptance time seen and whether the
+        backfill is done.
+
+    Examples:
+        sync = SubmissionsSync('submissions_state.json')
+        sync.sync(['0000320193', '0000789019'])
+    """
+
+    def __init__(self, path, backfill=True):
+        self.path = path
+        self.backfill = backfill
+        self.state = {}
+        self._lock = threading.Lock()
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as file:
+                self.state = json.load(file)
+
+    @instrumented
+    def sync(self, companyciks, workers=4, timeout_sec=15, con_headers=con_headers_default, cache=None, client=None):
+        """
+        Pull the filings of companyciks accepted since the last sync.
+
+        Args:
+            companyciks (list): CIK values, as int or 10 digit strings.
+            workers (int, optional): CIKs pulled at the same time. Defaults to 4. The client
+            still holds the SEC rate limit.
+            timeout_sec: The time in seconds to wait for the server to respond
+            con_headers (dict): The headers to be sent with the requests.
+            cache (ResponseCache, optional): Response cache to read from & store in.
+            Defaults to the cache installed with set_default_cache.
+            client (HttpClient, optional): Pooled & rate limited client sending the
+            requests. Defaults to the client installed with set_default_client.
+
+        Returns:
+            pandas.DataFrame: One row per new filing with the columns of SUBMISSIONS_COLUMNS,
+            newest first within each CIK. CIKs that could not be pulled are listed in
+            attrs["failures"] as {cik: error message} and keep their previous state.
+        """
+
+        ciks = list(dict.fromkeys(int(companycik) for companycik in companyciks))
+
+        def pull(cik):
+            return self._sync_cik(cik, timeout_sec, con_headers, cache, client)
+
+        frames = {}
+        failures = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as threadpool:
+                futures = [threadpool.submit(pull, cik) for cik in ciks]
+                for cik, future in zip(ciks, tqdm(futures, desc="Processing Submissions")):
+                    try:
+                        frames[cik] = future.result()
+                    except Exception as exc:
+                        failures[cik] = f"{type(exc).__name__}: {exc}"
+        finally:
+            self.save()
+
+        for cik, message in failures.items():
+            print(f"Error: {cik}: {message}")
+
+        frames = [frames[cik] for cik in ciks if cik in frames and len(frames[cik])]
+        if frames:
+            filings = pandas.concat(frames, ignore_index=True)
+            for name in ["act", "form"]:
+                filings[name] = filings[name].astype("category")
+        else:
+            filings = _edgar_submissions_tidy({}).iloc[0:0]
+        filings.attrs = {"failures": failures}
+        return filings
+
+    def save(self):
+        """
+        Write the sync state through a temporary file.
+        """
+
+        with self._lock:
+            state = json.dumps(self.state, indent=1, sort_keys=True)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as file:
+            file.write(state)
+        os.replace(self.path + ".tmp", self.path)
+
+    def _sync_cik(self, cik, timeout_sec, con_headers, cache, client):
+        """
+        Pull the new filings of one CIK and advance its state.
+        """
+
+        def fetch(url):
+            response = cached_request("GET", url, headers=con_headers, timeout_sec=timeout_sec, cache=cache, client=client)
+            if response.status_code != 200:
+                raise ValueError(str(response.status_code) + ": " + url)
+            return response.json()
+
+        with self._lock:
+            previous = dict(self.state.get(str(cik), {}))
+        data = fetch(_edgar_query_url(f"{cik:010d}", "submissions"))
+        recent = _edgar_submissions_tidy(data, cik=cik)
+        pages = data.get("filings", {}).get("files", [])
+
+        backfill = self.backfill and not previous.get("backfilled")
+        if backfill:
+            # The history is pulled once, in full; later syncs only read the recent block
+            newfilings = [_submissions_delta(recent, previous) if previous else recent] + [
+                _edgar_submissions_tidy(fetch(SUBMISSIONS_PAGE_URL + page["name"]), cik=cik) for page in pages
+            ]
+        elif not previous:
+            newfilings = [recent]
+        else:
+            newfilings = [_submissions_delta(recent, previous)]
+            # Every recent filing is new: the gap may reach into the first page
+            if len(newfilings[0]) == len(recent) and len(recent) and pages:
+                lastfiled = previous.get("last_filing_date") or ""
+                for page in pages:
+                    if str(page.get("filingTo", "")) >= lastfiled:
+                        pagefilings = _edgar_submissions_tidy(fetch(SUBMISSIONS_PAGE_URL + page["name"]), cik=cik)
+                        newfilings.append(_submissions_delta(pagefilings, previous))
+
+        newfilings = [frame for frame in newfilings if len(frame)]
+        if newfilings:
+            filings = pandas.concat(newfilings, ignore_index=True)
+            filings = filings.drop_duplicates("accessionNumber")
+            filings = filings.sort_values("acceptanceDateTime", ascending=False, kind="stable").reset_index(drop=True)
+        else:
+            filings = recent.iloc[0:0]
+
+        # filings.recent is listed newest first
+        newest = recent if len(recent) else filings
+        with self._lock:
+            self.state[str(cik)] = {
+                "last_accession": newest["accessionNumber"].iloc[0] if len(newest) else previous.get("last_accession"),
+                "last_accepted": newest["acceptanceDateTime"].iloc[0].isoformat() if len(newest) else previous.get("last_accepted"),
+                "last_filing_date": newest["filingDate"].iloc[0].strftime("%Y-%m-%d") if len(newest) else previous.get("last_filing_date"),
+                "backfilled": bool(previous.get("backfilled") or backfill),
+                "filings_seen": int(previous.get("filings_seen", 0)) + len(filings),
+            }
+        return filings[SUBMISSIONS_COLUMNS]
+
+    def __repr__(self):
+        return f"<SubmissionsSync {len(self.state)} CIKs: {self.path}>"
+
+
+def _submissions_delta(filings, previous):
+    """
+    Return the filings accepted after the last sync: the rows above the last accession
+    seen, or, when it is no longer listed, the rows accepted after it.
+    """
+
+    lastaccession = previous.get("last_accession")
+    matches = (filings["accessionNumber"] == lastaccession).to_numpy().nonzero()[0]
+    if len(matches):
+        return filings.iloc[: matches[0]]
+    lastaccepted = previous.get("last_accepted")
+    if lastaccepted is None:
+        return filings
+    return filings[filings["acceptanceDateTime"] > pandas.Timestamp(lastaccepted)]
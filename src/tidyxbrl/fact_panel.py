@@ -0,0 +1,292 @@
+"""
+Dense company x quarter x concept panels built from tidy facts.
+
+fact_panel turns the tidy facts of many companies (edgar_query(..., tidy=True),
+edgar_bulk_read or xbrl_parse output) into one numpy array of shape
+(company, quarter, concept), without any groupby or pivot_table over object columns:
+
+    panel = tidyxbrl.fact_panel(facts, concepts=['Revenues', 'NetIncomeLoss', 'Assets'], quarterly=True)
+    panel.values[:, -1, 0]
+    panel.to_frame(['Revenues', 'NetIncomeLoss'])
+
+CIKs & concepts are turned into integer codes, every period end into a calendar quarter,
+and the facts reported for the same cell are resolved with one stable sort of a packed
+int64 key. The sort runs in linear time on facts already grouped by company & concept, as
+edgar_query & edgar_bulk_read return them.
+"""
+
+import numpy
+import pandas
+from tidyxbrl.fact_store import _DAY_OFFSET, _MAX_DAY, _NO_DATE, _fact_store_days, _fact_store_filing
+from tidyxbrl.instrumentation import instrumented
+
+PANEL_KEEP = ["last", "first"]
+
+# A duration spans n quarters when it lasts n * 91.3 days, give or take 20 days (the
+# 13 & 14 week quarters of 52/53 week fiscal years)
+_QUARTER_DAYS = 91.3
+_QUARTER_TOLERANCE = 20
+# A period end is placed in the calendar quarter whose end it is closest to, so that
+# 2020-01-02 (a 52/53 week fiscal quarter) reads as 2019Q4
+_QUARTER_SHIFT = 45
+_FILED_BITS = 17
+
+
+class FactPanel:
+    """
+    The FactPanel class holds one value per company, calendar quarter & concept in a
+    dense numpy array, as built by fact_panel.
+
+    Attributes:
+        values (numpy.ndarray): (company, quarter, concept) array, NaN where no value was
+        reported or derived.
+        ciks (numpy.ndarray): CIK of every company.
+        periods (pandas.PeriodIndex): Calendar quarter of every period.
+        concepts (pandas.Index): Name of every concept.
+        derived (numpy.ndarray): Boolean array shaped as values, True where the quarterly
+        value was derived from year to date & annual values.
+
+    Examples:
+        panel = fact_panel(facts, concepts=['Revenues', 'NetIncomeLoss'], quarterly=True)
+        panel.values[panel.ciks == 320193]
+        panel.to_frame(['Revenues', 'NetIncomeLoss'])
+    """
+
+    def __init__(self, values, ciks, periods, concepts, derived=None):
+        self.values = values
+        self.ciks = ciks
+        self.periods = periods
+        self.concepts = concepts
+        self.derived = derived if derived is not None else numpy.zeros(values.shape, dtype=bool)
+
+    def to_frame(self, concepts=None, dropna=True):
+        """
+        Return a wide frame with one row per (cik, period) & one column per concept, i.e.
+        the lines of one financial statement.
+
+        Args:
+            concepts (list, optional): Concepts to return, in order. Defaults to every
+            concept of the panel.
+            dropna (bool, optional): If True, leave out the rows without any value.
+            Defaults to True.
+
+        Returns:
+            pandas.DataFrame: float columns indexed by (cik, period).
+
+        Raises:
+            ValueError: If a concept is not in the panel.
+        """
+
+        columns = self.concepts if concepts is None else pandas.Index(concepts)
+        layers = self.concepts.get_indexer(columns)
+        if (layers < 0).any():
+            raise ValueError("concepts not in the panel: " + str(list(columns[layers < 0])))
+        companycount, periodcount = self.values.shape[:2]
+        wideframe = pandas.DataFrame(
+            self.values[:, :, layers].reshape(companycount * periodcount, len(layers)),
+            index=pandas.MultiIndex.from_product([self.ciks, self.periods], names=["cik", "period"]),
+            columns=columns,
+        )
+        return wideframe.dropna(how="all") if dropna else wideframe
+
+    def __repr__(self):
+        companycount, periodcount, conceptcount = self.values.shape
+        return f"<FactPanel {companycount} companies x {periodcount} quarters x {conceptcount} concepts>"
+
+
+@instrumented
+def fact_panel(facts, concepts=None, ciks=None, start=None, end=None, unit=None, keep="last", quarterly=False, dtype="float64"):
+    """
+    The fact_panel function builds a dense company x quarter x concept panel from the
+    tidy facts of many companies.
+
+    Every fact is placed in the calendar quarter closest to its period end. Instants (the
+    facts without a start) & quarter long durations fill their cell directly; the year to
+    date & annual durations only serve to derive quarters.
+
+    Args:
+        facts (pandas.DataFrame): edgar_query(..., tidy=True), edgar_bulk_read or
+        FactStore output with the TIDY_COLUMNS (at least cik, concept, end & val), or
+        xbrl_parse output.
+        concepts (list, optional): Concepts of the panel, in order. Defaults to every
+        concept of facts, sorted.
+        ciks (list, optional): CIKs of the panel, in order. Defaults to every CIK of facts,
+        sorted.
+        start (str, optional): First quarter, as a date or a quarter (i.e. '2015Q1').
+        Defaults to the first quarter of facts.
+        end (str, optional): Last quarter. Defaults to the last quarter of facts.
+        unit (str or list, optional): Units to keep (i.e. 'USD'). Defaults to every unit.
+        keep (str, optional): Fact kept when several are reported for the same company,
+        concept & quarter. Can be 'last' or 'first'. Defaults to "last".
+            - last: The most recently filed fact, which holds any restatement.
+            - first: The first filed fact, as originally reported.
+        Facts filed on the same day are ordered by their row in facts.
+        quarterly (bool, optional): If True, derive the quarters that were not reported
+        from the year to date & annual durations sharing a start, i.e. Q4 = FY - 9M or
+        Q2 = H1 - Q1. Defaults to False.
+        dtype (str, optional): Type of the panel values, 'float64' or 'float32'. Defaults
+        to "float64".
+
+    Returns:
+        FactPanel: The values array, with the ciks, periods & concepts along its axes.
+
+    Raises:
+        ValueError: If facts misses the cik, concept, end or val columns, or keep is not
+        one of 'last' or 'first'.
+
+    Examples:
+        fact_panel(edgar_bulk_read('companyfacts.zip'), concepts=['Revenues', 'Assets'], unit='USD')
+        fact_panel(facts, start='2015Q1', end='2024Q4', quarterly=True).to_frame()
+    """
+
+    if keep not in PANEL_KEEP:
+        raise ValueError("keep must be in: " + str(PANEL_KEEP))
+    if "datacode" in facts.columns:
+        facts = _fact_store_filing(facts, None, None, None)
+    missing = [name for name in ["cik", "concept", "end", "val"] if name not in facts.columns]
+    if missing:
+        raise ValueError("facts must hold the columns: " + str(missing))
+
+    # Missing CIKs are NaN, which factorize & get_indexer code as -1
+    cikvalues = pandas.to_numeric(facts["cik"], errors="coerce").to_numpy(dtype=numpy.float64, na_value=numpy.nan)
+    if ciks is None:
+        cikcodes, panelciks = pandas.factorize(cikvalues, sort=True)
+        panelciks = numpy.asarray(panelciks, dtype=numpy.int64)
+    else:
+        panelciks = numpy.asarray(ciks, dtype=numpy.int64)
+        cikcodes = pandas.Index(panelciks).get_indexer(cikvalues)
+    cikcodes = cikcodes.astype(numpy.int32)
+    conceptcodes, panelconcepts = _panel_codes(facts["concept"], concepts)
+    del cikvalues
+
+    values = pandas.to_numeric(facts["val"], errors="coerce").to_numpy(dtype=numpy.float64, na_value=numpy.nan)
+    endday = _fact_store_days(facts["end"])
+    startday = _fact_store_days(facts["start"]) if "start" in facts.columns else numpy.full(len(facts), _NO_DATE, numpy.int32)
+    filedday = _fact_store_days(facts["filed"]) if "filed" in facts.columns else numpy.full(len(facts), _NO_DATE, numpy.int32)
+    filedday = numpy.where(filedday == _NO_DATE, 0, numpy.clip(filedday + _DAY_OFFSET, 0, _MAX_DAY)).astype(numpy.int32)
+
+    # Calendar quarter ordinals (as pandas.Period) & the number of quarters of every duration
+    quarter = _panel_quarters(endday)
+    quartercount = _panel_quarter_counts(startday, endday)
+
+    valid = (cikcodes >= 0) & (conceptcodes >= 0) & (endday != _NO_DATE) & ~numpy.isnan(values) & (quartercount >= 0)
+    if unit is not None and "unit" in facts.columns:
+        valid &= facts["unit"].isin([unit] if isinstance(unit, str) else list(unit)).to_numpy()
+    firstquarter = pandas.Period(start, freq="Q").ordinal if start is not None else (quarter[valid].min() if valid.any() else 0)
+    lastquarter = pandas.Period(end, freq="Q").ordinal if end is not None else (quarter[valid].max() if valid.any() else -1)
+    valid &= (quarter >= firstquarter) & (quarter <= lastquarter)
+    periodcount = int(max(lastquarter - firstquarter + 1, 0))
+    period = quarter - numpy.int32(firstquarter)
+    del quarter
+
+    shape = (len(panelciks), periodcount, len(panelconcepts))
+    panelvalues = numpy.full(shape, numpy.nan, dtype=dtype)
+    derived = numpy.zeros(shape, dtype=bool)
+    flatvalues = panelvalues.reshape(-1)
+
+    # Facts are sorted on company, concept, quarter (the order of tidy facts), and placed
+    # in the panel on company, quarter, concept
+    rows = numpy.flatnonzero(valid & (quartercount <= 1))
+    rows = rows[_panel_kept(_panel_key(cikcodes, conceptcodes, period, rows, shape[2], shape[1]), filedday[rows], keep)]
+    flatvalues[_panel_key(cikcodes, period, conceptcodes, rows, shape[1], shape[2])] = values[rows]
+
+    if quarterly:
+        # Year to date & annual durations, one per (cell, quarter count) after resolution
+        rows = numpy.flatnonzero(valid & (quartercount >= 1))
+        durationkey = _panel_key(cikcodes, conceptcodes, period, rows, shape[2], shape[1]) * 4 + quartercount[rows] - 1
+        kept = _panel_kept(durationkey, filedday[rows], keep)
+        rows, durationkey = rows[kept], durationkey[kept]
+
+        # A n quarter duration less the n - 1 quarter duration ending a quarter earlier
+        isderived = (quartercount[rows] >= 2) & (period[rows] >= 1)
+        targets, earlierkey = rows[isderived], durationkey[isderived] - 4 - 1
+        found = numpy.searchsorted(durationkey, earlierkey).clip(max=max(len(durationkey) - 1, 0))
+        matched = numpy.zeros(len(targets), dtype=bool)
+        if len(targets):
+            matched = (durationkey[found] == earlierkey) & (startday[rows[found]] == startday[targets])
+        targets, earlier = targets[matched], rows[found[matched]]
+
+        # The shortest year to date duration of a cell wins, only over unreported cells
+        cells = _panel_key(cikcodes, period, conceptcodes, targets, shape[1], shape[2])
+        first = numpy.ones(len(targets), dtype=bool)
+        first[1:] = cells[1:] != cells[:-1]
+        targets, earlier, cells = targets[first], earlier[first], cells[first]
+        fill = numpy.isnan(flatvalues[cells])
+        flatvalues[cells[fill]] = values[targets[fill]] - values[earlier[fill]]
+        derived.reshape(-1)[cells[fill]] = True
+
+    periods = pandas.period_range(pandas.Period(ordinal=int(firstquarter), freq="Q"), periods=periodcount, freq="Q")
+    return FactPanel(panelvalues, panelciks, periods, panelconcepts, derived)
+
+
+def _panel_key(major, middle, minor, rows, middlecount, minorcount):
+    """
+    Return the int64 position of rows in a (major, middle, minor) array.
+    """
+
+    return (major[rows].astype(numpy.int64) * middlecount + middle[rows]) * minorcount + minor[rows]
+
+
+def _panel_quarter_counts(startday, endday):
+    """
+    Return the number of quarters of every duration as int8: 0 for instants (no start),
+    1 to 4 for durations of whole quarters & -1 for any other duration.
+    """
+
+    instant = startday == _NO_DATE
+    length = endday - numpy.where(instant, endday, startday)
+    quartercount = numpy.rint(length / _QUARTER_DAYS).clip(0, 5).astype(numpy.int8)
+    iswhole = (quartercount >= 1) & (quartercount <= 4) & (numpy.abs(length - quartercount * _QUARTER_DAYS) <= _QUARTER_TOLERANCE)
+    quartercount[~instant & ~iswhole] = -1
+    return quartercount
+
+
+def _panel_quarters(days):
+    """
+    Return the quarter ordinal of every period end day, read from a table of the days
+    between the first & last period end.
+    """
+
+    dated = days[days != _NO_DATE]
+    if not len(dated):
+        return numpy.zeros(len(days), dtype=numpy.int32)
+    firstday = dated.min()
+    tabledays = numpy.arange(firstday, dated.max() + 1) - _QUARTER_SHIFT
+    table = (tabledays.astype("datetime64[D]").astype("datetime64[M]").astype(numpy.int64) // 3).astype(numpy.int32)
+    return table[(days - firstday).clip(0, len(table) - 1)]
+
+
+def _panel_codes(values, labels):
+    """
+    Return the codes of values (-1 when not in labels) & the index of labels, which
+    defaults to the distinct values, sorted.
+    """
+
+    if isinstance(values.dtype, pandas.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(dtype=numpy.int64), pandas.Index(values.cat.categories)
+    else:
+        codes, uniques = pandas.factorize(values)
+        uniques = pandas.Index(uniques)
+    if labels is None:
+        labels = uniques[numpy.bincount(codes[codes >= 0], minlength=len(uniques)) > 0].sort_values()
+    labels = pandas.Index(labels)
+    # Append -1 for the missing values, whose code -1 reads the last entry
+    remap = numpy.append(labels.get_indexer(uniques), -1).astype(numpy.int32)
+    return remap[codes], labels
+
+
+def _panel_kept(groupkey, filedday, keep):
+    """
+    Return the positions of the fact kept in every group: the most recently ('last') or
+    the first filed ('first'), facts filed on the same day in their order. The positions
+    are ordered by groupkey.
+    """
+
+    order = numpy.argsort((groupkey << _FILED_BITS) | filedday, kind="stable")
+    sortedkey = groupkey[order]
+    boundary = numpy.ones(len(order), dtype=bool)
+    if keep == "last":
+        boundary[:-1] = sortedkey[1:] != sortedkey[:-1]
+    else:
+        boundary[1:] = sortedkey[1:] != sortedkey[:-1]
+    return order[boundary]
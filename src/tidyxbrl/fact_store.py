@@ -0,0 +1,548 @@
+"""
+In memory, array backed store of tidy facts for repeated lookups across many filings.
+
+FactStore ingests edgar_query(..., tidy=True), edgar_bulk_read & xbrl_parse output into
+one numpy array per column. The CIKs, concepts, units & other labels are interned into
+integer codes, and the facts are kept sorted on a single int64 key packing
+
+    entity code (24 bits) | concept code (22 bits) | period end day (17 bits)
+
+so that the facts of a company & concept, or of a company & concept over a range of
+period ends, are a contiguous slice found with two binary searches. A second sorted key,
+concept | period end | entity, answers cross sections (one concept, every company) the
+same way. A lookup therefore reads only the rows it returns, instead of scanning every
+row with a boolean mask:
+
+    store = tidyxbrl.FactStore()
+    store.add(tidyxbrl.edgar_query('0000320193', 'companyfacts', tidy=True))
+    store.lookup(320193, 'Revenues', start='2019-01-01', end='2022-12-31')
+    store.aggregate('Revenues', by='end', how='sum', latest=True)
+
+The indexes are rebuilt by the first query after an add, so facts are best added in
+batches before querying.
+"""
+
+import numpy
+import pandas
+from tidyxbrl.edgar_query import TIDY_COLUMNS
+from tidyxbrl.instrumentation import instrumented
+
+# Labels interned into int32 codes; -1 is a missing label
+FACT_STORE_LABELS = ["taxonomy", "concept", "unit", "accn", "fp", "form", "frame"]
+
+FACT_STORE_AGGREGATIONS = ["sum", "mean", "min", "max", "count", "last"]
+
+FACT_STORE_GROUPS = ["cik", "end", "fy", "fp", "form", "unit", "accn", "frame"]
+
+_ENTITY_BITS = 24
+_CONCEPT_BITS = 22
+_DAY_BITS = 17
+# Period end days are counted from 1900-01-01, so that the 17 bits reach 2258; 0 is no date
+_DAY_OFFSET = 25567
+_MAX_DAY = (1 << _DAY_BITS) - 1
+# Missing dates are held as the smallest int32
+_NO_DATE = numpy.iinfo(numpy.int32).min
+
+
+class FactStore:
+    """
+    The FactStore class holds tidy facts of many companies in memory, indexed by
+    (cik, concept, period end) and by (concept, period end, cik).
+
+    Every query method returns the rows of TIDY_COLUMNS (cik, taxonomy, concept, unit,
+    start, end, val, accn, fy, fp, form, filed, frame). Concepts are matched by name in
+    every taxonomy, unless taxonomy is given.
+
+    Attributes:
+        ciks (numpy.ndarray): CIK of every entity code.
+
+    Examples:
+        store = FactStore()
+        store.add(edgar_query('0000320193', 'companyfacts', tidy=True))
+        store.add(xbrl_parse('aapl-20201226_htm.xml'), accn='0000320193-21-000010', taxonomy='us-gaap')
+        store.lookup(320193, 'Revenues')
+        store.scan(concepts=['Revenues'], start='2020-01-01', end='2020-12-31')
+        store.aggregate('Revenues', by='cik', how='last')
+    """
+
+    def __init__(self):
+        self.ciks = numpy.zeros(0, dtype=numpy.int64)
+        self._entities = {}
+        self._labels = {name: [] for name in FACT_STORE_LABELS}
+        self._codes = {name: {} for name in FACT_STORE_LABELS}
+        self._dtypes = {}
+        self._columns = _empty_columns()
+        self._pending = []
+        self._key = numpy.zeros(0, dtype=numpy.int64)
+        self._conceptkey = numpy.zeros(0, dtype=numpy.int64)
+        self._conceptorder = numpy.zeros(0, dtype=numpy.int64)
+
+    @instrumented
+    def add(self, facts, accn=None, cik=None, taxonomy=None):
+        """
+        Add tidy companyfacts rows, or the numeric facts of one xbrl_parse filing.
+
+        Args:
+            facts (pandas.DataFrame): edgar_query(..., tidy=True) or edgar_bulk_read output
+            with the TIDY_COLUMNS, or xbrl_parse output.
+            accn (str, optional): Accession number of an xbrl_parse filing.
+            cik (int, optional): CIK of an xbrl_parse filing. Defaults to the identifier
+            column.
+            taxonomy (str, optional): Taxonomy of an xbrl_parse filing, whose datacode is
+            the element name without its prefix.
+
+        Returns:
+            int: Number of facts added. The facts of a filing with a segment or dimension
+            members (dimensional facts) and its text facts are left out.
+
+        Raises:
+            ValueError: If facts holds neither the tidy nor the xbrl_parse columns.
+        """
+
+        if "datacode" in facts.columns:
+            facts = _fact_store_filing(facts, accn, cik, taxonomy)
+        missing = [name for name in ["cik", "concept", "end", "val"] if name not in facts.columns]
+        if missing:
+            raise ValueError("facts must hold the columns: " + str(missing))
+        if not len(facts):
+            return 0
+
+        chunk = {}
+        chunk["entity"] = self._intern_entities(facts["cik"])
+        for name in FACT_STORE_LABELS:
+            chunk[name] = self._intern(name, facts[name]) if name in facts.columns else numpy.full(len(facts), -1, numpy.int32)
+        for name in ["start", "end", "filed"]:
+            chunk[name] = _fact_store_days(facts[name]) if name in facts.columns else numpy.full(len(facts), _NO_DATE, numpy.int32)
+        chunk["val"] = pandas.to_numeric(facts["val"], errors="coerce").to_numpy(dtype=numpy.float64, na_value=numpy.nan)
+        if "fy" in facts.columns:
+            chunk["fy"] = pandas.to_numeric(facts["fy"], errors="coerce").fillna(-1).to_numpy(dtype=numpy.int16)
+        else:
+            chunk["fy"] = numpy.full(len(facts), -1, numpy.int16)
+        if (chunk["concept"] < 0).any():
+            raise ValueError("facts must have a concept on every row")
+        self._pending.append(chunk)
+        return len(facts)
+
+    def lookup(self, cik, concept, end=None, start=None, unit=None, taxonomy=None, latest=False, columns=None):
+        """
+        Return the facts of one company & concept, optionally for a range of period ends.
+
+        Args:
+            cik (int): CIK of the company.
+            concept (str): Concept name (i.e. 'Revenues').
+            end (str, optional): Last period end, inclusive (YYYY-MM-DD). With start None,
+            only the facts ending on end are returned.
+            start (str, optional): First period end, inclusive. Defaults to end, or to every
+            period end when end is None too.
+            unit (str, optional): Unit to keep (i.e. 'USD').
+            taxonomy (str, optional): Taxonomy to keep (i.e. 'us-gaap').
+            latest (bool, optional): If True, keep only the most recently filed fact of
+            every (cik, concept, unit, start, end) period. Defaults to False, every filing
+            of a period is returned.
+            columns (list, optional): Columns to return. Defaults to the TIDY_COLUMNS.
+
+        Returns:
+            pandas.DataFrame: The matching facts, ordered by period end.
+        """
+
+        if end is not None and start is None:
+            start = end
+        return self._frame(self._select([cik], [concept], start, end, unit, taxonomy, latest), columns)
+
+    def scan(self, ciks=None, concepts=None, start=None, end=None, unit=None, taxonomy=None, latest=False, columns=None):
+        """
+        Return the facts of many companies and/or concepts over a range of period ends.
+
+        Args:
+            ciks (list, optional): CIKs to keep. Defaults to every company.
+            concepts (list, optional): Concepts to keep. Defaults to every concept.
+            start, end (str, optional): Inclusive bounds of the period end (YYYY-MM-DD).
+            unit, taxonomy, latest & columns are applied as in lookup.
+
+        Returns:
+            pandas.DataFrame: The matching facts. With ciks, grouped by company & concept;
+            with concepts only, grouped by concept & period end.
+        """
+
+        return self._frame(self._select(ciks, concepts, start, end, unit, taxonomy, latest), columns)
+
+    def aggregate(self, concept, by="cik", how="sum", ciks=None, start=None, end=None, unit=None, taxonomy=None, latest=True):
+        """
+        Aggregate the values of one concept by a column.
+
+        Args:
+            concept (str): Concept name (i.e. 'Revenues').
+            by (str, optional): Column to group by, one of FACT_STORE_GROUPS. Defaults to
+            'cik'.
+            how (str, optional): One of FACT_STORE_AGGREGATIONS. 'last' is the value of the
+            most recently filed fact of every group. Defaults to 'sum'.
+            ciks, start, end, unit & taxonomy select the facts as in scan.
+            latest (bool, optional): If True, the default, every period counts once, with
+            its most recently filed value, rather than once per filing reporting it.
+
+        Returns:
+            pandas.Series: One value per group, named after concept & indexed by by. Facts
+            without a value or a group are left out.
+
+        Raises:
+            ValueError: If by or how is not supported.
+        """
+
+        if by not in FACT_STORE_GROUPS:
+            raise ValueError("by must be in: " + str(FACT_STORE_GROUPS))
+        if how not in FACT_STORE_AGGREGATIONS:
+            raise ValueError("how must be in: " + str(FACT_STORE_AGGREGATIONS))
+
+        positions = self._select(ciks, [concept], start, end, unit, taxonomy, latest)
+        columns = self._columns
+        groupcolumn = "entity" if by == "cik" else by
+        groups = columns[groupcolumn][positions]
+        values = columns["val"][positions]
+        present = ~numpy.isnan(values) & (groups != (_NO_DATE if by == "end" else -1))
+        positions, groups, values = positions[present], groups[present], values[present]
+
+        groupcodes, inverse = numpy.unique(groups, return_inverse=True)
+        if how == "sum":
+            result = numpy.bincount(inverse, weights=values, minlength=len(groupcodes))
+        elif how == "count":
+            result = numpy.bincount(inverse, minlength=len(groupcodes))
+        elif how == "mean":
+            result = numpy.bincount(inverse, weights=values, minlength=len(groupcodes)) / numpy.bincount(inverse, minlength=len(groupcodes))
+        else:
+            # Sorted by group, then by filing date so that the last row of a group is its latest
+            order = numpy.lexsort((columns["filed"][positions], inverse))
+            bounds = numpy.flatnonzero(numpy.diff(inverse[order], prepend=-1))
+            if how == "min":
+                result = numpy.minimum.reduceat(values[order], bounds) if len(order) else values[:0]
+            elif how == "max":
+                result = numpy.maximum.reduceat(values[order], bounds) if len(order) else values[:0]
+            elif len(order):
+                ends = numpy.append(bounds[1:], len(order)) - 1
+                result = values[order][ends]
+            else:
+                result = values[:0]
+
+        return pandas.Series(result, index=pandas.Index(self._group_labels(by, groupcodes), name=by), name=concept)
+
+    def to_frame(self):
+        """
+        Return every fact, ordered by company, concept & period end.
+        """
+
+        self._consolidate()
+        return self._frame(numpy.arange(len(self._key)))
+
+    def _select(self, ciks, concepts, start, end, unit, taxonomy, latest):
+        """
+        Return the positions of the matching facts, read from the sorted keys.
+        """
+
+        self._consolidate()
+        firstday = _fact_store_day(start) if start is not None else 0
+        lastday = _fact_store_day(end) if end is not None else _MAX_DAY
+        columns = self._columns
+
+        if ciks is not None:
+            entities = [self._entities[int(cik)] for cik in ciks if int(cik) in self._entities]
+            if concepts is not None:
+                conceptcodes = self._concept_codes(concepts)
+                bases = [
+                    (entity << (_CONCEPT_BITS + _DAY_BITS)) | (conceptcode << _DAY_BITS)
+                    for entity in entities for conceptcode in conceptcodes
+                ]
+                positions = _key_ranges(self._key, bases, firstday, lastday)
+            else:
+                bases = [entity << (_CONCEPT_BITS + _DAY_BITS) for entity in entities]
+                positions = _key_ranges(self._key, bases, 0, (1 << (_CONCEPT_BITS + _DAY_BITS)) - 1)
+                positions = positions[_day_mask(columns["end"][positions], start, end)]
+        elif concepts is not None:
+            bases = [conceptcode << (_DAY_BITS + _ENTITY_BITS) for conceptcode in self._concept_codes(concepts)]
+            positions = _key_ranges(
+                self._conceptkey, bases, firstday << _ENTITY_BITS, (lastday << _ENTITY_BITS) | ((1 << _ENTITY_BITS) - 1)
+            )
+            positions = self._conceptorder[positions]
+        else:
+            positions = numpy.flatnonzero(_day_mask(columns["end"], start, end))
+
+        if unit is not None:
+            positions = positions[columns["unit"][positions] == self._codes["unit"].get(unit, -2)]
+        if taxonomy is not None:
+            positions = positions[columns["taxonomy"][positions] == self._codes["taxonomy"].get(taxonomy, -2)]
+        if latest:
+            positions = self._latest(positions)
+        return positions
+
+    def _latest(self, positions):
+        """
+        Keep the most recently filed of the positions of every (entity, concept, unit,
+        start, end) period, in their original order. Equal filing dates keep the fact
+        added last.
+        """
+
+        if len(positions) < 2:
+            return positions
+        columns = self._columns
+        periods = [columns[name][positions] for name in ["end", "start", "unit", "concept", "entity"]]
+        order = numpy.lexsort([positions, columns["filed"][positions]] + periods)
+        sortedperiods = [period[order] for period in periods]
+        # The last row of every run of equal periods is its latest filing
+        lastofrun = numpy.ones(len(order), dtype=bool)
+        for period in sortedperiods:
+            lastofrun[:-1] &= period[1:] == period[:-1]
+        lastofrun = ~lastofrun
+        lastofrun[-1] = True
+        return numpy.sort(positions[order[lastofrun]])
+
+    def _frame(self, positions, columns=None):
+        """
+        Build the DataFrame of the facts at positions, with the TIDY_COLUMNS or columns.
+        """
+
+        stored = self._columns
+        outputframe = {}
+        for name in columns or TIDY_COLUMNS:
+            if name == "cik":
+                outputframe[name] = self.ciks[stored["entity"][positions]]
+            elif name in FACT_STORE_LABELS:
+                outputframe[name] = pandas.Categorical.from_codes(stored[name][positions], dtype=self._dtype(name))
+            elif name in ["start", "end", "filed"]:
+                outputframe[name] = _fact_store_dates(stored[name][positions])
+            elif name == "fy":
+                fy = stored["fy"][positions]
+                outputframe[name] = pandas.arrays.IntegerArray(fy, fy < 0)
+            elif name == "val":
+                outputframe[name] = stored["val"][positions]
+            else:
+                raise ValueError("columns must be in: " + str(TIDY_COLUMNS))
+        return pandas.DataFrame(outputframe, copy=False)
+
+    def _dtype(self, name):
+        """
+        Return the categorical dtype of a label column, shared by every query until new
+        labels are added, so that query results concatenate as categoricals.
+        """
+
+        dtype = self._dtypes.get(name)
+        if dtype is None or len(dtype.categories) != len(self._labels[name]):
+            dtype = self._dtypes[name] = pandas.CategoricalDtype(self._labels[name])
+        return dtype
+
+    def _group_labels(self, by, groupcodes):
+        """
+        Return the labels of the aggregate groups.
+        """
+
+        if by == "cik":
+            return self.ciks[groupcodes]
+        if by == "end":
+            return _fact_store_dates(groupcodes)
+        if by == "fy":
+            return groupcodes.astype(numpy.int64)
+        return self._dtype(by).categories[groupcodes]
+
+    def _concept_codes(self, concepts):
+        conceptcodes = self._codes["concept"]
+        return [conceptcodes[concept] for concept in dict.fromkeys(concepts) if concept in conceptcodes]
+
+    def _intern(self, name, values):
+        """
+        Return the int32 codes of the labels in values, adding the new labels.
+        """
+
+        codes, uniques = pandas.factorize(values)
+        lookup = self._codes[name]
+        labels = self._labels[name]
+        mapping = numpy.empty(len(uniques), dtype=numpy.int32)
+        for position, label in enumerate(uniques):
+            label = str(label)
+            code = lookup.get(label)
+            if code is None:
+                code = lookup[label] = len(labels)
+                labels.append(label)
+            mapping[position] = code
+        if len(labels) >= 1 << 31:
+            raise ValueError(name + " holds too many distinct labels")
+        if not len(uniques):
+            # Every value is missing
+            return numpy.full(len(codes), -1, dtype=numpy.int32)
+        return numpy.where(codes >= 0, mapping[numpy.maximum(codes, 0)], -1).astype(numpy.int32)
+
+    def _intern_entities(self, values):
+        """
+        Return the entity codes of the CIKs in values, adding the new CIKs.
+        """
+
+        ciks = pandas.to_numeric(values, errors="coerce").fillna(0).to_numpy(dtype=numpy.int64)
+        uniques, inverse = numpy.unique(ciks, return_inverse=True)
+        mapping = numpy.empty(len(uniques), dtype=numpy.int32)
+        newciks = []
+        for position, cik in enumerate(uniques.tolist()):
+            code = self._entities.get(cik)
+            if code is None:
+                code = self._entities[cik] = len(self._entities)
+                newciks.append(cik)
+            mapping[position] = code
+        if len(self._entities) > 1 << _ENTITY_BITS:
+            raise ValueError("FactStore holds at most " + str(1 << _ENTITY_BITS) + " companies")
+        if newciks:
+            self.ciks = numpy.concatenate([self.ciks, numpy.array(newciks, dtype=numpy.int64)])
+        return mapping[inverse]
+
+    def _consolidate(self):
+        """
+        Merge the facts added since the last query & rebuild both sorted keys.
+        """
+
+        if not self._pending:
+            return
+        if len(self._codes["concept"]) > 1 << _CONCEPT_BITS:
+            raise ValueError("FactStore holds at most " + str(1 << _CONCEPT_BITS) + " concepts")
+        columns = {
+            name: numpy.concatenate([self._columns[name]] + [chunk[name] for chunk in self._pending])
+            for name in self._columns
+        }
+        self._pending = []
+
+        entity = columns["entity"].astype(numpy.int64)
+        concept = columns["concept"].astype(numpy.int64)
+        day = _key_days(columns["end"])
+        key = (entity << (_CONCEPT_BITS + _DAY_BITS)) | (concept << _DAY_BITS) | day
+        order = numpy.argsort(key, kind="stable")
+        self._columns = {name: column[order] for name, column in columns.items()}
+        self._key = key[order]
+
+        conceptkey = (concept[order] << (_DAY_BITS + _ENTITY_BITS)) | (day[order] << _ENTITY_BITS) | entity[order]
+        self._conceptorder = numpy.argsort(conceptkey, kind="stable")
+        self._conceptkey = conceptkey[self._conceptorder]
+
+    def __len__(self):
+        return len(self._key) + sum(len(chunk["val"]) for chunk in self._pending)
+
+    def __repr__(self):
+        return f"<FactStore {len(self)} facts: {len(self._entities)} companies, {len(self._labels['concept'])} concepts>"
+
+
+def _empty_columns():
+    """
+    Return the empty column arrays of a FactStore.
+    """
+
+    columns = {"entity": numpy.zeros(0, dtype=numpy.int32)}
+    for name in FACT_STORE_LABELS:
+        columns[name] = numpy.zeros(0, dtype=numpy.int32)
+    for name in ["start", "end", "filed"]:
+        columns[name] = numpy.zeros(0, dtype=numpy.int32)
+    columns["val"] = numpy.zeros(0, dtype=numpy.float64)
+    columns["fy"] = numpy.zeros(0, dtype=numpy.int16)
+    return columns
+
+
+def _fact_store_filing(filing, accn, cik, taxonomy):
+    """
+    Turn the numeric, non dimensional facts of an xbrl_parse frame into tidy rows.
+    """
+
+    if cik is None:
+        identifiers = pandas.to_numeric(filing.get("identifier"), errors="coerce") if "identifier" in filing.columns else None
+        cik = identifiers.dropna().iloc[0] if identifiers is not None and identifiers.notna().any() else 0
+    values = pandas.to_numeric(filing["datavalue"], errors="coerce")
+    keep = values.notna()
+    if "segment" in filing.columns:
+        keep &= filing["segment"].isna()
+    elif "dimensions" in filing.attrs:
+        # xbrl_parse(..., dimensions=True) keeps the members in a side table
+        from tidyxbrl.xbrl_parse import xbrl_dimension_filter
+        keep &= filing.index.isin(xbrl_dimension_filter(filing).index)
+    filing = filing[keep]
+    enddates = filing["endDate"] if "endDate" in filing.columns else pandas.Series(None, index=filing.index)
+    if "instant" in filing.columns:
+        enddates = enddates.where(enddates.notna(), filing["instant"])
+    return pandas.DataFrame(
+        {
+            "cik": int(cik),
+            "taxonomy": taxonomy,
+            "concept": filing["datacode"].astype(str),
+            "unit": filing["unitRef"] if "unitRef" in filing.columns else None,
+            "start": filing["startDate"] if "startDate" in filing.columns else None,
+            "end": enddates,
+            "val": values[keep],
+            "accn": accn,
+        },
+        index=filing.index,
+    )
+
+
+def _fact_store_days(values):
+    """
+    Return dates as int32 days since 1970-01-01, with _NO_DATE for missing dates.
+    """
+
+    if pandas.api.types.is_datetime64_dtype(values):
+        # datetime64[ns] columns are read as integers, without a date conversion
+        nanoseconds = numpy.asarray(values, dtype="datetime64[ns]").view(numpy.int64)
+        days = (nanoseconds // 86400000000000).astype(numpy.int32)
+        days[nanoseconds == numpy.iinfo(numpy.int64).min] = _NO_DATE
+        return days
+    dates = pandas.to_datetime(values, errors="coerce")
+    dates = numpy.asarray(dates, dtype="datetime64[D]")
+    days = dates.astype(numpy.int64)
+    days[numpy.isnat(dates)] = _NO_DATE
+    return days.astype(numpy.int32)
+
+
+def _fact_store_day(value):
+    """
+    Return the key day of one date bound.
+    """
+
+    day = (pandas.Timestamp(value).normalize() - pandas.Timestamp("1970-01-01")).days
+    return int(min(max(day + _DAY_OFFSET, 1), _MAX_DAY))
+
+
+def _fact_store_dates(days):
+    """
+    Return int32 days since 1970-01-01 as datetime64[ns], NaT for _NO_DATE.
+    """
+
+    dates = days.astype("datetime64[D]")
+    dates[days == _NO_DATE] = numpy.datetime64("NaT")
+    return dates.astype("datetime64[ns]")
+
+
+def _key_days(days):
+    """
+    Return the 17 bit key day of every period end; 0 for a missing date.
+    """
+
+    keydays = numpy.clip(days.astype(numpy.int64) + _DAY_OFFSET, 1, _MAX_DAY)
+    keydays[days == _NO_DATE] = 0
+    return keydays
+
+
+def _key_ranges(key, bases, first, last):
+    """
+    Return the positions of key between base | first & base | last, for every base.
+    """
+
+    if not bases:
+        return numpy.zeros(0, dtype=numpy.int64)
+    bases = numpy.array(bases, dtype=numpy.int64)
+    lows = numpy.searchsorted(key, bases | first, side="left")
+    highs = numpy.searchsorted(key, bases | last, side="right")
+    if len(bases) == 1:
+        return numpy.arange(lows[0], highs[0])
+    return numpy.concatenate([numpy.arange(low, high) for low, high in zip(lows, highs)])
+
+
+def _day_mask(days, start, end):
+    """
+    Return the mask of the days between the inclusive start & end dates.
+    """
+
+    mask = numpy.ones(len(days), dtype=bool)
+    if start is not None:
+        mask &= (days != _NO_DATE) & (days >= _fact_store_day(start) - _DAY_OFFSET)
+    if end is not None:
+        mask &= (days != _NO_DATE) & (days <= _fact_store_day(end) - _DAY_OFFSET)
+    return mask
+
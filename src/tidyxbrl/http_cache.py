@@ -0,0 +1,536 @@
+"""
+Persistent HTTP response cache shared by the SEC EDGAR & XBRL fetchers.
+
+Filed documents under https://www.sec.gov/Archives/ never change once accepted, and the
+data.sec.gov JSON APIs change at most a few times a day. ResponseCache keeps successful
+responses in a SQLite database or a directory of files, serves them again while they are
+fresh, and revalidates stale entries with their ETag / Last-Modified validators so that an
+unchanged document is answered with a 304 instead of a full download.
+
+Every fetcher in the package accepts a cache argument, and set_default_cache installs a
+cache used by every call that does not pass one:
+
+    tidyxbrl.set_default_cache(tidyxbrl.ResponseCache())
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import requests
+from tidyxbrl.http_client import client_send
+from tidyxbrl.instrumentation import instrument_count, instrumented_asend
+
+# Seconds that a response stays fresh, by url prefix. The longest matching prefix wins;
+# None means that the response never expires.
+DEFAULT_CACHE_TTL = {
+    "https://www.sec.gov/Archives/": None,
+    "https://data.sec.gov/submissions/": 600,
+    "https://data.sec.gov/api/xbrl/": 86400,
+    "https://www.sec.gov/cgi-bin/browse-edgar": 86400,
+    "https://api.xbrl.us/": 3600,
+    "": 3600,
+}
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "tidyxbrl")
+
+_default_cache = None
+
+
+class CachedResponse:
+    """
+    Response served from a ResponseCache. Exposes the parts of a requests / httpx response
+    used by the fetchers: status_code, headers, content, text & json().
+    """
+
+    from_cache = True
+
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        encoding = "utf-8"
+        contenttype = self.headers.get("content-type", "")
+        if "charset=" in contenttype:
+            encoding = contenttype.split("charset=")[-1].split(";")[0].strip()
+        return self.content.decode(encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def __repr__(self):
+        return f"<CachedResponse [{self.status_code}] {self.url}>"
+
+
+class SQLiteCacheBackend:
+    """
+    Store cached responses as rows of a single SQLite database file.
+
+    Args:
+        path (str, optional): Database file. Defaults to ~/.cache/tidyxbrl/http_cache.sqlite.
+        max_bytes (int, optional): Total size of the stored bodies after which the least
+        recently used entries are evicted. Defaults to 2 GiB.
+
+    The total size is summed once when the database is opened and kept up to date by set,
+    evict & clear, so that evict only reads the table once the cache is over max_bytes.
+    """
+
+    def __init__(self, path=None, max_bytes=2 * 1024 ** 3):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIRECTORY, "http_cache.sqlite")
+        self.max_bytes = max_bytes
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, url TEXT, status_code INTEGER, headers TEXT,"
+                " content BLOB, size INTEGER, stored_at REAL, accessed_at REAL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+            )
+            self.size = self._measure()
+
+    def _measure(self):
+        return self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT url, status_code, headers, content, stored_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                )
+        return {
+            "url": row[0],
+            "status_code": row[1],
+            "headers": json.loads(row[2]),
+            "content": bytes(row[3]),
+            "stored_at": row[4],
+        }
+
+    def set(self, key, entry):
+        with self._lock, self._connection:
+            previous = self._connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.size += len(entry["content"]) - (previous[0] if previous else 0)
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    entry["url"],
+                    entry["status_code"],
+                    json.dumps(entry["headers"]),
+                    sqlite3.Binary(entry["content"]),
+                    len(entry["content"]),
+                    entry["stored_at"],
+                    time.time(),
+                ),
+            )
+
+    def touch(self, key, stored_at):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (stored_at, time.time(), key),
+            )
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits in max_bytes and
+        return the number of entries removed.
+        """
+
+        with self._lock, self._connection:
+            if self.size <= self.max_bytes:
+                return 0
+            # Measure again, as other processes may share the database
+            totalsize = self._measure()
+            evicted = []
+            for key, size in self._connection.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at"
+            ).fetchall():
+                if totalsize <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                totalsize -= size
+            self._connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+            self.size = totalsize
+        return len(evicted)
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+            self.size = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class FileCacheBackend:
+    """
+    Store cached responses as a body file & a JSON metadata file per entry in a directory.
+
+    The modification time of the body file records the last access, so that the least
+    recently used entries are evicted first once the bodies exceed max_bytes.
+
+    Args:
+        directory (str, optional): Cache directory. Defaults to ~/.cache/tidyxbrl/http_cache.
+        max_bytes (int, optional): Total size of the stored bodies after which the least
+        recently used entries are evicted. Defaults to 2 GiB.
+
+    The total size is measured once when the backend is created and kept up to date by
+    set, evict & clear, so that evict only scans the directory once the cache is over
+    max_bytes.
+    """
+
+    def __init__(self, directory=None, max_bytes=2 * 1024 ** 3):
+        self.directory = directory or os.path.join(DEFAULT_CACHE_DIRECTORY, "http_cache")
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.size = sum(size for _, size, _ in self._bodies())
+
+    def _bodies(self):
+        """
+        Return the (last access, size, key) of every stored body.
+        """
+
+        bodies = []
+        for direntry in os.scandir(self.directory):
+            if direntry.name.endswith(".body"):
+                stat = direntry.stat()
+                bodies.append((stat.st_mtime, stat.st_size, direntry.name[: -len(".body")]))
+        return bodies
+
+    def _paths(self, key):
+        return (
+            os.path.join(self.directory, key + ".body"),
+            os.path.join(self.directory, key + ".json"),
+        )
+
+    def get(self, key):
+        bodypath, metapath = self._paths(key)
+        try:
+            with open(metapath, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+            with open(bodypath, "rb") as file:
+                entry["content"] = file.read()
+            os.utime(bodypath)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def set(self, key, entry):
+        bodypath, metapath = self._paths(key)
+        metadata = {k: v for k, v in entry.items() if k != "content"}
+        try:
+            previoussize = os.path.getsize(bodypath)
+        except OSError:
+            previoussize = 0
+        # Write to temporary files first so that readers never see a partial entry
+        for path, mode, payload in [
+            (bodypath, "wb", entry["content"]),
+            (metapath, "w", json.dumps(metadata)),
+        ]:
+            temppath = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temppath, mode) as file:
+                file.write(payload)
+            os.replace(temppath, path)
+        with self._lock:
+            self.size += len(entry["content"]) - previoussize
+
+    def touch(self, key, stored_at):
+        entry = self.get(key)
+        if entry is not None:
+            entry["stored_at"] = stored_at
+            self.set(key, entry)
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits in max_bytes and
+        return the number of entries removed.
+        """
+
+        with self._lock:
+            if self.size <= self.max_bytes:
+                return 0
+            # Measure again, as other processes may share the directory
+            bodies = self._bodies()
+            totalsize = sum(size for _, size, _ in bodies)
+            evicted = 0
+            for _, size, key in sorted(bodies):
+                if totalsize <= self.max_bytes:
+                    break
+                for path in self._paths(key):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                totalsize -= size
+                evicted += 1
+            self.size = totalsize
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            for direntry in os.scandir(self.directory):
+                if direntry.name.endswith((".body", ".json")):
+                    os.remove(direntry.path)
+            self.size = 0
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(".body"))
+
+
+class ResponseCache:
+    """
+    The ResponseCache class serves repeated SEC EDGAR & XBRL requests from a persistent
+    backend.
+
+    Args:
+        backend (optional): SQLiteCacheBackend, FileCacheBackend or any object with the same
+        get / set / touch / evict / clear methods. Defaults to SQLiteCacheBackend().
+        ttl (dict, optional): Seconds that a response stays fresh by url prefix, merged over
+        DEFAULT_CACHE_TTL. None never expires, 0 revalidates on every request.
+
+    Attributes:
+        stats (dict): Counters of the cache activity.
+            - hits: Requests answered from a fresh entry.
+            - revalidated: Stale entries confirmed unchanged by a 304 response.
+            - misses: Requests sent to the server without a usable entry.
+            - stored: Responses written to the backend.
+            - evicted: Entries removed to stay within the backend max_bytes.
+
+    Examples:
+        cache = ResponseCache(FileCacheBackend('/tmp/sec_cache', max_bytes=500 * 1024 ** 2))
+        edgar_query('0000789019', query_type='companyfacts', cache=cache)
+        cache.stats
+    """
+
+    def __init__(self, backend=None, ttl=None):
+        self.backend = backend if backend is not None else SQLiteCacheBackend()
+        self.ttl = {**DEFAULT_CACHE_TTL, **(ttl or {})}
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, statname, count=1):
+        with self._lock:
+            self.stats[statname] += count
+
+    def ttl_for(self, url):
+        """
+        Return the freshness lifetime in seconds of url (None never expires).
+        """
+
+        prefix = max((p for p in self.ttl if url.startswith(p)), key=len)
+        return self.ttl[prefix]
+
+    @staticmethod
+    def key_for(method, url, data=None):
+        """
+        Return the cache key of a request: a hash of the method, url & form data.
+        """
+
+        keysource = json.dumps([method.upper(), url, sorted((data or {}).items())], default=str)
+        return hashlib.sha256(keysource.encode("utf-8")).hexdigest()
+
+    def request(self, method, url, headers=None, data=None, timeout_sec=15, send=None):
+        """
+        Send a request through the cache.
+
+        Args:
+            method (str): HTTP method, i.e. "GET" or "POST".
+            url (str): Request url.
+            headers (dict, optional): Request headers.
+            data (dict, optional): Form data of a POST request.
+            timeout_sec: The time in seconds to wait for the server to respond
+            send (callable, optional): Transport called as
+            send(method, url, headers=, data=, timeout=). Defaults to requests.request.
+
+        Returns:
+            The transport response, or a CachedResponse when served from the cache.
+        """
+
+        key, entry, requestheaders = self._lookup(method, url, headers, data)
+        if requestheaders is None:
+            return CachedResponse(entry["url"], entry["status_code"], entry["headers"], entry["content"])
+        response = (send or requests.request)(method, url, headers=requestheaders, data=data, timeout=timeout_sec)
+        return self._complete(key, url, entry, response)
+
+    async def arequest(self, method, url, send, headers=None, data=None, timeout_sec=15):
+        """
+        Send a request through the cache with an asynchronous transport.
+
+        Args:
+            method (str): HTTP method, i.e. "GET" or "POST".
+            url (str): Request url.
+            send (callable): Coroutine function called as
+            send(method, url, headers=, data=, timeout=), i.e. AsyncHttpClient.request.
+            headers (dict, optional): Request headers.
+            data (dict, optional): Form data of a POST request.
+            timeout_sec: The time in seconds to wait for the server to respond
+
+        Returns:
+            The transport response, or a CachedResponse when served from the cache.
+        """
+
+        # The backend reads & writes (and evictions) block, so they run on a worker thread
+        key, entry, requestheaders = await asyncio.to_thread(self._lookup, method, url, headers, data)
+        if requestheaders is None:
+            return CachedResponse(entry["url"], entry["status_code"], entry["headers"], entry["content"])
+        response = await send(method, url, headers=requestheaders, data=data, timeout=timeout_sec)
+        return await asyncio.to_thread(self._complete, key, url, entry, response)
+
+    def _lookup(self, method, url, headers, data):
+        """
+        Find the stored entry of a request. Returns (key, entry, requestheaders), where
+        requestheaders is None for a fresh entry, and otherwise holds the headers to send
+        along with the validators of a stale entry.
+        """
+
+        key = self.key_for(method, url, data)
+        entry = self.backend.get(key)
+        requestheaders = dict(headers or {})
+        if entry is not None:
+            ttl = self.ttl_for(url)
+            if ttl is None or time.time() - entry["stored_at"] < ttl:
+                self._count("hits")
+                instrument_count(cache_hits=1)
+                return key, entry, None
+            if entry["headers"].get("etag"):
+                requestheaders["If-None-Match"] = entry["headers"]["etag"]
+            if entry["headers"].get("last-modified"):
+                requestheaders["If-Modified-Since"] = entry["headers"]["last-modified"]
+        return key, entry, requestheaders
+
+    def _complete(self, key, url, entry, response):
+        """
+        Store a successful response, or refresh the stale entry confirmed by a 304.
+        """
+
+        if entry is not None and response.status_code == 304:
+            self._count("revalidated")
+            instrument_count(cache_hits=1)
+            self.backend.touch(key, time.time())
+            return CachedResponse(entry["url"], entry["status_code"], entry["headers"], entry["content"])
+
+        self._count("misses")
+        if response.status_code == 200:
+            self.backend.set(
+                key,
+                {
+                    "url": url,
+                    "status_code": response.status_code,
+                    "headers": {
+                        name: response.headers[name]
+                        for name in ("content-type", "etag", "last-modified")
+                        if name in response.headers
+                    },
+                    "content": response.content,
+                    "stored_at": time.time(),
+                },
+            )
+            self._count("stored")
+            self._count("evicted", self.backend.evict())
+        return response
+
+    def clear(self):
+        """
+        Remove every stored response and reset the statistics.
+        """
+
+        self.backend.clear()
+        with self._lock:
+            self.stats = dict.fromkeys(self.stats, 0)
+
+    def __repr__(self):
+        return f"<ResponseCache {type(self.backend).__name__} {self.stats}>"
+
+
+def set_default_cache(cache):
+    """
+    The set_default_cache function installs the ResponseCache used by every fetcher that
+    is called without a cache argument. Pass None to disable caching again.
+
+    Args:
+        cache (ResponseCache): Cache shared by the fetchers, or None.
+
+    Returns:
+        ResponseCache: The previous default cache.
+
+    Examples:
+        set_default_cache(ResponseCache(SQLiteCacheBackend('sec_cache.sqlite')))
+    """
+
+    global _default_cache
+    previouscache, _default_cache = _default_cache, cache
+    return previouscache
+
+
+async def acached_request(method, url, send, headers=None, data=None, timeout_sec=15, cache=None):
+    """
+    Asynchronous counterpart of cached_request: send a request through cache, or through
+    the default cache when cache is None, with the coroutine function send.
+
+    Args:
+        method (str): HTTP method, i.e. "GET" or "POST".
+        url (str): Request url.
+        send (callable): Coroutine function called as
+        send(method, url, headers=, data=, timeout=), i.e. AsyncHttpClient.request.
+        headers (dict, optional): Request headers.
+        data (dict, optional): Form data of a POST request.
+        timeout_sec: The time in seconds to wait for the server to respond
+        cache (ResponseCache, optional): Cache to use. Defaults to the default cache.
+
+    Returns:
+        The transport response, or a CachedResponse when served from the cache.
+    """
+
+    send = instrumented_asend(send)
+    cache = cache if cache is not None else _default_cache
+    if cache is None:
+        return await send(method, url, headers=headers, data=data, timeout=timeout_sec)
+    return await cache.arequest(method, url, send, headers=headers, data=data, timeout_sec=timeout_sec)
+
+
+def cached_request(method, url, headers=None, data=None, timeout_sec=15, cache=None, send=None, client=None):
+    """
+    Send a request through cache, or through the default cache when cache is None. Without
+    any cache the request goes straight to the transport.
+
+    Args:
+        method (str): HTTP method, i.e. "GET" or "POST".
+        url (str): Request url.
+        headers (dict, optional): Request headers.
+        data (dict, optional): Form data of a POST request.
+        timeout_sec: The time in seconds to wait for the server to respond
+        cache (ResponseCache, optional): Cache to use. Defaults to the default cache.
+        send (callable, optional): Transport called as
+        send(method, url, headers=, data=, timeout=). Defaults to requests.request.
+        client (HttpClient, optional): Client sending the request instead of send. Defaults
+        to the client installed with set_default_client.
+
+    Returns:
+        The transport response, or a CachedResponse when served from the cache.
+    """
+
+    send = client_send(client, send)
+    cache = cache if cache is not None else _default_cache
+    if cache is None:
+        return send(method, url, headers=headers, data=data, timeout=timeout_sec)
+    return cache.request(method, url, headers=headers, data=data, timeout_sec=timeout_sec, send=send)
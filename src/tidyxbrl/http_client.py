@@ -0,0 +1,212 @@
+"""
+https://www.sec.gov/os/accessing-edgar-data
+
+Shared HTTP client for the SEC EDGAR & XBRL fetchers.
+
+The SEC limits automated access to 10 requests per second and blocks clients that go
+over it. HttpClient keeps one pooled keep-alive session for every fetcher, spaces the
+requests with a token bucket, and retries throttled (429) or failed (5xx) requests with
+exponential backoff.
+
+Every fetcher in the package accepts a client argument, and set_default_client installs a
+client used by every call that does not pass one:
+
+    tidyxbrl.set_default_client(tidyxbrl.HttpClient(rate_limit=10))
+"""
+
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from tidyxbrl.instrumentation import instrument_count, instrumented_send
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_default_client = None
+
+
+class RateLimiter:
+    """
+    Thread safe token bucket allowing rate requests per second on average, with bursts of
+    up to burst requests.
+
+    Args:
+        rate (float): Requests per second.
+        burst (int, optional): Bucket capacity. Defaults to 1, which spaces the requests
+        evenly: a larger bucket starts full, so its first second lets burst + rate
+        requests through, above a limit such as the 10 per second of the SEC.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take one token and return the seconds to wait before it may be used.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Tokens may go negative: each waiter reserves its own slot in the future
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self):
+        """
+        Block until a request may be sent and return the seconds waited.
+        """
+
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class HttpClient:
+    """
+    The HttpClient class shares a pooled, rate limited & retrying HTTP session between the
+    fetchers.
+
+    Args:
+        rate_limit (float, optional): Maximum requests per second. Defaults to 10, the SEC
+        fair access limit. None disables the limit.
+        max_retries (int, optional): Retries of a request answered with 429 / 5xx or failing
+        to connect. Defaults to 3.
+        backoff_factor (float, optional): Seconds before the first retry, doubled on every
+        further retry. A Retry-After header takes precedence. Defaults to 0.5.
+        pool_maxsize (int, optional): Keep-alive connections kept per host. Defaults to 10.
+        headers (dict, optional): Headers sent with every request, below the per request
+        headers.
+
+    Attributes:
+        stats (dict): Counters of the client activity.
+            - requests: Requests sent, including retries.
+            - retries: Requests that were retried.
+            - throttled_sec: Seconds spent waiting for the rate limit.
+
+    Examples:
+        client = HttpClient(rate_limit=8, max_retries=5)
+        edgar_query('0000789019', query_type='companyfacts', client=client)
+        edgar_frames(urldescriptor='us-gaap/AccountsPayableCurrent/USD/CY2019Q1I', client=client)
+    """
+
+    def __init__(self, rate_limit=10, max_retries=3, backoff_factor=0.5, pool_maxsize=10, headers=None):
+        self.limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self.stats = {"requests": 0, "retries": 0, "throttled_sec": 0.0}
+        self._lock = threading.Lock()
+
+    def _count(self, statname, count=1):
+        with self._lock:
+            self.stats[statname] += count
+
+    def request(self, method, url, headers=None, data=None, timeout=15):
+        """
+        Send a request through the pooled session, waiting for the rate limit and retrying
+        429 / 5xx responses & connection errors with exponential backoff.
+
+        Args:
+            method (str): HTTP method, i.e. "GET" or "POST".
+            url (str): Request url.
+            headers (dict, optional): Request headers.
+            data (dict, optional): Form data of a POST request.
+            timeout: The time in seconds to wait for the server to respond
+
+        Returns:
+            requests.Response: The final response, which may still be a 429 / 5xx once the
+            retries are exhausted.
+        """
+
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self._count("throttled_sec", self.limiter.acquire())
+            self._count("requests")
+            try:
+                response = self.session.request(method, url, headers=headers, data=data, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+            self._count("retries")
+            instrument_count(retries=1)
+            time.sleep(retry_delay(attempt, self.backoff_factor, response))
+            attempt += 1
+
+    def get(self, url, headers=None, timeout=15):
+        return self.request("GET", url, headers=headers, timeout=timeout)
+
+    def post(self, url, headers=None, data=None, timeout=15):
+        return self.request("POST", url, headers=headers, data=data, timeout=timeout)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return f"<HttpClient {self.stats}>"
+
+
+def retry_delay(attempt, backoff_factor, response=None):
+    """
+    Return the seconds to wait before retry number attempt (from 0): the Retry-After header
+    of response when given in seconds, and otherwise backoff_factor * 2 ** attempt.
+    """
+
+    retryafter = response.headers.get("Retry-After") if response is not None else None
+    if retryafter is not None and retryafter.isdigit():
+        return min(float(retryafter), 60.0)
+    return backoff_factor * 2 ** attempt
+
+
+def set_default_client(client):
+    """
+    The set_default_client function installs the HttpClient used by every fetcher that is
+    called without a client argument. Pass None to go back to one off requests.
+
+    Args:
+        client (HttpClient): Client shared by the fetchers, or None.
+
+    Returns:
+        HttpClient: The previous default client.
+
+    Examples:
+        set_default_client(HttpClient(rate_limit=10))
+    """
+
+    global _default_client
+    previousclient, _default_client = _default_client, client
+    return previousclient
+
+
+def client_send(client=None, send=None):
+    """
+    Return the transport used by the fetchers: the request method of client, or of the
+    default client, falling back to send and finally to requests.request.
+    """
+
+    client = client if client is not None else _default_client
+    if client is not None:
+        return instrumented_send(client.request)
+    return instrumented_send(send or requests.request)
@@ -0,0 +1,406 @@
+"""
+Opt-in timing & activity instrumentation of the tidyxbrl fetch & parse stages.
+
+Every public fetcher & parser, and the main stages inside them (i.e. the engine pass & the
+context join of xbrl_parse), is a named stage. While at least one hook is installed, every
+finished stage is reported to the hooks as a dictionary of:
+
+    - stage: Name of the stage, i.e. 'xbrl_parse' or 'xbrl_parse.join'.
+    - parent: Name of the enclosing stage, or None.
+    - wall_sec & cpu_sec: Wall clock & process CPU seconds of the stage.
+    - rows: Rows of the DataFrame produced, when the stage produces one.
+    - requests, bytes, cache_hits & retries: HTTP activity of the stage & its children.
+    - error: Name of the exception that ended the stage, or None.
+
+Without hooks every stage reduces to a single check of the hook list. Profiler is a hook
+aggregating the stages into a summary report:
+
+    with tidyxbrl.Profiler() as profiler:
+        tidyxbrl.edgar_query('0000320193', 'companyfacts', tidy=True)
+    print(profiler.summary())
+
+Stages started on worker threads or processes (i.e. the pools of edgar_frames_many and
+xbrl_parse_many) are reported without a parent, and their HTTP activity is not added to
+the stage that started the pool.
+"""
+
+import contextvars
+import functools
+import inspect
+import sys
+import threading
+import time
+
+STAGE_METRICS = ["requests", "bytes", "cache_hits", "retries"]
+
+_hooks = []
+_stack = contextvars.ContextVar("tidyxbrl_stages", default=())
+
+
+def add_instrument_hook(callback):
+    """
+    The add_instrument_hook function installs a callback called with the record of every
+    finished stage, which turns the instrumentation on.
+
+    Args:
+        callback (callable): Called as callback(record) from the thread that ran the stage.
+
+    Returns:
+        callable: The callback, so that add_instrument_hook can be used as a decorator.
+
+    Examples:
+        add_instrument_hook(lambda record: print(record['stage'], record['wall_sec']))
+    """
+
+    if callback not in _hooks:
+        _hooks.append(callback)
+    return callback
+
+
+def remove_instrument_hook(callback):
+    """
+    The remove_instrument_hook function uninstalls a callback installed with
+    add_instrument_hook. The instrumentation turns off with the last callback.
+    """
+
+    if callback in _hooks:
+        _hooks.remove(callback)
+
+
+class _Stage:
+    """
+    Context manager timing one stage & collecting the activity of its children.
+    """
+
+    __slots__ = ("record", "_token", "_wall", "_cpu")
+
+    def __init__(self, name):
+        self.record = {
+            "stage": name,
+            "parent": None,
+            "wall_sec": 0.0,
+            "cpu_sec": 0.0,
+            "rows": None,
+            "requests": 0,
+            "bytes": 0,
+            "cache_hits": 0,
+            "retries": 0,
+            "error": None,
+        }
+
+    def __enter__(self):
+        stack = _stack.get()
+        if stack:
+            self.record["parent"] = stack[-1]["stage"]
+        self._token = _stack.set(stack + (self.record,))
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self.record
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.record["wall_sec"] = time.perf_counter() - self._wall
+        self.record["cpu_sec"] = time.process_time() - self._cpu
+        if exc_type is not None:
+            self.record["error"] = exc_type.__name__
+        _stack.reset(self._token)
+        for hook in list(_hooks):
+            hook(self.record)
+        return False
+
+
+class _NullRecord(dict):
+    """
+    Record of a stage that is not instrumented: every write is dropped.
+    """
+
+    def __setitem__(self, key, value):
+        pass
+
+
+class _NullStage:
+    """
+    Shared context manager standing in for _Stage while no hook is installed.
+    """
+
+    record = _NullRecord()
+
+    def __enter__(self):
+        return self.record
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def instrument_stage(name):
+    """
+    The instrument_stage function returns a context manager timing the named stage. The
+    record it yields can be given the rows produced, i.e. record["rows"] = len(outputframe).
+
+    Examples:
+        with instrument_stage('xbrl_parse.join') as record:
+            ...
+            record['rows'] = len(data)
+    """
+
+    if not _hooks:
+        return _NULL_STAGE
+    return _Stage(name)
+
+
+def instrument_count(**metrics):
+    """
+    The instrument_count function adds HTTP activity (requests, bytes, cache_hits, retries)
+    to every open stage of the current thread or task.
+
+    Examples:
+        instrument_count(requests=1, bytes=len(response.content))
+    """
+
+    if not _hooks:
+        return
+    for record in _stack.get():
+        for metricname, value in metrics.items():
+            record[metricname] += value
+
+
+def instrumented_send(send):
+    """
+    Wrap a transport called as send(method, url, ...) so that every request it sends runs
+    as an 'http.send' stage counting the request & the bytes received. Returns send
+    unchanged while no hook is installed.
+    """
+
+    if not _hooks:
+        return send
+
+    def countedsend(method, url, *args, **kwargs):
+        with _Stage("http.send"):
+            response = send(method, url, *args, **kwargs)
+            instrument_count(requests=1, bytes=len(getattr(response, "content", None) or b""))
+        return response
+
+    return countedsend
+
+
+def instrumented_asend(send):
+    """
+    Asynchronous counterpart of instrumented_send for a coroutine function transport.
+    """
+
+    if not _hooks:
+        return send
+
+    async def countedsend(method, url, *args, **kwargs):
+        with _Stage("http.send"):
+            response = await send(method, url, *args, **kwargs)
+            instrument_count(requests=1, bytes=len(getattr(response, "content", None) or b""))
+        return response
+
+    return countedsend
+
+
+def _rows(result):
+    """
+    Return the row count of a stage result, or None when it is not a table.
+    """
+
+    # A result can only be a DataFrame once pandas is loaded, so it is not imported here
+    pandas = sys.modules.get("pandas")
+    if pandas is not None and isinstance(result, (pandas.DataFrame, pandas.Series)):
+        return len(result)
+    return None
+
+
+def _instrumented_iteration(name, generator):
+    """
+    Iterate generator as one stage, open only while the generator runs: the stage pauses at
+    every yield, so that the time the caller spends on an item is not counted and the
+    stages the caller runs meanwhile are not its children. The rows of every DataFrame
+    yielded, or one per other item, add up to the rows of the stage.
+    """
+
+    record = _Stage(name).record
+    record["rows"] = 0
+    started = False
+    try:
+        while True:
+            stack = _stack.get()
+            if not started and stack:
+                record["parent"] = stack[-1]["stage"]
+            started = True
+            token = _stack.set(stack + (record,))
+            wallstart = time.perf_counter()
+            cpustart = time.process_time()
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            except BaseException as exc:
+                record["error"] = type(exc).__name__
+                raise
+            finally:
+                record["wall_sec"] += time.perf_counter() - wallstart
+                record["cpu_sec"] += time.process_time() - cpustart
+                _stack.reset(token)
+            rows = _rows(item)
+            record["rows"] += 1 if rows is None else rows
+            yield item
+    finally:
+        # Also reached when the caller stops early & closes the iteration
+        generator.close()
+        for hook in list(_hooks):
+            hook(record)
+
+
+def instrumented(function):
+    """
+    The instrumented decorator runs every call of function, or of a coroutine function,
+    as a stage named after its qualified name, recording the rows of the DataFrame it
+    returns. The iteration of a generator function is one stage, paused at every yield,
+    recording the rows yielded.
+    """
+
+    name = function.__qualname__
+
+    if inspect.isgeneratorfunction(function):
+
+        @functools.wraps(function)
+        def generatorwrapper(*args, **kwargs):
+            if not _hooks:
+                return function(*args, **kwargs)
+            return _instrumented_iteration(name, function(*args, **kwargs))
+
+        return generatorwrapper
+
+    if inspect.iscoroutinefunction(function):
+
+        @functools.wraps(function)
+        async def asyncwrapper(*args, **kwargs):
+            if not _hooks:
+                return await function(*args, **kwargs)
+            with _Stage(name) as record:
+                result = await function(*args, **kwargs)
+                if record["rows"] is None:
+                    record["rows"] = _rows(result)
+                return result
+
+        return asyncwrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _hooks:
+            return function(*args, **kwargs)
+        with _Stage(name) as record:
+            result = function(*args, **kwargs)
+            if record["rows"] is None:
+                record["rows"] = _rows(result)
+            return result
+
+    return wrapper
+
+
+class Profiler:
+    """
+    The Profiler class is a hook aggregating the finished stages by name into a summary
+    report.
+
+    Args:
+        keep_records (bool, optional): If True, also keep every stage record in records.
+        Defaults to False, only the totals are kept.
+
+    Attributes:
+        totals (dict): Per stage name, the calls, errors & summed metrics.
+        records (list): Every stage record, with keep_records.
+
+    Examples:
+        with Profiler() as profiler:
+            xbrl_parse('aapl-20201226_htm.xml')
+        profiler.report()
+    """
+
+    def __init__(self, keep_records=False):
+        self.keep_records = keep_records
+        self.totals = {}
+        self.records = []
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        with self._lock:
+            totals = self.totals.setdefault(
+                record["stage"],
+                dict.fromkeys(["calls", "errors", "wall_sec", "cpu_sec", "rows"] + STAGE_METRICS, 0),
+            )
+            totals["calls"] += 1
+            totals["errors"] += record["error"] is not None
+            totals["wall_sec"] += record["wall_sec"]
+            totals["cpu_sec"] += record["cpu_sec"]
+            totals["rows"] += record["rows"] or 0
+            for metricname in STAGE_METRICS:
+                totals[metricname] += record[metricname]
+            if self.keep_records:
+                self.records.append(dict(record))
+
+    def start(self):
+        """
+        Install the profiler as a hook.
+        """
+
+        add_instrument_hook(self)
+        return self
+
+    def stop(self):
+        """
+        Uninstall the profiler. The totals are kept.
+        """
+
+        remove_instrument_hook(self)
+        return self
+
+    def reset(self):
+        """
+        Discard the totals & records collected so far.
+        """
+
+        with self._lock:
+            self.totals = {}
+            self.records = []
+
+    def report(self):
+        """
+        Return the totals as a DataFrame with one row per stage, slowest first.
+
+        Returns:
+            pandas.DataFrame: Index stage & the columns calls, errors, wall_sec, cpu_sec,
+            rows, requests, bytes, cache_hits & retries. Stages include their children, so
+            the seconds of nested stages add up to their parent rather than to the total.
+        """
+
+        import pandas
+
+        columns = ["calls", "errors", "wall_sec", "cpu_sec", "rows"] + STAGE_METRICS
+        with self._lock:
+            report = pandas.DataFrame.from_dict(self.totals, orient="index", columns=columns)
+        report.index.name = "stage"
+        return report.sort_values("wall_sec", ascending=False)
+
+    def summary(self):
+        """
+        Return the report as a printable table.
+        """
+
+        report = self.report()
+        if report.empty:
+            return "No instrumented stages were recorded."
+        return report.round({"wall_sec": 3, "cpu_sec": 3}).to_string()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def __repr__(self):
+        return f"<Profiler {len(self.totals)} stages>"
@@ -0,0 +1,434 @@
+"""
+https://arrow.apache.org/docs/python/dataset.html
+
+Columnar store persisting the parsed output of xbrl_parse, edgar_query & edgar_frames to
+Parquet datasets, so that analytics read from local files instead of the network or the
+XML parser.
+
+    root/facts/cik=320193/taxonomy=us-gaap/fy=2020/part-....parquet    edgar_query tidy output
+    root/frames/taxonomy=us-gaap/fy=2020/part-....parquet               edgar_frames tidy output
+    root/filings/cik=320193/fy=2020/part-....parquet                    xbrl_parse output
+
+Facts are partitioned by CIK, taxonomy & fiscal year. Frames hold one row per company for
+a period and are partitioned by taxonomy & year only, which keeps them from being spread
+over one tiny file per company. The xbrl_parse output carries no taxonomy (datacode is
+the local element name), so filings are partitioned by CIK & year.
+
+String columns are dictionary encoded and read back as categoricals. Accessions already
+stored are skipped on write, and reads push the CIK, taxonomy & year filters down to the
+partition directories and the remaining filters down to the Parquet row groups.
+
+pyarrow is an optional dependency:
+
+    pip install tidyxbrl[parquet]
+"""
+
+import os
+import uuid
+import numpy
+import pandas
+from tidyxbrl.xbrl_parse import xbrl_parse
+from tidyxbrl.edgar_query import TIDY_COLUMNS
+from tidyxbrl.edgar_frames import FRAMES_TIDY_COLUMNS
+from tidyxbrl.instrumentation import instrumented
+from src.config.default_headers import con_headers_default
+
+STORE_DATASETS = ["facts", "frames", "filings"]
+
+STORE_PARTITIONS = {
+    "facts": ["cik", "taxonomy", "fy"],
+    "frames": ["taxonomy", "fy"],
+    "filings": ["cik", "fy"],
+}
+
+# Columns filtered by the concept, date & accession arguments of ParquetStore.read
+STORE_FIELDS = {
+    "facts": {"concept": "concept", "date": "end"},
+    "frames": {"concept": "concept", "date": "end"},
+    "filings": {"concept": "datacode", "date": "endDate"},
+}
+
+FILING_COLUMNS = [
+    "accn", "context", "identifier", "startDate", "endDate", "instant", "segment",
+    "decimals", "unitRef", "datacode", "datavalue",
+]
+
+# Column order of a full read; the partition keys are otherwise read back last
+STORE_COLUMNS = {
+    "facts": TIDY_COLUMNS,
+    "frames": ["frame", "taxonomy", "concept", "unit"] + FRAMES_TIDY_COLUMNS + ["fy"],
+    "filings": ["cik"] + FILING_COLUMNS + ["fy"],
+}
+
+
+class ParquetStore:
+    """
+    The ParquetStore class persists tidy tidyxbrl output to partitioned Parquet datasets.
+
+    Args:
+        root (str): Directory of the store. Created on the first write.
+
+    Examples:
+        store = ParquetStore('sec_store/')
+        store.write_facts(edgar_query('0000320193', 'companyfacts', tidy=True))
+        store.write_frames(edgar_frames_many('us-gaap/Revenues/USD', ['CY2021', 'CY2022']))
+        store.xbrl_parse('https://www.sec.gov/Archives/edgar/data/320193/000032019321000010/aapl-20201226_htm.xml',
+                         accn='0000320193-21-000010')
+        store.read('facts', ciks=[320193], concepts=['Revenues'], start='2019-01-01', end='2022-12-31')
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._accessions = {}
+
+    @instrumented
+    def write_facts(self, facts):
+        """
+        Store edgar_query(..., tidy=True) or edgar_bulk_read output, skipping the
+        (cik, accn) pairs already stored.
+
+        Args:
+            facts (pandas.DataFrame): Tidy companyfacts rows.
+
+        Returns:
+            int: Number of rows written.
+        """
+
+        facts = self._new_rows("facts", facts)
+        return self._write("facts", facts)
+
+    @instrumented
+    def write_frames(self, frames, taxonomy=None, concept=None, unit=None):
+        """
+        Store edgar_frames(..., tidy=True) or edgar_frames_many output, skipping the
+        periods already stored for the concept & unit.
+
+        Args:
+            frames (pandas.DataFrame): Tidy frame rows.
+            taxonomy, concept, unit (str, optional): Concept of the rows. Default to the
+            taxonomy, tag & uom held in frames.attrs.
+
+        Returns:
+            int: Number of rows written.
+        """
+
+        taxonomy = taxonomy or frames.attrs.get("taxonomy")
+        concept = concept or frames.attrs.get("tag")
+        unit = unit or frames.attrs.get("uom")
+        frames = frames.copy()
+        if "frame" not in frames.columns:
+            frames.insert(0, "frame", frames.attrs.get("ccp"))
+        frames["taxonomy"] = taxonomy
+        frames["concept"] = concept
+        frames["unit"] = unit
+        frames["fy"] = pandas.array(frames["end"].dt.year, dtype="Int16")
+
+        storedframes = self._stored_frames(taxonomy, concept, unit)
+        frames = frames[~frames["frame"].astype(str).isin(storedframes)]
+        return self._write("frames", frames)
+
+    @instrumented
+    def write_filing(self, filing, accn, cik=None):
+        """
+        Store the xbrl_parse output of one filing, unless accn is already stored.
+
+        Typed filings (xbrl_parse(..., typed=True)) are written back in the string layout
+        of xbrl_parse, so that every file of the dataset shares one schema.
+
+        Args:
+            filing (pandas.DataFrame): xbrl_parse output, typed or not.
+            accn (str): Accession number of the filing (i.e. '0000320193-21-000010').
+            cik (int, optional): CIK of the filer. Defaults to the identifier column.
+
+        Returns:
+            int: Number of rows written.
+        """
+
+        if "datatext" in filing.columns:
+            filing = _filing_strings(filing)
+        filing = filing.reindex(columns=FILING_COLUMNS[1:]).astype(object)
+        filing = filing.where(filing.notna(), None)
+        filing.insert(0, "accn", accn)
+        if cik is None:
+            cik = pandas.to_numeric(filing["identifier"], errors="coerce").dropna().astype("int64")
+            cik = int(cik.iloc[0]) if len(cik) else 0
+        filing["cik"] = int(cik)
+        # The fiscal year of a parsed filing is not known, so the year of the period end is used
+        perioddate = filing["endDate"].fillna(filing["instant"])
+        filing["fy"] = pandas.array(pandas.to_datetime(perioddate, errors="coerce").dt.year, dtype="Int16")
+
+        filing = self._new_rows("filings", filing)
+        return self._write("filings", filing)
+
+    @instrumented
+    def xbrl_parse(self, path, accn, cik=None, timeout_sec=15, con_headers=con_headers_default, engine="soup", cache=None, client=None):
+        """
+        Return a filing from the store, or download, parse & store it when accn is new.
+
+        Args:
+            path (str or bytes): Filepath or website url of the filing, as in xbrl_parse.
+            accn (str): Accession number of the filing.
+            cik (int, optional): CIK of the filer. Defaults to the identifier column.
+            The remaining arguments are passed to xbrl_parse.
+
+        Returns:
+            pandas.DataFrame: The stored rows of the filing, or None if it could not be read.
+        """
+
+        if not self.has_accession("filings", accn, cik):
+            filing = xbrl_parse(path, timeout_sec=timeout_sec, con_headers=con_headers, engine=engine, cache=cache, client=client)
+            if filing is None:
+                return None
+            self.write_filing(filing, accn, cik)
+        return self.read("filings", ciks=[cik] if cik is not None else None, accessions=[accn])
+
+    def has_accession(self, dataset, accn, cik=None):
+        """
+        Return True when the dataset holds rows of accession accn (of cik, if given).
+        """
+
+        accessions = self.stored_accessions(dataset)
+        if cik is not None:
+            return (int(cik), accn) in accessions
+        return any(storedaccn == accn for _, storedaccn in accessions)
+
+    def missing_accessions(self, dataset, accessions, cik):
+        """
+        Return the accessions of cik that are not stored yet, in their original order.
+        """
+
+        stored = self.stored_accessions(dataset)
+        return [accn for accn in accessions if (int(cik), accn) not in stored]
+
+    def stored_accessions(self, dataset):
+        """
+        Return the set of (cik, accn) pairs held by the facts or filings dataset. Read once
+        per store, from the accn column & the cik partition only.
+        """
+
+        if dataset not in self._accessions:
+            stored = set()
+            if self._exists(dataset):
+                table = self._dataset(dataset).to_table(columns=["cik", "accn"])
+                pairs = table.to_pandas().drop_duplicates()
+                stored = set(zip(pairs["cik"].astype("int64"), pairs["accn"].astype(str)))
+            self._accessions[dataset] = stored
+        return self._accessions[dataset]
+
+    @instrumented
+    def read(
+        self,
+        dataset,
+        columns=None,
+        ciks=None,
+        taxonomy=None,
+        concepts=None,
+        fy=None,
+        start=None,
+        end=None,
+        accessions=None,
+        filters=None,
+    ):
+        """
+        Read a dataset, pushing the filters down to the partitions & row groups.
+
+        Args:
+            dataset (str): 'facts', 'frames' or 'filings'.
+            columns (list, optional): Columns to read. Defaults to every column.
+            ciks (list, optional): CIKs to keep.
+            taxonomy (str or list, optional): Taxonomies to keep (i.e. 'us-gaap'). Not
+            available for filings.
+            concepts (list, optional): Concepts to keep (the datacode column of filings).
+            fy (int or tuple, optional): Fiscal year, or an inclusive (first, last) range.
+            start, end (str, optional): Inclusive bounds of the period end date
+            (YYYY-MM-DD).
+            accessions (list, optional): Accession numbers to keep.
+            filters (pyarrow.dataset.Expression, optional): Any further filter.
+
+        Returns:
+            pandas.DataFrame: The matching rows, with dictionary encoded strings as
+            categoricals. Empty if the dataset holds no data yet.
+
+        Raises:
+            ValueError: If dataset is not one of 'facts', 'frames' or 'filings'.
+        """
+
+        pyarrow, ds, _ = _parquet_modules()
+        if dataset not in STORE_DATASETS:
+            raise ValueError("dataset must be in: " + str(STORE_DATASETS))
+        if not self._exists(dataset):
+            return pandas.DataFrame(columns=columns)
+
+        fields = STORE_FIELDS[dataset]
+        expressions = []
+        if ciks is not None:
+            expressions.append(ds.field("cik").isin([int(cik) for cik in ciks]))
+        if taxonomy is not None:
+            expressions.append(ds.field("taxonomy").isin([taxonomy] if isinstance(taxonomy, str) else list(taxonomy)))
+        if fy is not None:
+            first, last = fy if isinstance(fy, (tuple, list)) else (fy, fy)
+            expressions.append((ds.field("fy") >= int(first)) & (ds.field("fy") <= int(last)))
+        if concepts is not None:
+            expressions.append(ds.field(fields["concept"]).isin(list(concepts)))
+        if accessions is not None:
+            expressions.append(ds.field("accn").isin(list(accessions)))
+        # Filings keep their dates as text, which sorts like the dates it holds
+        if start is not None:
+            bound = str(start) if dataset == "filings" else pandas.Timestamp(start)
+            expressions.append(ds.field(fields["date"]) >= bound)
+        if end is not None:
+            bound = str(end) if dataset == "filings" else pandas.Timestamp(end)
+            expressions.append(ds.field(fields["date"]) <= bound)
+        if filters is not None:
+            expressions.append(filters)
+
+        expression = None
+        for condition in expressions:
+            expression = condition if expression is None else expression & condition
+        table = self._dataset(dataset).to_table(columns=columns, filter=expression)
+        outputframe = table.to_pandas()
+        if columns is None:
+            outputframe = outputframe[[name for name in STORE_COLUMNS[dataset] if name in outputframe.columns]]
+        return outputframe
+
+    def _new_rows(self, dataset, frame):
+        """
+        Drop the rows whose (cik, accn) pair is already stored.
+        """
+
+        stored = self.stored_accessions(dataset)
+        if not stored or not len(frame):
+            return frame
+        keys = pandas.MultiIndex.from_arrays([frame["cik"].astype("int64"), frame["accn"].astype(str)])
+        return frame[~keys.isin(list(stored))]
+
+    def _stored_frames(self, taxonomy, concept, unit):
+        """
+        Return the periods stored for a frames concept & unit.
+        """
+
+        if not self._exists("frames"):
+            return set()
+        _, ds, _ = _parquet_modules()
+        stored = self.read(
+            "frames",
+            columns=["frame"],
+            taxonomy=taxonomy,
+            filters=(ds.field("concept") == concept) & (ds.field("unit") == unit),
+        )
+        return set(stored["frame"].astype(str))
+
+    def _write(self, dataset, frame):
+        """
+        Append frame to a dataset as new files of every partition it touches.
+        """
+
+        if not len(frame):
+            return 0
+        pyarrow, ds, _ = _parquet_modules()
+        frame = frame.copy()
+        frame.attrs = {}
+        # Strings are stored dictionary encoded & come back as categoricals
+        for name in frame.columns:
+            if name not in STORE_PARTITIONS[dataset] and frame[name].dtype == object:
+                frame[name] = frame[name].astype("category")
+        table = pyarrow.Table.from_pandas(frame, schema=_store_schema(dataset, frame), preserve_index=False)
+        ds.write_dataset(
+            table,
+            os.path.join(self.root, dataset),
+            format="parquet",
+            partitioning=_store_partitioning(dataset),
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        if dataset in self._accessions:
+            self._accessions[dataset].update(zip(frame["cik"].astype("int64"), frame["accn"].astype(str)))
+        return len(frame)
+
+    def _dataset(self, dataset):
+        _, ds, _ = _parquet_modules()
+        return ds.dataset(
+            os.path.join(self.root, dataset), format="parquet", partitioning=_store_partitioning(dataset)
+        )
+
+    def _exists(self, dataset):
+        return os.path.isdir(os.path.join(self.root, dataset))
+
+    def __repr__(self):
+        return f"<ParquetStore {self.root}>"
+
+
+def _parquet_modules():
+    """
+    Import pyarrow on first use, with an installation hint when it is missing.
+    """
+
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError("ParquetStore requires pyarrow: pip install tidyxbrl[parquet]") from exc
+    return pyarrow, pyarrow.dataset, pyarrow.parquet
+
+
+def _store_partitioning(dataset):
+    """
+    Hive partitioning (name=value directories) of a dataset, with typed partition keys.
+    """
+
+    pyarrow, ds, _ = _parquet_modules()
+    types = {"cik": pyarrow.int64(), "taxonomy": pyarrow.string(), "fy": pyarrow.int16()}
+    return ds.partitioning(
+        pyarrow.schema([(name, types[name]) for name in STORE_PARTITIONS[dataset]]), flavor="hive"
+    )
+
+
+def _filing_strings(filing):
+    """
+    Convert typed xbrl_parse output back to its string columns: ISO dates, decimals with
+    'INF', and the datavalue of numeric facts written without a trailing '.0'.
+    """
+
+    filing = filing.copy()
+    for name in ["startDate", "endDate", "instant"]:
+        if name in filing.columns and pandas.api.types.is_datetime64_any_dtype(filing[name]):
+            filing[name] = filing[name].dt.strftime("%Y-%m-%d")
+    if "decimals" in filing.columns and pandas.api.types.is_numeric_dtype(filing["decimals"]):
+        filing["decimals"] = [
+            None if pandas.isna(value) else "INF" if numpy.isinf(value) else str(int(value))
+            for value in filing["decimals"]
+        ]
+    filing["datavalue"] = [
+        text if isinstance(text, str) else None if value is None or pandas.isna(value) else _filing_number(value)
+        for value, text in zip(filing["datavalue"], filing["datatext"])
+    ]
+    return filing.drop(columns="datatext")
+
+
+def _filing_number(value):
+    """
+    Write a float or decimal.Decimal datavalue the way it is written in XBRL.
+    """
+
+    if isinstance(value, float):
+        return numpy.format_float_positional(value, trim="-")
+    return format(value, "f")
+
+
+def _store_schema(dataset, frame):
+    """
+    Arrow schema of frame with int32 indexed dictionaries for every categorical, so that
+    the files of a dataset share one schema whatever the number of categories.
+    """
+
+    pyarrow, _, _ = _parquet_modules()
+    schema = pyarrow.Schema.from_pandas(frame, preserve_index=False)
+    fields = []
+    for field in schema:
+        if pyarrow.types.is_dictionary(field.type):
+            field = field.with_type(pyarrow.dictionary(pyarrow.int32(), pyarrow.string()))
+        elif field.name == "fy":
+            field = field.with_type(pyarrow.int16())
+        fields.append(field)
+    return pyarrow.schema(fields)
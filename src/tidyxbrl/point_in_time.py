@@ -0,0 +1,207 @@
+"""
+Point in time (as of filed date) index over companyfacts, for backtests.
+
+The companyfacts of a company hold every value a concept was ever reported with: the
+original filing, the comparatives of later filings & the restatements of amendments. The
+value "known on date D" is the one of the latest period filed on or before D, as last
+filed by then. PointInTimeIndex sorts the facts once and precomputes that answer for
+every filing event, so that the value known on D is found with a binary search on the
+filed date, for whole arrays of (cik, date) pairs at once:
+
+    index = tidyxbrl.PointInTimeIndex(tidyxbrl.edgar_bulk_read('companyfacts/'))
+    index.asof([320193, 789019], ['2020-06-30', '2020-06-30'], 'Revenues', quarters=1)
+    index.asof(ciks, rebalancedates, 'Assets', quarters=0)
+"""
+
+import numpy
+import pandas
+from tidyxbrl.fact_panel import _panel_codes, _panel_quarter_counts
+from tidyxbrl.fact_store import _MAX_DAY, _NO_DATE, _fact_store_dates, _fact_store_days, _key_days
+from tidyxbrl.instrumentation import instrumented
+
+# Columns of the facts returned by asof, when present in the indexed facts
+POINT_IN_TIME_COLUMNS = ["concept", "unit", "start", "end", "val", "accn", "fy", "fp", "form", "filed", "frame"]
+
+_DAY_BITS = 17
+# Durations of 0 (instants) to 4 quarters, then any other duration
+_DURATION_CLASSES = 6
+
+
+class PointInTimeIndex:
+    """
+    The PointInTimeIndex class answers "the value of a concept for a company as it was
+    known on a date" from tidy companyfacts, with restatements & amendments applied only
+    from the day they were filed.
+
+    Facts are grouped by (cik, concept, duration), where the duration is the number of
+    quarters of the period: 0 for instants, 1 for quarters, 2 & 3 for year to date
+    periods, 4 for years. Every group is sorted on (period end, filed), and on filed with
+    the fact known after every filing.
+
+    Attributes:
+        ciks (numpy.ndarray): Every CIK of the index, sorted.
+        concepts (pandas.Index): Every concept of the index, sorted.
+
+    Examples:
+        index = PointInTimeIndex(edgar_query('0000320193', 'companyfacts', tidy=True), unit='USD')
+        index.asof([320193] * 3, ['2019-12-31', '2020-06-30', '2020-12-31'], 'Revenues', quarters=1)
+        index.asof([320193, 320193], ['2020-01-01', '2020-12-31'], 'NetIncomeLoss', end='2019-09-28')
+    """
+
+    @instrumented
+    def __init__(self, facts, unit=None):
+        """
+        Index tidy companyfacts rows.
+
+        Args:
+            facts (pandas.DataFrame): edgar_query(..., tidy=True) or edgar_bulk_read output
+            with the TIDY_COLUMNS (at least cik, concept, end, val & filed).
+            unit (str or list, optional): Units to keep (i.e. 'USD'). Defaults to every
+            unit, in which case the facts of a concept in several units are told apart by
+            their filed date only.
+
+        Raises:
+            ValueError: If facts misses the cik, concept, end, val or filed columns.
+        """
+
+        missing = [name for name in ["cik", "concept", "end", "val", "filed"] if name not in facts.columns]
+        if missing:
+            raise ValueError("facts must hold the columns: " + str(missing))
+
+        # Missing CIKs are NaN, which factorize codes as -1
+        cikvalues = pandas.to_numeric(facts["cik"], errors="coerce").to_numpy(dtype=numpy.float64, na_value=numpy.nan)
+        cikcodes, ciks = pandas.factorize(cikvalues, sort=True)
+        self.ciks = numpy.asarray(ciks, dtype=numpy.int64)
+        conceptcodes, self.concepts = _panel_codes(facts["concept"], None)
+        endday = _fact_store_days(facts["end"])
+        startday = _fact_store_days(facts["start"]) if "start" in facts.columns else numpy.full(len(facts), _NO_DATE, numpy.int32)
+        filedday = _fact_store_days(facts["filed"])
+        durationclass = _panel_quarter_counts(startday, endday)
+        durationclass[durationclass < 0] = _DURATION_CLASSES - 1
+
+        keep = (cikcodes >= 0) & (conceptcodes >= 0) & (endday != _NO_DATE) & (filedday != _NO_DATE)
+        keep &= pandas.to_numeric(facts["val"], errors="coerce").notna().to_numpy()
+        if unit is not None and "unit" in facts.columns:
+            keep &= facts["unit"].isin([unit] if isinstance(unit, str) else list(unit)).to_numpy()
+        rows = numpy.flatnonzero(keep)
+
+        # Dense codes of the (cik, concept, duration) groups, in that order
+        groupcombos = (cikcodes[rows].astype(numpy.int64) * len(self.concepts) + conceptcodes[rows]) * _DURATION_CLASSES + durationclass[rows]
+        groups, self._groupcombos = pandas.factorize(groupcombos, sort=True)
+        groups = groups.astype(numpy.int64)
+        endkey = _key_days(endday[rows])
+        filedkey = _key_days(filedday[rows])
+
+        # Period layout: group, period end, filed; the facts are stored in this order
+        periodkey = (groups << (2 * _DAY_BITS)) | (endkey << _DAY_BITS) | filedkey
+        order = numpy.argsort(periodkey, kind="stable")
+        self._periodkey = periodkey[order]
+        self._rows = rows[order]
+        groups, endkey, filedkey = groups[order], endkey[order], filedkey[order]
+
+        # Filing timeline: group, filed. After every filing, the fact known is the latest
+        # filed fact of the latest period end, which changes only when a filing reports a
+        # period end at least as late as every one before it
+        timeline = numpy.argsort((groups << _DAY_BITS) | filedkey, kind="stable")
+        groupend = (groups[timeline] << _DAY_BITS) | endkey[timeline]
+        # The first filing of a group is always the latest, so the known positions never
+        # reach back into the previous group
+        islatest = groupend == numpy.maximum.accumulate(groupend)
+        known = numpy.maximum.accumulate(numpy.where(islatest, numpy.arange(len(timeline)), 0))
+        self._timelinekey = (groups[timeline] << _DAY_BITS) | filedkey[timeline]
+        self._timelinefacts = timeline[known]
+
+        columns = [name for name in POINT_IN_TIME_COLUMNS if name in facts.columns]
+        self._facts = facts[columns].take(self._rows).reset_index(drop=True)
+
+    @instrumented
+    def asof(self, ciks, dates, concept, quarters=None, end=None):
+        """
+        Return the fact of a concept known on every date, for every (cik, date) pair.
+
+        Args:
+            ciks (array-like): CIK of every query.
+            dates (array-like): Date of every query (YYYY-MM-DD). A fact is known from the
+            day it was filed, inclusive.
+            concept (str or array-like): Concept of every query, or one concept for all.
+            quarters (int, optional): Duration of the periods, in quarters: 0 for instants
+            (i.e. Assets), 1 for quarters, 4 for years. Defaults to None, any duration;
+            when several durations end on the same latest period, the shortest wins.
+            end (str or array-like, optional): Period end of every query. Defaults to
+            None, the latest period end known on the date. With end, the value of that
+            period as last filed by the date is returned.
+
+        Returns:
+            pandas.DataFrame: One row per query, in order, with the cik & date of the query
+            followed by the POINT_IN_TIME_COLUMNS of the fact, missing when nothing was
+            known on the date.
+
+        Raises:
+            ValueError: If quarters is not one of 0 to 4.
+
+        Examples:
+            index.asof(ciks, numpy.repeat(numpy.datetime64('2020-06-30'), len(ciks)), 'Revenues', quarters=1)
+        """
+
+        if quarters is not None and quarters not in range(_DURATION_CLASSES - 1):
+            raise ValueError("quarters must be in: " + str(list(range(_DURATION_CLASSES - 1))))
+        queryciks = numpy.asarray(ciks, dtype=numpy.int64).reshape(-1)
+        querydays = _fact_store_days(pandas.Series(numpy.asarray(dates).reshape(-1)))
+        cikcodes = pandas.Index(self.ciks).get_indexer(queryciks)
+        conceptcodes = self.concepts.get_indexer(_broadcast(concept, len(queryciks)))
+        datekey = _key_days(querydays)
+        endkey = None if end is None else _key_days(_fact_store_days(_broadcast(end, len(queryciks))))
+
+        positions = numpy.full(len(queryciks), -1, dtype=numpy.int64)
+        bestend = numpy.full(len(queryciks), -1, dtype=numpy.int64)
+        for durationclass in range(_DURATION_CLASSES) if quarters is None else [quarters]:
+            combos = (cikcodes.astype(numpy.int64) * len(self.concepts) + conceptcodes) * _DURATION_CLASSES + durationclass
+            groups = pandas.Index(self._groupcombos).get_indexer(combos)
+            groups = numpy.where((cikcodes >= 0) & (conceptcodes >= 0) & (querydays != _NO_DATE), groups, -1)
+            found = self._asof_positions(groups, datekey, endkey)
+            # Keep the latest period end, the shortest duration on a tie
+            foundend = numpy.where(found >= 0, (self._periodkey[found.clip(0)] >> _DAY_BITS) & _MAX_DAY, -1)
+            better = foundend > bestend
+            positions[better], bestend[better] = found[better], foundend[better]
+
+        result = self._facts.reindex(positions).reset_index(drop=True)
+        result.insert(0, "date", _fact_store_dates(querydays))
+        result.insert(0, "cik", queryciks)
+        return result
+
+    def _asof_positions(self, groups, datekey, endkey):
+        """
+        Return the stored position of the fact known on every date of every group, -1 when
+        there is none, with one binary search per query.
+        """
+
+        positions = numpy.full(len(groups), -1, dtype=numpy.int64)
+        if not len(self._rows):
+            return positions
+        if endkey is None:
+            searchkey = (groups << _DAY_BITS) | datekey
+            found = numpy.searchsorted(self._timelinekey, searchkey, side="right") - 1
+            hit = (groups >= 0) & (found >= 0) & (self._timelinekey[found.clip(0)] >> _DAY_BITS == groups)
+            positions[hit] = self._timelinefacts[found[hit]]
+        else:
+            searchkey = (groups << (2 * _DAY_BITS)) | (endkey << _DAY_BITS) | datekey
+            found = numpy.searchsorted(self._periodkey, searchkey, side="right") - 1
+            hit = (groups >= 0) & (endkey > 0) & (found >= 0) & (self._periodkey[found.clip(0)] >> _DAY_BITS == searchkey >> _DAY_BITS)
+            positions[hit] = found[hit]
+        return positions
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __repr__(self):
+        return f"<PointInTimeIndex {len(self)} facts: {len(self.ciks)} companies, {len(self.concepts)} concepts>"
+
+
+def _broadcast(values, length):
+    """
+    Return a scalar repeated length times, or the values of an array-like, as a Series.
+    """
+
+    if numpy.ndim(values) == 0:
+        return pandas.Series([values] * length, dtype=object)
+    return pandas.Series(numpy.asarray(values).reshape(-1))
@@ -6,9 +6,11 @@ API key generation to pull data from the XBRL US API.
 """
 
 import pandas
-import requests
+from tidyxbrl.http_client import client_send
+from tidyxbrl.instrumentation import instrumented
 
 
+@instrumented
 def xbrl_apikey(
     username,
     password,
@@ -17,7 +19,8 @@ def xbrl_apikey(
     platform="pc",
     grant_type="password",
     refresh_token="",
-    timeout_sec = 15
+    timeout_sec = 15,
+    client = None
 ):
     """
     The xbrl_apikey function generates or refreshes a temporary token for the xbrl_apiquery
@@ -36,6 +39,8 @@ def xbrl_apikey(
         xbrl_apikey request.
         timeout_sec: The time in seconds to wait for the server to respond
         con_headers (dict): The headers to be sent with the initial request.
+        client (HttpClient, optional): Pooled & rate limited client sending the request.
+        Defaults to the client installed with set_default_client.
 
     Returns:
         pandas.DataFrame: DataFrame output of the XBRL api key.
@@ -55,9 +60,11 @@ def xbrl_apikey(
 
     # Submit the request based on the grant_type
     # If password, generate a new tolken
+    send = client_send(client)
     if grant_type == "password":
-        xbrl_apikeyoutput = requests.post(
-            url="https://api.xbrl.us/oauth2/token",
+        xbrl_apikeyoutput = send(
+            "POST",
+            "https://api.xbrl.us/oauth2/token",
             data={
                 "grant_type": grant_type,
                 "client_id": client_id,
@@ -70,8 +77,9 @@ def xbrl_apikey(
         )
     # If refresh_token, refresh an existing token
     elif grant_type == "refresh_token":
-        xbrl_apikeyoutput = requests.post(
-            url="https://api.xbrl.us/oauth2/token",
+        xbrl_apikeyoutput = send(
+            "POST",
+            "https://api.xbrl.us/oauth2/token",
             data={
                 "grant_type": grant_type,
                 "client_id": client_id,
@@ -2,23 +2,143 @@
 Function to parse raw XBRL files from a website or file path.
 """
 
+import copy
+import decimal
+import io
+import os
+import re
 import pandas
 import numpy
 import requests
 from bs4 import BeautifulSoup
+from lxml import etree
 from tqdm import tqdm
+from tidyxbrl.http_cache import cached_request
+from tidyxbrl.instrumentation import instrumented, instrument_stage
 from src.config.default_headers import con_headers_default
 
+XBRLI_NAMESPACE = "http://www.xbrl.org/2003/instance"
+IX_NAMESPACES = ["http://www.xbrl.org/2013/inlineXBRL", "http://www.xbrl.org/2008/inlineXBRL"]
+XHTML_NAMESPACE = "http://www.w3.org/1999/xhtml"
+XSI_NIL = "{http://www.w3.org/2001/XMLSchema-instance}nil"
+XBRLDI_NAMESPACE = "http://xbrl.org/2006/xbrldi"
 
-def xbrl_parse(path, timeout_sec=15, con_headers = con_headers_default):
+# Order of the day (d), month (m) & year (y) in the text of each iXBRL date transform,
+# across the ixt versions 1 to 4
+IXBRL_DATE_FORMATS = {
+    "mdy": [
+        "date-monthname-day-year-en", "date-month-day-year", "datemonthdayyear", "datemonthdayyearen",
+        "datelongus", "dateshortus", "dateslashus", "datedotus", "datemonthnamedayyearen",
+    ],
+    "dmy": [
+        "date-day-monthname-year-en", "date-day-month-year", "datedaymonthyear", "datedaymonthyearen",
+        "datelongeu", "dateshorteu", "dateslasheu", "datedoteu", "datelonguk", "dateshortuk",
+        "datedaymonthnameyearen",
+    ],
+    "ymd": ["date-year-month-day", "dateyearmonthday", "date-year-monthname-day-en"],
+    "my": [
+        "date-monthname-year-en", "date-month-year", "datemonthyear", "datemonthyearen",
+        "datelongmonthyear", "dateshortmonthyear", "datemonthnameyearen",
+    ],
+    "ym": ["date-year-monthname-en", "date-year-month", "dateyearmonthen", "dateyearmonth"],
+    "md": ["date-monthname-day-en", "date-month-day", "datemonthday", "datemonthdayen", "datelongmonthday", "dateshortmonthday"],
+    "dm": ["date-day-monthname-en", "date-day-month", "datedaymonth", "datedaymonthen", "datelongdaymonth", "dateshortdaymonth"],
+}
+
+IXBRL_NUMBER_WORDS = {
+    word: value for value, word in enumerate(
+        "zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen "
+        "fifteen sixteen seventeen eighteen nineteen".split()
+    )
+}
+IXBRL_NUMBER_WORDS.update(
+    {word: 10 * value for value, word in enumerate("twenty thirty forty fifty sixty seventy eighty ninety".split(), 2)}
+)
+IXBRL_NUMBER_WORDS.update({"no": 0, "none": 0, "nil": 0})
+
+
+@instrumented
+def xbrl_load(path, timeout_sec=15, con_headers=con_headers_default, cache=None, client=None):
+    """
+    The xbrl_load function reads the raw bytes of an XBRL document from a local file path
+    or website url.
+
+    Args:
+        path (str or bytes): Filepath or website url corresponding to XBRL data. Raw bytes
+        are returned as is.
+        timeout_sec: The time in seconds to wait for the server to respond
+        con_headers (dict): The headers to be sent with the initial request.
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (HttpClient, optional): Pooled & rate limited client sending the requests.
+        Defaults to the client installed with set_default_client.
+
+    Returns:
+        bytes: Raw content of the document, or None if it could not be read.
+
+    Examples:
+        xbrl_load('https://www.sec.gov/Archives/edgar/data/320193/000032019321000010/aapl-20201226_htm.xml')
+    """
+
+    if isinstance(path, bytes):
+        return path
+    try:
+        if not os.path.isfile(path):
+            initialrequest = cached_request("GET", path, headers=con_headers, timeout_sec=timeout_sec, cache=cache, client=client)
+            if initialrequest.status_code == 200:
+                return initialrequest.content
+        with open(path, "rb") as file:
+            return file.read()
+    except (OSError, ValueError, requests.RequestException) as e:
+        print(f"Error: {e}")
+        return None
+
+
+@instrumented
+def xbrl_parse(path, timeout_sec=15, con_headers = con_headers_default, engine="soup", cache=None, client=None, typed=False, numeric="float64", dimensions=False):
     """
     The xbrl_apikey function is used to parse the metadata from a particular XBRL file or
     website url.
 
     Args:
-        path (str): Filepath or website url corresponding to XBRL data.
+        path (str or bytes): Filepath or website url corresponding to XBRL data, or the raw
+        content of an XBRL document that has already been downloaded.
         timeout_sec: The time in seconds to wait for the server to respond
         con_headers (dict): The headers to be sent with the initial request.
+        engine (str, optional): Parser used to read the document. Can be 'soup',
+        'iterparse' or 'ixbrl'. Defaults to "soup".
+            - soup: Load the whole document into a BeautifulSoup tree.
+            - iterparse: Read contexts, units & facts in a single streaming lxml pass,
+            clearing each element once it is consumed. Keeps memory bounded on very
+            large instance files and returns the same DataFrame as 'soup'.
+            - ixbrl: Stream an inline XBRL .htm filing, reading the ix:nonFraction &
+            ix:nonNumeric facts and the ix:resources contexts. The format, scale & sign
+            of each fact are applied and continuedAt chains are joined, so that the
+            DataFrame matches the one of the instance document derived from the filing.
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (HttpClient, optional): Pooled & rate limited client sending the requests.
+        Defaults to the client installed with set_default_client.
+        typed (bool, optional): If True, return compact typed columns instead of strings.
+        Defaults to False.
+            - datavalue: Value of the numeric facts (the facts with a unitRef), NaN
+            otherwise. The text facts move to a datatext column.
+            - decimals: float64, with INF as inf.
+            - startDate, endDate & instant: datetime64.
+            - Every other descriptive column (context, identifier, unitRef, datacode,
+            segment, ...): categorical.
+        numeric (str, optional): Type of the typed datavalue column. Can be 'float64' or
+        'decimal' (exact decimal.Decimal objects). Defaults to "float64".
+        dimensions (bool, optional): If True, read every xbrldi:explicitMember &
+        xbrldi:typedMember of the contexts into a side table instead of the segment column,
+        which only holds the first member of a context. Defaults to False.
+            - context: categorical column of the facts, with one category per context of
+            the document.
+            - attrs["dimensions"]: DataFrame of one row per (context, axis, member), where
+            context shares the categories of the facts, axis & member are categorical, and
+            typed flags the typedMember values. Contexts without members have no row.
+            - segment: dropped, as the side table holds every member.
+        Facts are selected by their members with xbrl_dimension_filter.
 
     Returns:
         pandas.DataFrame: DataFrame output of the XBRL file in a tidy format.
@@ -37,99 +157,823 @@ def xbrl_parse(path, timeout_sec=15, con_headers = con_headers_default):
                 - datacode: Description of the dataset.
                 - datvalue: Value of the dataset.
 
+    Raises:
+        ValueError: If engine is not one of 'soup', 'iterparse' or 'ixbrl', or numeric is
+        not one of 'float64' or 'decimal'.
+
     Examples:
         xbrl_parse('https://www.sec.gov/Archives/edgar/data/320193/000032019321000010/aapl-20201226_htm.xml')
         xbrl_parse('https://www.sec.gov/Archives/edgar/data/51143/000155837020001334/ibm-20191231x10k2af531_htm.xml')
         xbrl_parse('https://www.sec.gov/Archives/edgar/data/1318605/000156459020047486/tsla-10q_20200930_htm.xml')
+        xbrl_parse('tsla-10q_20200930_htm.xml', engine = 'iterparse')
+        xbrl_parse('https://www.sec.gov/Archives/edgar/data/320193/000032019323000106/aapl-20230930.htm', engine = 'ixbrl')
+        xbrl_parse('tsla-10q_20200930_htm.xml', typed = True)
+        xbrl_parse('tsla-10q_20200930_htm.xml', dimensions = True)
     """
 
-    def xbrlcolumnprefilter(tag):
-        return (
-            tag.name != "body"
-            and tag.name != "xbrl"
-            and tag.name != "html"
-            and tag.prefix == ""
-            and ":" not in tag.name
+    enginedict = {"soup": _xbrl_parse_soup, "iterparse": _xbrl_parse_iterparse, "ixbrl": _xbrl_parse_ixbrl}
+    if engine not in enginedict:
+        raise ValueError("engine must be in: " + str(list(enginedict)))
+    numericlist = ["float64", "decimal"]
+    if numeric not in numericlist:
+        raise ValueError("numeric must be in: " + str(numericlist))
+
+    with instrument_stage("xbrl_parse." + engine) as record:
+        parsed = enginedict[engine](
+            path, timeout_sec=timeout_sec, con_headers=con_headers, cache=cache, client=client, dimensions=dimensions
         )
+        if parsed is None:
+            return None
+        columnlist, contextdata, factdata, memberdata = parsed
+        record["rows"] = len(factdata)
+
+    with instrument_stage("xbrl_parse.join") as record:
+        outputframe = pandas.DataFrame(_xbrl_join(columnlist, contextdata, factdata))
+        record["rows"] = len(outputframe)
+
+    with instrument_stage("xbrl_parse.tidy") as record:
+        # convert empty strings to NULL, & remove all columns with only NULL or blank values
+        outputframe = outputframe.replace("", numpy.nan).dropna(axis=1, how="all")
+
+        # Reorder the columns to present the datacode & datavalue at the rightmost column
+        columnstitles = list(outputframe.columns)
+        columnstitles.sort(key=lambda x: x == "datacode")
+        columnstitles.sort(key=lambda x: x == "datavalue")
+        outputframe = outputframe.reindex(columns=columnstitles)
+        outputframe = outputframe.sort_values(by=["context"])
+        record["rows"] = len(outputframe)
+
+    if typed:
+        with instrument_stage("xbrl_parse.typed") as record:
+            outputframe = _xbrl_typed(outputframe, numeric)
+            record["rows"] = len(outputframe)
+
+    if dimensions:
+        with instrument_stage("xbrl_parse.dimensions") as record:
+            outputframe = _xbrl_dimensions(outputframe, contextdata, memberdata)
+            record["rows"] = len(outputframe.attrs["dimensions"])
+    return outputframe
+
+
+def xbrl_dimension_filter(facts, members=None):
+    """
+    The xbrl_dimension_filter function selects the facts of an xbrl_parse(..., dimensions=True)
+    DataFrame by the dimension members of their contexts.
 
-    initialrequest = requests.get(path, headers=con_headers, timeout=timeout_sec)
-    if initialrequest.status_code == 200:
-        websitedocument = initialrequest.content
-        soup = BeautifulSoup(websitedocument, "xml")
+    The members are looked up once in the categories of the side table, and the facts are
+    then matched on the integer codes of their context, without comparing any string.
+
+    Args:
+        facts (pandas.DataFrame): Output of xbrl_parse with dimensions=True, or a row
+        subset of it.
+        members (dict, optional): {axis: member} pairs that the context of a fact must all
+        carry, i.e. {'srt:ProductOrServiceAxis': 'us-gaap:ProductMember'}. A member of None
+        matches any member of its axis. Defaults to None, which selects the facts of the
+        contexts without any member (the totals of the filing).
+
+    Returns:
+        pandas.DataFrame: The selected rows of facts.
+
+    Raises:
+        ValueError: If facts has no attrs["dimensions"] side table.
+
+    Examples:
+        facts = xbrl_parse('aapl-20201226_htm.xml', dimensions = True)
+        xbrl_dimension_filter(facts, {'srt:ProductOrServiceAxis': 'aapl:IPhoneMember'})
+        xbrl_dimension_filter(facts, {'us-gaap:StatementBusinessSegmentsAxis': None})
+        xbrl_dimension_filter(facts)
+    """
+
+    dimensiontable = facts.attrs.get("dimensions")
+    if dimensiontable is None or not isinstance(facts["context"].dtype, pandas.CategoricalDtype):
+        raise ValueError("facts must be parsed with xbrl_parse(..., dimensions=True)")
+
+    contextcount = len(dimensiontable["context"].cat.categories)
+    contextcodes = dimensiontable["context"].cat.codes.to_numpy()
+    if not members:
+        keep = numpy.ones(contextcount, dtype=bool)
+        keep[contextcodes] = False
     else:
-        try:
-            with open(path, "r", encoding="utf-8") as file:
-                soup = BeautifulSoup(file, "xml")
-        except (OSError, ValueError, requests.RequestException) as e:
-            print(f"Error: {e}")
-            return None
+        # Count the requested members held by every context, each (context, axis) pair once
+        matches = numpy.zeros(contextcount, dtype=numpy.int64)
+        axiscodes = dimensiontable["axis"].cat.codes.to_numpy()
+        membercodes = dimensiontable["member"].cat.codes.to_numpy()
+        for axis, member in members.items():
+            # An unknown axis or member is code -1, which matches no row
+            axiscode = dimensiontable["axis"].cat.categories.get_indexer([axis])[0]
+            selected = (axiscodes == axiscode) & (axiscode >= 0)
+            if member is not None:
+                membercode = dimensiontable["member"].cat.categories.get_indexer([member])[0]
+                selected &= (membercodes == membercode) & (membercode >= 0)
+            matches[numpy.unique(contextcodes[selected])] += 1
+        keep = matches == len(members)
+    return facts[keep[facts["context"].cat.codes.to_numpy()]]
+
+
+def _xbrl_dimensions(outputframe, contextdata, memberdata):
+    """
+    Move the dimension members of every context to attrs["dimensions"], keyed by context
+    categories shared with the facts.
+    """
+
+    contextdtype = pandas.CategoricalDtype(sorted({row["context"] for row in contextdata}))
+    dimensionframe = outputframe.drop(columns=["segment"], errors="ignore")
+    dimensionframe["context"] = dimensionframe["context"].astype(contextdtype)
+
+    # A context repeating an axis keeps its first member, as an XBRL context may not
+    dimensiontable = pandas.DataFrame(memberdata, columns=["context", "axis", "member", "typed"])
+    dimensiontable = dimensiontable.drop_duplicates(["context", "axis"]).reset_index(drop=True)
+    dimensiontable["context"] = dimensiontable["context"].astype(contextdtype)
+    dimensiontable["axis"] = dimensiontable["axis"].astype("category")
+    dimensiontable["member"] = dimensiontable["member"].astype("category")
+    dimensiontable["typed"] = dimensiontable["typed"].astype(bool)
+    dimensionframe.attrs["dimensions"] = dimensiontable
+    return dimensionframe
+
+
+def _xbrl_typed(outputframe, numeric="float64"):
+    """
+    Convert the string columns of an xbrl_parse DataFrame to compact types.
+
+    Only facts carrying a unitRef are numeric in XBRL, so text that happens to look like a
+    number (i.e. dei:EntityCentralIndexKey '0000320193') is kept as text.
+    """
+
+    typedframe = outputframe.copy()
+    datavalue = typedframe["datavalue"]
+    isnumeric = typedframe["unitRef"].notna() if "unitRef" in typedframe else pandas.Series(False, index=typedframe.index)
+    if numeric == "decimal":
+        typedvalue = pandas.Series(
+            [_xbrl_decimal(value) if flag else None for value, flag in zip(datavalue, isnumeric)],
+            index=typedframe.index,
+            dtype=object,
+        )
+    else:
+        typedvalue = pandas.to_numeric(datavalue.where(isnumeric), errors="coerce").astype("float64")
+    typedframe["datatext"] = datavalue.where(~isnumeric)
+    typedframe["datavalue"] = typedvalue
+
+    for name in typedframe.columns:
+        if name in ("datavalue", "datatext"):
+            continue
+        if name in ("startDate", "endDate", "instant"):
+            typedframe[name] = _xbrl_dates(typedframe[name])
+        elif name == "decimals":
+            typedframe[name] = pandas.to_numeric(
+                typedframe[name].replace({"INF": "inf"}), errors="coerce"
+            ).astype("float64")
+        elif typedframe[name].dtype == object:
+            typedframe[name] = typedframe[name].astype("category")
+    return typedframe
+
+
+def _xbrl_decimal(value):
+    """
+    Return value as a decimal.Decimal, or None when it is not a number.
+    """
+
+    if pandas.isna(value):
+        return None
+    try:
+        return decimal.Decimal(str(value).strip())
+    except (decimal.InvalidOperation, ValueError):
+        return None
+
+
+def _xbrl_dates(values):
+    """
+    Parse xs:date / xs:dateTime strings into datetime64, parsing each distinct value once.
+    """
+
+    datecodes = pandas.Categorical(values)
+    categories = pandas.to_datetime(pandas.Series(datecodes.categories, dtype=object), errors="coerce")
+    # Missing values hold code -1, which picks the NaT appended at the end
+    return numpy.append(categories.to_numpy(dtype="datetime64[ns]"), numpy.datetime64("NaT"))[datecodes.codes]
+
+
+@instrumented
+def xbrl_iter_facts(path, chunksize=None, timeout_sec=15, con_headers=con_headers_default, cache=None, client=None):
+    """
+    The xbrl_iter_facts function streams the facts of an XBRL file or website url as they
+    are parsed, without materializing the full xbrl_parse DataFrame.
+
+    Args:
+        path (str): Filepath or website url corresponding to XBRL data.
+        chunksize (int, optional): If given, yield DataFrames of up to chunksize facts
+        instead of one dictionary per fact. Defaults to None.
+        timeout_sec: The time in seconds to wait for the server to respond
+        con_headers (dict): The headers to be sent with the initial request.
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (HttpClient, optional): Pooled & rate limited client sending the requests.
+        Defaults to the client installed with set_default_client.
+
+    Yields:
+        dict or pandas.DataFrame: One record per fact holding the non blank descriptive
+        columns of its context, the fact attributes (i.e. decimals, unitRef), the datacode
+        & the datavalue. Facts are yielded in document order; a fact that precedes the
+        definition of its context is held back until the context is read. With chunksize,
+        each DataFrame holds the columns present in that chunk with datacode & datavalue
+        rightmost.
+
+    Raises:
+        ValueError: If chunksize is not a positive integer, or a fact references a context
+        that is never defined.
+
+    Examples:
+        for fact in xbrl_iter_facts('aapl-20201226_htm.xml'):
+            print(fact['datacode'], fact['datavalue'])
+        for chunk in xbrl_iter_facts('aapl-20201226_htm.xml', chunksize=10000):
+            chunk.to_sql('facts', connection, if_exists='append')
+    """
+
+    if chunksize is not None and (not isinstance(chunksize, int) or chunksize < 1):
+        raise ValueError("chunksize must be a positive integer")
+
+    source = _xbrl_iterparse_source(path, timeout_sec=timeout_sec, con_headers=con_headers, cache=cache, client=client)
+    if source is None:
+        return
+    records = _xbrl_iter_records(source)
+    if chunksize is None:
+        yield from records
+        return
+
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunksize:
+            yield _xbrl_chunk_frame(chunk)
+            chunk = []
+    if chunk:
+        yield _xbrl_chunk_frame(chunk)
+
+
+def _xbrl_iter_records(source):
+    """
+    Join the streamed facts of an XBRL document to their contexts one record at a time.
+    """
 
-    # Pull a list of the descriptive columns to populate an empty dataframe
-    tag_listall = soup.find_all(xbrlcolumnprefilter)
-    empty_tag_list = soup.select("context")
     columnlist = []
-    for temp_tag in tag_listall:
-        if temp_tag.name not in list(numpy.unique(columnlist)):
-            columnlist.append(temp_tag.name)
+    contextlookup = {}
+    pendingfacts = {}
+    for event in _xbrl_iterparse_events(source, columnlist):
+        if event[0] == "context":
+            contextrow = {
+                columnname: value
+                for columnname, value in event[1].items()
+                if isinstance(value, str) and value != ""
+            }
+            contextlookup.setdefault(contextrow.get("context"), contextrow)
+            for fact in pendingfacts.pop(contextrow.get("context"), []):
+                yield _xbrl_fact_record(contextrow, fact)
+        elif event[2][0] in contextlookup:
+            yield _xbrl_fact_record(contextlookup[event[2][0]], event[2])
+        else:
+            pendingfacts.setdefault(event[2][0], []).append(event[2])
+
+    if pendingfacts:
+        raise ValueError("Undefined contextRef: " + str(list(pendingfacts)))
+
+
+def _xbrl_fact_record(contextrow, fact):
+    """
+    Combine a context row with a (contextRef, datacode, datavalue, attributes) fact.
+    """
+
+    contextref, datacode, datavalue, attributes = fact
+    record = dict(contextrow)
+    record.update((keyholder, value) for keyholder, value in attributes.items() if value != "")
+    record["datacode"] = datacode
+    record["datavalue"] = datavalue if datavalue != "" else numpy.nan
+    return record
+
+
+def _xbrl_chunk_frame(records):
+    """
+    Build a DataFrame chunk with the datacode & datavalue at the rightmost column.
+    """
+
+    chunkframe = pandas.DataFrame(records)
+    columnstitles = list(chunkframe.columns)
+    columnstitles.sort(key=lambda x: x in ("datacode", "datavalue"))
+    return chunkframe.reindex(columns=columnstitles)
 
-    columnlist = list(columnlist) + ["datacode", "datavalue"]
-    print(columnlist)
+
+def _xbrl_join(columnlist, contextdata, factdata):
+    """
+    Join every fact to the descriptive columns of its context.
+
+    Args:
+        columnlist (list): Descriptive columns followed by "datacode" & "datavalue".
+        contextdata (list): One dictionary of descriptive column values per context.
+        factdata (iterable): (contextRef, datacode, datavalue, attributes) per fact.
+
+    Returns:
+        list: One dictionary per fact.
+    """
+
+    contextframe = pandas.DataFrame(contextdata, columns=columnlist)
+
+    # Index the first record of each context once, so that every data point is joined to
+    # its context with a dictionary lookup rather than a scan of the full context frame
+    contextlookup = {}
+    for contextrow in contextframe.to_dict("records"):
+        contextlookup.setdefault(contextrow["context"], contextrow)
 
     data = []
-    for tag in tqdm(empty_tag_list, desc="Processing Unique Identifiers"):
-        row = {}
-        for columnname in columnlist:
-            if columnname == "context":
-                row[columnname] = tag.get("id")
-            else:
-                if tag.find(columnname):
-                    if not tag.find(columnname).findChild():
-                        row[columnname] = tag.find(columnname).text
-                    elif tag.find(columnname).findChild().name not in columnlist:
-                        row[columnname] = tag.find(columnname).findChild().text
-                    else:
-                        row[columnname] = numpy.nan
+    for contextref, datacode, datavalue, attributes in factdata:
+        row = dict(contextlookup[contextref])
+        row.update(attributes)
+        row["datacode"] = datacode
+        row["datavalue"] = datavalue
         data.append(row)
+    return data
 
-    outputframe = pandas.DataFrame(data, columns=columnlist)
 
-    data_for_tag_list = soup.findAll(attrs={"contextRef": not None})
+def _xbrl_parse_soup(path, timeout_sec=15, con_headers=con_headers_default, cache=None, client=None, dimensions=False):
+    """
+    Read the columns, contexts, facts & (with dimensions) the context members of an XBRL
+    document with BeautifulSoup.
+    """
 
-    data = []
-    for selectionchoice in tqdm(data_for_tag_list, desc="Processing Data Points"):
-        uniqueidentifier = selectionchoice.get("contextRef")
-        rawdataframe = outputframe[outputframe.context == uniqueidentifier].drop_duplicates(subset=["identifier"])
-        titleholder = str(selectionchoice.name)
-        outputvalueholder = str(selectionchoice.text)
-
-        row = rawdataframe.iloc[0].to_dict()
-        if pandas.isnull(row["datavalue"]) and pandas.isnull(row["datacode"]):
-            for keyholder in selectionchoice.attrs.keys():
-                if keyholder not in ["contextRef", "id"] and ":" not in keyholder:
-                    row[keyholder] = selectionchoice.get(keyholder)
-            row["datacode"] = titleholder
-            row["datavalue"] = outputvalueholder
+    websitedocument = xbrl_load(path, timeout_sec=timeout_sec, con_headers=con_headers, cache=cache, client=client)
+    if websitedocument is None:
+        return None
+    soup = BeautifulSoup(websitedocument, "xml")
+
+    # Pull a list of the descriptive columns to populate an empty dataframe
+    columnlist, contexttags, facttags = _xbrl_soup_discover(soup)
+    columnlist = columnlist + ["datacode", "datavalue"]
+    print(columnlist)
+
+    contextdata = [
+        _xbrl_soup_context_row(tag, columnlist)
+        for tag in tqdm(contexttags, desc="Processing Unique Identifiers")
+    ]
+
+    factdata = []
+    for selectionchoice in tqdm(facttags, desc="Processing Data Points"):
+        attributes = {
+            keyholder: attributevalue
+            for keyholder, attributevalue in selectionchoice.attrs.items()
+            if keyholder not in ["contextRef", "id"] and ":" not in keyholder
+        }
+        factdata.append(
+            (selectionchoice.get("contextRef"), str(selectionchoice.name), str(selectionchoice.text), attributes)
+        )
+
+    memberdata = []
+    if dimensions:
+        for tag in contexttags:
+            for membertag in tag.find_all(["explicitMember", "typedMember"]):
+                membervalue = membertag.find(True) if membertag.name == "typedMember" else membertag
+                memberdata.append((
+                    tag.get("id"), membertag.get("dimension"),
+                    (membervalue.text if membervalue is not None else "").strip(), membertag.name == "typedMember",
+                ))
+
+    return columnlist, contextdata, factdata, memberdata
+
+
+def _xbrl_soup_discover(soup):
+    """
+    Classify every tag of a BeautifulSoup XBRL document in one traversal.
+
+    Returns:
+        tuple: (columnlist, contexttags, facttags) where columnlist holds the names of the
+        unprefixed (default namespace) tags in order of appearance, except the document
+        wrappers, contexttags the context tags & facttags the tags carrying a contextRef,
+        both in document order.
+    """
+
+    excludednames = {"body", "xbrl", "html"}
+    # Whether a (name, prefix) pair is a descriptive column is decided once per pair
+    classified = set()
+    columnlist = []
+    contexttags = []
+    facttags = []
+    for tag in soup.find_all(True):
+        name = tag.name
+        key = (name, tag.prefix)
+        if key not in classified:
+            classified.add(key)
+            if tag.prefix == "" and name not in excludednames and ":" not in name:
+                columnlist.append(name)
+        if name == "context":
+            contexttags.append(tag)
+        if "contextRef" in tag.attrs:
+            facttags.append(tag)
+    return columnlist, contexttags, facttags
+
+
+def _xbrl_soup_context_row(tag, columnlist):
+    """
+    Build the descriptive column values of a single BeautifulSoup context tag.
+    """
+
+    # First descendant of every name, as tag.find(name) would return it
+    descendants = {}
+    for descendant in tag.find_all(True):
+        descendants.setdefault(descendant.name, descendant)
+
+    row = {}
+    for columnname in columnlist:
+        if columnname == "context":
+            row[columnname] = tag.get("id")
+        elif columnname in descendants:
+            columntag = descendants[columnname]
+            firstchild = columntag.find(True)
+            if firstchild is None:
+                row[columnname] = columntag.text
+            elif firstchild.name not in columnlist:
+                row[columnname] = firstchild.text
+            else:
+                row[columnname] = numpy.nan
+    return row
+
+
+def _xbrl_localname(element):
+    """
+    Strip the {namespace} from an lxml tag, mirroring the BeautifulSoup tag name.
+    """
+
+    return element.tag.rpartition("}")[2]
+
+
+def _xbrl_parse_iterparse(path, timeout_sec=15, con_headers=con_headers_default, cache=None, client=None, dimensions=False):
+    """
+    Read the columns, contexts, facts & (with dimensions) the context members of an XBRL
+    document in one streaming lxml pass.
+
+    The values returned match _xbrl_parse_soup: descriptive columns are the unprefixed
+    (default namespace) element names, contexts are resolved against the columns discovered
+    before them, and facts are the elements carrying a contextRef, in document order.
+    """
+
+    source = _xbrl_iterparse_source(path, timeout_sec=timeout_sec, con_headers=con_headers, cache=cache, client=client)
+    if source is None:
+        return None
+
+    columnlist = []
+    contextdata = []
+    factdata = []
+    memberdata = [] if dimensions else None
+    for event in _xbrl_iterparse_events(source, columnlist, memberdata):
+        if event[0] == "context":
+            contextdata.append(event[1])
         else:
-            filteredselection = [
-                k
-                for k in selectionchoice.attrs.keys()
-                if k not in ["contextRef", "id"] and ":" not in k
-            ]
-            for keyholder in filteredselection:
-                row[keyholder] = selectionchoice.get(keyholder)
-            row["datacode"] = titleholder
-            row["datavalue"] = outputvalueholder
-        data.append(row)
+            # Facts are emitted at their end tag, place them by the order of their start tag
+            position, fact = event[1], event[2]
+            factdata.extend([None] * (position + 1 - len(factdata)))
+            factdata[position] = fact
+
+    return columnlist + ["datacode", "datavalue"], contextdata, factdata, memberdata or []
+
+
+def _xbrl_iterparse_source(path, timeout_sec=15, con_headers=con_headers_default, cache=None, client=None):
+    """
+    Return a local file path as is, or the document content wrapped in a file object. Only
+    a path (str) source is parsed with lxml huge_tree.
+    """
+
+    if not isinstance(path, bytes) and os.path.isfile(path):
+        return path
+    websitedocument = xbrl_load(path, timeout_sec=timeout_sec, con_headers=con_headers, cache=cache, client=client)
+    if websitedocument is None:
+        return None
+    return io.BytesIO(websitedocument)
+
+
+def _xbrl_iterparse_events(source, columnlist, memberdata=None):
+    """
+    Stream the contexts & facts of an XBRL document with lxml iterparse.
+
+    Elements are cleared as soon as they are consumed, so the parse tree never holds more
+    than the top level element currently being read.
+
+    Args:
+        source: File path or file object of the XBRL document.
+        columnlist (list): Filled in place with the descriptive columns as they are found.
+        memberdata (list, optional): If given, filled in place with the members of every
+        context, as read by _xbrl_context_members.
+
+    Yields:
+        tuple: ("context", row) for every context, and
+        ("fact", position, (contextRef, datacode, datavalue, attributes)) for every fact,
+        where position is the document order of the fact.
+    """
+
+    columnset = {"body", "xbrl", "html"}
+    factcount = 0
+    openfacts = []
+    depth = 0
+    # libxml2's size & depth safety limits are only lifted for local files, never for
+    # downloaded documents
+    xmlparser = etree.iterparse(
+        source, events=("start", "end"), remove_comments=True, remove_pis=True, huge_tree=isinstance(source, str)
+    )
+    for event, element in tqdm(xmlparser, desc="Processing Elements"):
+        if event == "start":
+            depth += 1
+            localname = _xbrl_localname(element)
+            if element.prefix is None and element.tag[0] == "{" and localname not in columnset:
+                columnset.add(localname)
+                columnlist.append(localname)
+            if "contextRef" in element.attrib:
+                openfacts.append(factcount)
+                factcount += 1
+            continue
+
+        depth -= 1
+        if "contextRef" in element.attrib:
+            attributes = {
+                keyholder: attributevalue
+                for keyholder, attributevalue in element.attrib.items()
+                if keyholder not in ["contextRef", "id"] and keyholder[0] != "{"
+            }
+            yield "fact", openfacts.pop(), (
+                element.get("contextRef"), _xbrl_localname(element), "".join(element.itertext()), attributes
+            )
+        elif _xbrl_localname(element) == "context":
+            if memberdata is not None:
+                memberdata.extend(_xbrl_context_members(element))
+            yield "context", _xbrl_context_row(element, columnlist)
+
+        # Release every top level element once read, along with the emptied siblings
+        if depth == 1:
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
 
-    outputframe = pandas.DataFrame(data)
+def _xbrl_context_row(element, columnlist):
+    """
+    Build the descriptive column values of a single lxml context element.
+    """
+
+    row = {"context": element.get("id")}
+    for descendant in element.iterdescendants("*"):
+        columnname = _xbrl_localname(descendant)
+        if columnname in row or columnname not in columnlist:
+            continue
+        firstchild = next(descendant.iterchildren("*"), None)
+        if firstchild is None:
+            row[columnname] = "".join(descendant.itertext())
+        elif _xbrl_localname(firstchild) not in columnlist:
+            row[columnname] = "".join(firstchild.itertext())
+        else:
+            row[columnname] = numpy.nan
+    return row
+
+
+def _xbrl_context_members(element):
+    """
+    Return the (context, axis, member, typed) tuple of every xbrldi:explicitMember &
+    xbrldi:typedMember of an lxml context element, in document order.
+    """
+
+    contextid = element.get("id")
+    members = []
+    for memberelement in element.iter("{" + XBRLDI_NAMESPACE + "}explicitMember", "{" + XBRLDI_NAMESPACE + "}typedMember"):
+        typed = _xbrl_localname(memberelement) == "typedMember"
+        membervalue = next(memberelement.iterchildren("*"), None) if typed else memberelement
+        members.append((
+            contextid, memberelement.get("dimension"),
+            "".join(membervalue.itertext()).strip() if membervalue is not None else "", typed,
+        ))
+    return members
+
+
+def _xbrl_parse_ixbrl(path, timeout_sec=15, con_headers=con_headers_default, cache=None, client=None, dimensions=False):
+    """
+    Read the columns, contexts & facts of an inline XBRL document in one streaming lxml pass.
+
+    The descriptive columns are the local names of the xbrli elements of ix:resources, which
+    are the unprefixed columns of the derived instance document. Elements outside the ix
+    facts, continuations, contexts & units are cleared as soon as they are read, so the
+    parse tree stays small on very large filings.
+    """
 
-    # convert empty strings to NULL, & remove all columns with only NULL or blank values
-    outputframe = outputframe.replace("", numpy.nan).dropna(axis=1, how="all")
+    source = _xbrl_iterparse_source(path, timeout_sec=timeout_sec, con_headers=con_headers, cache=cache, client=client)
+    if source is None:
+        return None
+
+    ixtags = {}
+    for namespace in IX_NAMESPACES:
+        ixtags.update({"{" + namespace + "}" + localname: localname for localname in ["nonFraction", "nonNumeric", "continuation", "exclude"]})
+    keeptags = set(ixtags) | {"{" + XBRLI_NAMESPACE + "}context", "{" + XBRLI_NAMESPACE + "}unit"}
+
+    columnset = {"xbrl"}
+    columnlist = []
+    contextdata = []
+    factdata = []
+    memberdata = []
+    continuations = {}
+    chainedfacts = []
+    keepdepth = 0
+    # libxml2's size & depth safety limits are only lifted for local files, never for
+    # downloaded documents
+    xmlparser = etree.iterparse(
+        source, events=("start", "end"), remove_comments=True, remove_pis=True, huge_tree=isinstance(source, str)
+    )
+    for event, element in tqdm(xmlparser, desc="Processing Elements"):
+        tag = element.tag
+        if not isinstance(tag, str):
+            continue
+        if event == "start":
+            if tag in keeptags:
+                keepdepth += 1
+            if tag.startswith("{" + XBRLI_NAMESPACE + "}"):
+                localname = _xbrl_localname(element)
+                if localname not in columnset:
+                    columnset.add(localname)
+                    columnlist.append(localname)
+            continue
+
+        if tag in keeptags:
+            keepdepth -= 1
+            ixname = ixtags.get(tag)
+            if ixname in ("nonFraction", "nonNumeric"):
+                fact = _ixbrl_fact(element, ixname, ixtags)
+                if element.get("continuedAt"):
+                    chainedfacts.append((len(factdata), element.get("continuedAt"), element.get("escape") in ("true", "1")))
+                factdata.append(fact)
+            elif ixname == "continuation":
+                continuations[element.get("id")] = (
+                    _ixbrl_content(element, ixtags, element.get("escape") in ("true", "1")),
+                    _ixbrl_content(element, ixtags, False),
+                    element.get("continuedAt"),
+                )
+            elif _xbrl_localname(element) == "context":
+                contextdata.append(_xbrl_context_row(element, columnlist))
+                if dimensions:
+                    memberdata.extend(_xbrl_context_members(element))
+
+        # Release every element read outside of a fact, continuation, context or unit
+        if keepdepth == 0:
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    # Continuations may follow the fact they continue anywhere in the document
+    for position, continuedat, escape in chainedfacts:
+        contextref, datacode, datavalue, attributes = factdata[position]
+        parts = [datavalue]
+        seen = set()
+        while continuedat and continuedat not in seen and continuedat in continuations:
+            seen.add(continuedat)
+            markup, text, continuedat = continuations[continuedat]
+            parts.append(markup if escape else text)
+        datavalue = "".join(parts) if escape else " ".join(" ".join(parts).split())
+        factdata[position] = (contextref, datacode, datavalue, attributes)
+
+    return columnlist + ["datacode", "datavalue"], contextdata, factdata, memberdata
+
+
+def _ixbrl_fact(element, ixname, ixtags):
+    """
+    Build the (contextRef, datacode, datavalue, attributes) tuple of an ix:nonFraction or
+    ix:nonNumeric element, with the fact value as it reads in the derived instance.
+    """
+
+    attributes = {
+        keyholder: element.get(keyholder) for keyholder in ["decimals", "unitRef"] if element.get(keyholder) is not None
+    }
+    datacode = element.get("name", "").rpartition(":")[2]
+    transform = element.get("format", "").rpartition(":")[2]
+    if element.get(XSI_NIL) in ("true", "1"):
+        datavalue = ""
+    elif ixname == "nonFraction":
+        datavalue = _ixbrl_number(
+            _ixbrl_content(element, ixtags, False), transform, element.get("scale"), element.get("sign") == "-"
+        )
+    elif element.get("escape") in ("true", "1"):
+        datavalue = _ixbrl_content(element, ixtags, True)
+    else:
+        datavalue = _ixbrl_text(" ".join(_ixbrl_content(element, ixtags, False).split()), transform)
+    return element.get("contextRef"), datacode, datavalue, attributes
 
-    # Reorder the columns to present the datacode & datavalue at the rightmost column
-    columnstitles = list(outputframe.columns)
-    columnstitles.sort(key=lambda x: x == "datacode")
-    columnstitles.sort(key=lambda x: x == "datavalue")
-    outputframe = outputframe.reindex(columns=columnstitles)
 
-    return outputframe.sort_values(by=["context"])
+def _ixbrl_content(element, ixtags, escape):
+    """
+    Return the content of an ix element without its ix:exclude parts: the text, or with
+    escape the XHTML markup with the nested ix tags unwrapped & no namespace prefixes.
+    """
+
+    if not escape:
+        parts = [element.text or ""]
+        for child in element.iterchildren():
+            if ixtags.get(child.tag) != "exclude":
+                parts.append(_ixbrl_content(child, ixtags, False))
+            parts.append(child.tail or "")
+        return "".join(parts)
+
+    content = copy.deepcopy(element)
+    for excluded in [child for child in content.iter() if ixtags.get(child.tag) == "exclude"]:
+        excluded.getparent().remove(excluded)
+    etree.strip_tags(content, *ixtags)
+    for child in content.iter("{" + XHTML_NAMESPACE + "}*"):
+        child.tag = _xbrl_localname(child)
+    markup = (content.text or "") + "".join(
+        etree.tostring(child, encoding="unicode", with_tail=True) for child in content.iterchildren()
+    )
+    # Every serialized child repeats the namespace declarations of the document
+    return re.sub(r' xmlns(:[\w.-]+)?="[^"]*"', "", markup)
+
+
+def _ixbrl_number(text, transform, scale, negative):
+    """
+    Apply the format, scale & sign of an ix:nonFraction to its displayed text.
+    """
+
+    text = text.strip()
+    if transform in ("fixed-zero", "zerodash", "fixedzero"):
+        number = "0"
+    elif transform in ("num-comma-decimal", "numcommadecimal", "numdotcomma", "numspacecomma"):
+        number = re.sub(r"[^0-9,]", "", text).replace(",", ".")
+    elif transform in ("num-unit-decimal", "numunitdecimal", "num-unit-decimal-en"):
+        digits = re.findall(r"[0-9]+", text)
+        number = digits[0] + ("." + digits[1].rjust(2, "0") if len(digits) > 1 else "") if digits else ""
+    elif transform in ("numwordsen", "num-word-en"):
+        number = _ixbrl_number_words(text)
+    else:
+        # num-dot-decimal, numcommadot, numspacedot & the untransformed number
+        number = re.sub(r"[^0-9.]", "", text) if transform or not re.fullmatch(r"-?[0-9.]+", text) else text
+    if text in ("-", "—", "–") and not transform:
+        number = "0"
+    try:
+        value = decimal.Decimal(number)
+    except (decimal.InvalidOperation, ValueError):
+        return text
+    if scale:
+        value = value.scaleb(int(scale))
+    if negative:
+        value = -value
+    return format(value, "f")
+
+
+def _ixbrl_number_words(text):
+    """
+    Convert an English number in words (i.e. 'one hundred twenty') to digits.
+    """
+
+    words = re.findall(r"[a-z]+", text.lower())
+    total, current = 0, 0
+    for word in words:
+        if word in IXBRL_NUMBER_WORDS:
+            current += IXBRL_NUMBER_WORDS[word]
+        elif word == "hundred":
+            current *= 100
+        elif word in ("thousand", "million", "billion", "trillion"):
+            total += current * 10 ** (3 * ["thousand", "million", "billion", "trillion"].index(word) + 3)
+            current = 0
+        elif word != "and":
+            return ""
+    return str(total + current) if words else ""
+
+
+def _ixbrl_text(text, transform):
+    """
+    Apply the format of an ix:nonNumeric to its displayed text: booleans & dates are
+    returned in their XML Schema form, any other text as is.
+    """
+
+    if transform in ("fixed-true", "booleantrue"):
+        return "true"
+    if transform in ("fixed-false", "booleanfalse"):
+        return "false"
+    if transform == "boolballotbox":
+        return "true" if "\u2612" in text or "\u2611" in text else "false"
+    for order, transforms in IXBRL_DATE_FORMATS.items():
+        if transform in transforms:
+            return _ixbrl_date(text, order) or text
+    return text
+
+
+def _ixbrl_date(text, order):
+    """
+    Read a date with day, month & year in the given order into xs:date (ymd),
+    xs:gYearMonth (ym) or xs:gMonthDay (md).
+    """
+
+    tokens = re.findall(r"[A-Za-z]+|[0-9]+", text)
+    months = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+    values = {}
+    for part, token in zip(order, tokens):
+        if part == "m" and token.isalpha():
+            if token[:3].lower() not in months:
+                return None
+            values["m"] = months.index(token[:3].lower()) + 1
+        elif token.isdigit():
+            values[part] = int(token)
+        else:
+            return None
+    if len(values) != len(order):
+        return None
+    if "y" in values and values["y"] < 100:
+        values["y"] += 2000
+    if "d" not in values:
+        return f"{values['y']:04d}-{values['m']:02d}"
+    if "y" not in values:
+        return f"--{values['m']:02d}-{values['d']:02d}"
+    return f"{values['y']:04d}-{values['m']:02d}-{values['d']:02d}"
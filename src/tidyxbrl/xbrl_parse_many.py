@@ -0,0 +1,142 @@
+"""
+Function to parse many raw XBRL files from websites or file paths in parallel.
+"""
+
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import pandas
+from tqdm import tqdm
+from tidyxbrl.xbrl_parse import xbrl_load, xbrl_parse
+from tidyxbrl.instrumentation import instrumented
+from src.config.default_headers import con_headers_default
+
+
+@instrumented
+def xbrl_parse_many(
+    paths,
+    workers=None,
+    engine="soup",
+    concat=True,
+    download_workers=4,
+    timeout_sec=15,
+    con_headers=con_headers_default,
+    cache=None,
+    client=None,
+    typed=False,
+    numeric="float64",
+):
+    """
+    The xbrl_parse_many function parses many XBRL files or website urls with xbrl_parse,
+    spreading the parse work over a pool of processes.
+
+    Website urls are downloaded on a pool of threads while earlier filings are parsed, and
+    local files are read directly by the parsing processes. A filing that fails to
+    download or parse is reported without aborting the rest of the batch.
+
+    Args:
+        paths (list): Filepaths or website urls corresponding to XBRL data.
+        workers (int, optional): Number of parsing processes. Defaults to the CPU count.
+        engine (str, optional): xbrl_parse engine, 'soup', 'iterparse' or 'ixbrl'. Defaults to "soup".
+        concat (bool, optional): If True, return a single DataFrame. If False, return a
+        dictionary keyed by path. Defaults to True.
+        download_workers (int, optional): Number of concurrent downloads. Defaults to 4.
+        timeout_sec: The time in seconds to wait for the server to respond
+        con_headers (dict): The headers to be sent with the initial request.
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (HttpClient, optional): Pooled & rate limited client sending the requests.
+        Defaults to the client installed with set_default_client.
+        typed (bool, optional): If True, parse into compact typed columns, as in
+        xbrl_parse. Defaults to False.
+        numeric (str, optional): Type of the typed datavalue column, 'float64' or
+        'decimal'. Defaults to "float64".
+
+    Returns:
+        pandas.DataFrame: (concat = True) The xbrl_parse output of every filing that was
+        parsed, in the order of paths, with the source path in the leading "filing" column.
+        Failed filings are listed in attrs["failures"] as {path: error message}.
+
+        dict: (concat = False) {path: xbrl_parse DataFrame} in the order of paths, where
+        failed filings hold the exception that was raised instead.
+
+    Examples:
+        xbrl_parse_many(['aapl-20201226_htm.xml', 'ibm-20191231x10k2af531_htm.xml'], workers=2)
+        xbrl_parse_many(glob.glob('filings/*.xml'), engine='iterparse', concat=False)
+    """
+
+    paths = list(dict.fromkeys(paths))
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as processpool, ThreadPoolExecutor(
+        max_workers=download_workers
+    ) as downloadpool:
+        parsefutures = {}
+        downloadfutures = {}
+        for path in paths:
+            if os.path.isfile(path):
+                parsefutures[processpool.submit(_xbrl_parse_worker, path, engine, typed, numeric)] = path
+            else:
+                downloadfutures[downloadpool.submit(_xbrl_load_worker, path, timeout_sec, con_headers, cache, client)] = path
+
+        # Hand each download to the parsing processes as soon as it arrives
+        for future in as_completed(downloadfutures):
+            path = downloadfutures[future]
+            try:
+                parsefutures[processpool.submit(_xbrl_parse_worker, future.result(), engine, typed, numeric)] = path
+            except Exception as exc:
+                results[path] = exc
+
+        for future in tqdm(as_completed(parsefutures), total=len(parsefutures), desc="Processing Filings"):
+            path = parsefutures[future]
+            try:
+                results[path] = future.result()
+            except Exception as exc:
+                results[path] = exc
+
+    failures = {path: result for path, result in results.items() if isinstance(result, Exception)}
+    for path, exc in failures.items():
+        print(f"Error: {path}: {exc}")
+
+    if not concat:
+        return {path: results[path] for path in paths}
+
+    outputframes = [
+        results[path].assign(filing=path)
+        for path in paths
+        if path not in failures
+    ]
+    if outputframes:
+        categoricals = [name for name in outputframes[0].columns if isinstance(outputframes[0][name].dtype, pandas.CategoricalDtype)]
+        outputframe = pandas.concat(outputframes, ignore_index=True)
+        # Filings hold different categories, which concat turns into object columns
+        for name in categoricals:
+            outputframe[name] = outputframe[name].astype("category")
+        outputframe = outputframe.reindex(columns=["filing"] + [c for c in outputframe.columns if c != "filing"])
+    else:
+        outputframe = pandas.DataFrame(columns=["filing"])
+    outputframe.attrs["failures"] = {path: f"{type(exc).__name__}: {exc}" for path, exc in failures.items()}
+    return outputframe
+
+
+def _xbrl_load_worker(path, timeout_sec, con_headers, cache, client):
+    """
+    Download a single filing, raising instead of returning None on failure.
+    """
+
+    document = xbrl_load(path, timeout_sec=timeout_sec, con_headers=con_headers, cache=cache, client=client)
+    if document is None:
+        raise ValueError(f"Unable to read {path}")
+    return document
+
+
+def _xbrl_parse_worker(document, engine, typed=False, numeric="float64"):
+    """
+    Parse a single filing inside a worker process without progress output.
+    """
+
+    with contextlib.redirect_stdout(io.StringIO()) as message, contextlib.redirect_stderr(io.StringIO()):
+        outputframe = xbrl_parse(document, engine=engine, typed=typed, numeric=numeric)
+    if outputframe is None:
+        raise ValueError(message.getvalue().strip().removeprefix("Error: ") or "Unable to read filing")
+    return outputframe
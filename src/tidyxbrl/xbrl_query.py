@@ -5,17 +5,31 @@ https://xbrlus.github.io/xbrl-api/
 Query functions for the XBRL API
 """
 
+import re
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 import pandas
-import requests
+from tidyxbrl.http_cache import cached_request
+from tidyxbrl.instrumentation import instrumented
 from src.config.default_headers import con_headers_default
 
+# Characters of the fields syntax (i.e. "fact.value,report.limit(20)") left unescaped
+XBRL_QUERY_SAFE = ",()*:"
 
+
+@instrumented
 def xbrl_query(
     access_token,
     queryparameters,
     baseapiurl="https://api.xbrl.us/api/v1/report/search?",
     timeout_sec = 15,
-    con_headers = con_headers_default
+    con_headers = con_headers_default,
+    cache = None,
+    client = None,
+    paginate = False,
+    page_limit = None,
+    max_pages = None,
+    workers = 4
 ):
     """
     https://xbrl.us/home/use/xbrl-api/
@@ -26,14 +40,25 @@ def xbrl_query(
 
     Args:
         access_token: Access token string generated in the xbrl_apikey function. Found in the
-        access_token column of the response dataframe.
+        access_token column of the response dataframe. An XbrlTokenManager can be passed
+        instead, which renews the token as it expires.
         baseapiurl: API request URL corresponding to the type of request prior to passing any
         parameters. This is everything up-to and including the "?" in the API request
             - 'https://api.xbrl.us/api/v1/report/search?'
             - 'https://api.xbrl.us/api/v1/fact/search?'
         queryparameters: Dictionary structure to specify each aspect of the api request (See the
-        Examples section below)
+        Examples section below). The values are url encoded & the dictionary is left unchanged.
         con_headers (dict): The headers to be sent with the initial request.
+        cache (ResponseCache, optional): Response cache to read from & store in. Defaults to
+        the cache installed with set_default_cache.
+        client (HttpClient, optional): Pooled & rate limited client sending the requests.
+        Defaults to the client installed with set_default_client.
+        paginate (bool, optional): If True, follow the paging of the response & return the
+        rows of every page. Defaults to False, a single request.
+        page_limit (int, optional): Rows requested per page, set as <object>.limit(n) in
+        fields. Defaults to the limit in fields, or else the limit reported by the API.
+        max_pages (int, optional): Maximum number of pages to pull. Defaults to every page.
+        workers (int, optional): Pages requested at the same time. Defaults to 4.
 
     Outputs:
         xbrl_queryoutput: Pandas Dataframe object corresponding to the fields specified in the
@@ -47,31 +72,196 @@ def xbrl_query(
                                         report.base-taxonomy,report.document-type,report.accession,
                                         entity.ticker,report.sic-code,entity.cik,report.entry-type,
                                         report.period-end,report.sec-url,report.checks-run,
+        - xbrl_query(access_token=xbrl_apikeyoutput.access_token.values[0],
+                    baseapiurl='https://api.xbrl.us/api/v1/fact/search?',
+                    queryparameters = {'entity.cik': "0000320193",
+                                        'fields': "fact.value,concept.local-name,period.fiscal-year"},
+                    paginate=True, page_limit=2000)
+    """
+
+    if not paginate:
+        dataresponse = _xbrl_query_send(
+            access_token, _xbrl_query_url(baseapiurl, queryparameters), timeout_sec, con_headers, cache, client
+        )
+        return pandas.DataFrame.from_dict(_xbrl_query_data(dataresponse)["data"])
+
+    pages = list(
+        xbrl_query_pages(
+            access_token, queryparameters, baseapiurl, timeout_sec=timeout_sec, con_headers=con_headers,
+            cache=cache, client=client, page_limit=page_limit, max_pages=max_pages, workers=workers,
+        )
+    )
+    return pandas.concat(pages, ignore_index=True)
+
+
+@instrumented
+def xbrl_query_pages(
+    access_token,
+    queryparameters,
+    baseapiurl="https://api.xbrl.us/api/v1/report/search?",
+    timeout_sec=15,
+    con_headers=con_headers_default,
+    cache=None,
+    client=None,
+    page_limit=None,
+    max_pages=None,
+    workers=4,
+):
+    """
+    The xbrl_query_pages function yields the pages of an xbrl_query one DataFrame at a time,
+    in offset order.
+
+    The first page reports the page limit, which caps the limit requested. The API does not
+    report the total row count, so the following pages are requested workers at a time and
+    the paging stops at the first page holding fewer rows than the limit. Only the pages of one such window are held in
+    memory.
+
+    Args:
+        access_token, queryparameters, baseapiurl, timeout_sec, con_headers, cache & client
+        are passed as in xbrl_query.
+        page_limit (int, optional): Rows requested per page, capped by the limit reported by
+        the API. Defaults to the limit in fields, or else the limit reported by the API.
+        max_pages (int, optional): Maximum number of pages to pull. Defaults to every page.
+        workers (int, optional): Pages requested at the same time. Defaults to 4.
+
+    Yields:
+        pandas.DataFrame: The rows of one page.
+
+    Raises:
+        ValueError: If a page cannot be pulled.
+
+    Examples:
+        for page in xbrl_query_pages(access_token, {'entity.cik': "0000320193",
+                                                    'fields': "fact.value,concept.local-name"},
+                                     'https://api.xbrl.us/api/v1/fact/search?'):
+            page.to_sql("facts", connection, if_exists="append")
+    """
+
+    queryparameters = dict(queryparameters)
+    objectname = _xbrl_query_object(baseapiurl)
+    fields = str(queryparameters.get("fields", ""))
+    limit = page_limit or _xbrl_query_paging_field(fields, objectname, "limit")
+    offset = _xbrl_query_paging_field(fields, objectname, "offset") or 0
+
+    def pull_page(pageoffset):
+        pageparameters = dict(
+            queryparameters, fields=_xbrl_query_paging(fields, objectname, limit, pageoffset)
+        )
+        dataresponse = _xbrl_query_send(
+            access_token, _xbrl_query_url(baseapiurl, pageparameters), timeout_sec, con_headers, cache, client
+        )
+        return _xbrl_query_data(dataresponse)
+
+    firstpage = pull_page(offset)
+    rows = firstpage.get("data") or []
+    paging = firstpage.get("paging") or {}
+    # The API caps the page size, so the limit it reports wins over a larger one requested
+    reportedlimit = int(paging.get("limit") or 0)
+    if reportedlimit and (not limit or reportedlimit < limit):
+        limit = reportedlimit
+    limit = limit or len(rows)
+    yield pandas.DataFrame.from_dict(rows)
+    pagecount = 1
+    done = not limit or len(rows) < limit
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as threadpool:
+        while not done:
+            window = max(1, workers)
+            if max_pages is not None:
+                window = min(window, max_pages - pagecount)
+            if window <= 0:
+                break
+            offsets = [offset + limit * (pagecount + i) for i in range(window)]
+            futures = [threadpool.submit(pull_page, pageoffset) for pageoffset in offsets]
+            for future in futures:
+                rows = future.result().get("data") or []
+                pagecount += 1
+                if rows:
+                    yield pandas.DataFrame.from_dict(rows)
+                if len(rows) < limit:
+                    # The pages requested past the last one come back empty
+                    done = True
+                    break
+
+
+def _xbrl_query_url(baseapiurl, queryparameters):
+    """
+    Build the request url from the base url & url encoded query parameters.
+    """
+
+    querystring = urllib.parse.urlencode(
+        {key: str(value) for key, value in queryparameters.items()},
+        safe=XBRL_QUERY_SAFE,
+        quote_via=urllib.parse.quote,
+    )
+    separator = "" if baseapiurl.endswith(("?", "&")) else ("&" if "?" in baseapiurl else "?")
+    return baseapiurl + separator + querystring
+
+
+def _xbrl_query_object(baseapiurl):
+    """
+    Return the object of an API url, i.e. 'fact' for https://api.xbrl.us/api/v1/fact/search?
+    """
+
+    path = urllib.parse.urlparse(baseapiurl).path
+    match = re.search(r"/api/v\d+/([a-z-]+)", path)
+    return match.group(1) if match else "fact"
+
+
+def _xbrl_query_paging_field(fields, objectname, name):
+    """
+    Return the n of <object>.limit(n) or <object>.offset(n) in fields, or None.
+    """
+
+    match = re.search(re.escape(objectname) + r"\." + name + r"\((\d+)\)", fields)
+    return int(match.group(1)) if match else None
+
+
+def _xbrl_query_paging(fields, objectname, limit, offset):
+    """
+    Replace the <object>.limit & <object>.offset entries of fields.
+    """
+
+    entries = [
+        entry for entry in fields.split(",")
+        if entry and not re.fullmatch(re.escape(objectname) + r"\.(limit|offset)\(\d*\)", entry.strip())
+    ]
+    if limit:
+        entries.append(f"{objectname}.limit({limit})")
+    entries.append(f"{objectname}.offset({offset})")
+    return ",".join(entries)
+
+
+def _xbrl_query_send(access_token, dataquery, timeout_sec, con_headers, cache, client):
+    """
+    Send an authenticated GET request to the API. With a token manager, a request
+    rejected with 401 is sent once more with a renewed token.
+    """
+
+    tokenmanager = access_token if hasattr(access_token, "get_token") else None
+    for attempt in range(2 if tokenmanager else 1):
+        token = tokenmanager.get_token() if tokenmanager else access_token
+        # Generate the authentication bearer tolken
+        headers = {**con_headers, **{"Authorization": "Bearer " + token}}
+        dataresponse = cached_request("GET", dataquery, headers=headers, timeout_sec=timeout_sec, cache=cache, client=client)
+        if dataresponse.status_code != 401 or not tokenmanager:
+            break
+        tokenmanager.invalidate(token)
+    return dataresponse
+
+
+def _xbrl_query_data(dataresponse):
+    """
+    Check the Response Code & return the decoded response.
     """
 
-    # Modify the queryparameter keys to create a web request string in dataquery
-    # Add the "=" sign between keys and values
-    for keyholder in list(queryparameters.keys()):
-        queryparameters[keyholder + "="] = queryparameters[keyholder]
-        del queryparameters[keyholder]
-    # Add the "&" sign between keys
-    queryurl = "".join(
-        [f"{key}{value}&" for key, value in queryparameters.items()]
-    )[:-1]
-    # Add the baseurl and modified request values
-    dataquery = str(baseapiurl + queryurl)
-    # Generate the authentication bearer tolken
-    headers =  {**con_headers, **{"Authorization": "Bearer " + access_token}}
-    # Generate the response
-    dataresponse = requests.get(url=dataquery, headers=headers, timeout=timeout_sec)
-    # Check the Response Code
-    if dataresponse.status_code == 200:
-        try:
-            xbrl_queryoutput = pandas.DataFrame.from_dict(dataresponse.json()["data"])
-        except Exception as exc:
-            raise ValueError(str(dataresponse.json())) from exc
-    else:
-        xbrl_queryoutput = dataresponse.status_code
+    if dataresponse.status_code != 200:
         print(dataresponse.text)
-        raise ValueError(str(xbrl_queryoutput) + ": Error in Response")
-    return xbrl_queryoutput
+        raise ValueError(str(dataresponse.status_code) + ": Error in Response")
+    try:
+        data = dataresponse.json()
+    except ValueError as exc:
+        raise ValueError(str(dataresponse.text)) from exc
+    if not isinstance(data, dict) or "data" not in data:
+        raise ValueError(str(data))
+    return data
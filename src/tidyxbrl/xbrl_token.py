@@ -0,0 +1,206 @@
+"""
+https://xbrl.us/home/use/xbrl-api/access-token/
+
+Access token management for the XBRL US API.
+
+An access token of the XBRL US API expires after an hour, and the refresh token that comes
+with it can renew the access token without sending the password again. XbrlTokenManager
+holds the token of one account, in memory and optionally in a file, and renews it with the
+refresh_token grant shortly before it expires. xbrl_query accepts the manager in place of
+an access token string:
+
+    tokens = tidyxbrl.XbrlTokenManager(username, password, client_id, client_secret,
+                                       path='~/.cache/tidyxbrl/xbrl_token.json')
+    tidyxbrl.xbrl_query(tokens, queryparameters, paginate=True)
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from tidyxbrl.xbrl_apikey import xbrl_apikey
+
+
+class XbrlTokenManager:
+    """
+    The XbrlTokenManager class hands out a valid XBRL US API access token, requesting a
+    new one only when the current token is about to expire.
+
+    Tokens are requested with the password grant once, then renewed with the refresh_token
+    grant while the refresh token is valid. The renewal happens under a lock, so that
+    threads & coroutines sharing a manager send a single token request.
+
+    Args:
+        username (str): Email address corresponding to the xbrl.us api website.
+        password (str): Password corresponding to the xbrl.us api website.
+        client_id (str): Active public Client ID.
+        client_secret (str): Secret ID corresponding to the client_id.
+        platform (str, optional): Keyword to distinguish if the user is authenticating from
+        different applications. Defaults to "pc".
+        path (str, optional): JSON file keeping the token between processes. Defaults to
+        None, the token is only kept in memory.
+        refresh_margin (int, optional): Seconds before expiry at which a token is renewed.
+        Defaults to 60.
+        timeout_sec: The time in seconds to wait for the server to respond
+        client (HttpClient, optional): Pooled & rate limited client sending the requests.
+        Defaults to the client installed with set_default_client.
+
+    Attributes:
+        token (dict): access_token, refresh_token, expires_at & refresh_expires_at (epoch
+        seconds) of the current token, or an empty dictionary.
+
+    Examples:
+        tokens = XbrlTokenManager('username', 'password', 'client_id', 'client_secret')
+        tokens.get_token()
+        xbrl_query(tokens, {'fields': 'report.id,report.entity-name'})
+    """
+
+    def __init__(
+        self,
+        username,
+        password,
+        client_id,
+        client_secret,
+        platform="pc",
+        path=None,
+        refresh_margin=60,
+        timeout_sec=15,
+        client=None,
+    ):
+        self.username = username
+        self.password = password
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.platform = platform
+        self.path = os.path.expanduser(path) if path else None
+        self.refresh_margin = refresh_margin
+        self.timeout_sec = timeout_sec
+        self.client = client
+        self.token = {}
+        self._lock = threading.Lock()
+        if self.path and os.path.isfile(self.path):
+            self.load()
+
+    def get_token(self):
+        """
+        Return a valid access token, renewing it first when it expires within
+        refresh_margin seconds.
+
+        Raises:
+            ValueError: If no token could be obtained.
+        """
+
+        token = self.token
+        if self._valid(token):
+            return token["access_token"]
+        with self._lock:
+            # Another thread may have renewed the token while this one waited
+            if not self._valid(self.token):
+                self._renew()
+            return self.token["access_token"]
+
+    async def aget_token(self):
+        """
+        Asynchronous counterpart of get_token. A renewal runs on a worker thread, so the
+        event loop is not blocked.
+        """
+
+        token = self.token
+        if self._valid(token):
+            return token["access_token"]
+        return await asyncio.to_thread(self.get_token)
+
+    def invalidate(self, access_token=None):
+        """
+        Discard the current access token, i.e. after the API rejected it. With access_token,
+        the token is only discarded if it is still the current one, so that concurrent
+        callers rejected with the same token renew it once.
+        """
+
+        with self._lock:
+            if self.token and (access_token is None or self.token.get("access_token") == access_token):
+                self.token = dict(self.token, expires_at=0)
+
+    def save(self, path=None):
+        """
+        Write the token to a JSON file readable by the owner only.
+        """
+
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        stored = dict(self.token, username=self.username, client_id=self.client_id, platform=self.platform)
+        temporarypath = path + ".tmp"
+        with open(os.open(temporarypath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as file:
+            json.dump(stored, file)
+        os.replace(temporarypath, path)
+
+    def load(self, path=None):
+        """
+        Read a token written by save. A token of another account is ignored.
+        """
+
+        try:
+            with open(path or self.path, "r", encoding="utf-8") as file:
+                stored = json.load(file)
+        except (OSError, ValueError):
+            return
+        account = (stored.get("username"), stored.get("client_id"), stored.get("platform"))
+        if account == (self.username, self.client_id, self.platform) and stored.get("access_token"):
+            self.token = {
+                key: stored.get(key) for key in ["access_token", "refresh_token", "expires_at", "refresh_expires_at"]
+            }
+
+    def _valid(self, token):
+        """
+        Return True when token is set & does not expire within refresh_margin seconds.
+        """
+
+        return bool(token) and token.get("expires_at", 0) - self.refresh_margin > time.time()
+
+    def _renew(self):
+        """
+        Request a new token, with the refresh_token grant when possible and the password
+        grant otherwise.
+        """
+
+        credentials = {
+            "username": self.username,
+            "password": self.password,
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "platform": self.platform,
+            "timeout_sec": self.timeout_sec,
+            "client": self.client,
+        }
+        response = None
+        refreshtoken = self.token.get("refresh_token")
+        if refreshtoken and (self.token.get("refresh_expires_at") or 0) - self.refresh_margin > time.time():
+            try:
+                response = xbrl_apikey(grant_type="refresh_token", refresh_token=refreshtoken, **credentials)
+            except ValueError:
+                # A revoked refresh token falls back to the password grant
+                response = None
+        if response is None:
+            response = xbrl_apikey(grant_type="password", **credentials)
+
+        issued = time.time()
+        record = response.iloc[0]
+        if not record.get("access_token"):
+            raise ValueError("No access_token in response: " + str(record.to_dict()))
+        refreshexpiresin = record.get("refresh_token_expires_in")
+        self.token = {
+            "access_token": str(record["access_token"]),
+            "refresh_token": str(record.get("refresh_token") or refreshtoken or ""),
+            "expires_at": issued + float(record.get("expires_in") or 0),
+            # A refresh response may leave the refresh token & its expiry unchanged
+            "refresh_expires_at": issued + float(refreshexpiresin)
+            if refreshexpiresin
+            else self.token.get("refresh_expires_at", 0),
+        }
+        if self.path:
+            self.save()
+
+    def __repr__(self):
+        remaining = max(0, int(self.token.get("expires_at", 0) - time.time())) if self.token else 0
+        return f"<XbrlTokenManager {self.username}: token valid for {remaining}s>"
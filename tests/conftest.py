@@ -2,3 +2,80 @@ import sys
 import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubServer:
+    """
+    Local HTTP server for offline tests. routes maps a path to a (status, headers, body)
+    tuple, or to a callable of the request handler returning one. Every request is
+    recorded in requests as (method, path, headers).
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        stub = self
+
+        class StubHandler(BaseHTTPRequestHandler):
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.body = self.rfile.read(length) if length else b""
+                stub.requests.append((self.command, self.path, dict(self.headers)))
+                route = stub.routes.get(self.path.split("?")[0], (404, {}, b"not found"))
+                status, headers, body = route(self) if callable(route) else route
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def count(self, path):
+        return sum(1 for request in self.requests if request[1].split("?")[0] == path)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def tidy_facts():
+    """
+    Return a loader of the companyfacts fixture as tidy facts: tidy_facts(cik) gives the
+    edgar_query(..., tidy=True) rows of the sample, attributed to cik.
+    """
+
+    from src.tidyxbrl.edgar_query import _edgar_query_tidy
+
+    factspath = os.path.join(os.path.dirname(__file__), "fixtures", "companyfacts_sample.json")
+    with open(factspath, "r", encoding="utf-8") as file:
+        sampletext = file.read()
+
+    def load(cik):
+        return _edgar_query_tidy(dict(json.loads(sampletext), cik=cik))
+
+    return load
@@ -0,0 +1,99 @@
+# %%
+import sys
+import os
+import asyncio
+import json
+import threading
+import time
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.tidyxbrl import AsyncHttpClient, ResponseCache, SQLiteCacheBackend, aedgar_query_many, axbrl_parse, xbrl_parse
+
+samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+factspath = os.path.join(os.path.dirname(__file__), "fixtures", "companyfacts_sample.json")
+
+# %%
+
+def test_async_http_client_retry(stub_server):
+    attempts = []
+    def flaky(handler):
+        attempts.append(handler.path)
+        if len(attempts) < 3:
+            return 503, {}, b"unavailable"
+        return 200, {}, b"ok"
+    stub_server.routes["/flaky"] = flaky
+
+    async def fetch():
+        async with AsyncHttpClient(rate_limit=None, max_retries=3, backoff_factor=0.01) as client:
+            response = await client.request("GET", stub_server.url + "/flaky")
+            return response, client.stats
+
+    response, stats = asyncio.run(fetch())
+    assert response.status_code == 200, "The request should succeed after retrying"
+    assert stats["retries"] == 2, "Two failed attempts should be retried"
+
+def test_axbrl_parse(stub_server):
+    with open(samplepath, "rb") as file:
+        stub_server.routes["/aapl_htm.xml"] = (200, {}, file.read())
+
+    async def parse_all():
+        async with AsyncHttpClient(rate_limit=None) as client:
+            return await asyncio.gather(
+                axbrl_parse(stub_server.url + "/aapl_htm.xml", client=client),
+                axbrl_parse(stub_server.url + "/missing.xml", client=client),
+                axbrl_parse(samplepath, engine="iterparse"),
+            )
+
+    remotedata, missingdata, localdata = asyncio.run(parse_all())
+    sampledata = xbrl_parse(samplepath)
+    assert remotedata.equals(sampledata), "The async parse should match xbrl_parse"
+    assert localdata.equals(sampledata), "Local files should be parsed without a request"
+    assert missingdata is None, "A failed download should return None"
+
+def test_async_shared_limit_and_cache(stub_server, tmp_path):
+    with open(samplepath, "rb") as file:
+        stub_server.routes["/doc.xml"] = (200, {}, file.read())
+    backendthreads = []
+
+    class RecordingBackend(SQLiteCacheBackend):
+        def get(self, key):
+            backendthreads.append(threading.get_ident())
+            return super().get(key)
+
+    async def fetch_all():
+        # Calls without a client share one token bucket: 4 requests at 10 per second
+        starttime = time.monotonic()
+        await asyncio.gather(*[axbrl_parse(stub_server.url + "/missing.xml") for _ in range(4)])
+        elapsed = time.monotonic() - starttime
+        cache = ResponseCache(RecordingBackend(str(tmp_path / "cache.sqlite")))
+        await axbrl_parse(stub_server.url + "/doc.xml", cache=cache)
+        return elapsed, threading.get_ident()
+
+    elapsed, loopthread = asyncio.run(fetch_all())
+    assert elapsed >= 0.28, "Temporary clients should share the rate limit"
+    assert backendthreads and loopthread not in backendthreads, "Cache reads should run off the event loop"
+
+def test_aedgar_query_many():
+    with open(factspath, "rb") as file:
+        facts = json.load(file)
+
+    async def handler(request):
+        cik = request.url.path.split("CIK")[1].replace(".json", "")
+        if cik == "0000000000":
+            return httpx.Response(404, content=b"not found")
+        # Answer the first CIK last so that completion order differs from input order
+        await asyncio.sleep(0.05 if cik == "0000320193" else 0)
+        return httpx.Response(200, json=dict(facts, cik=int(cik)))
+
+    async def query_all():
+        async with AsyncHttpClient(rate_limit=None, transport=httpx.MockTransport(handler)) as client:
+            return await aedgar_query_many(
+                ["0000320193", "0000000000", "0000789019"], "companyfacts", parse_pandas=False, client=client
+            )
+
+    results = asyncio.run(query_all())
+    assert len(results) == 3, "There should be one result per CIK"
+    assert (results[0].cik == 320193).all(), "Results should follow the input order"
+    assert isinstance(results[1], ValueError), "A failed CIK should hold its exception"
+    assert (results[2].cik == 789019).all(), "Results should follow the input order"
@@ -0,0 +1,55 @@
+# %%
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.tidyxbrl import CikIndex, edgar_cik
+
+tickersdata = {
+    "fields": ["cik", "name", "ticker", "exchange"],
+    "data": [
+        [320193, "Apple Inc.", "AAPL", "Nasdaq"],
+        [789019, "MICROSOFT CORP", "MSFT", "Nasdaq"],
+        [1617640, "Zillow Group, Inc.", "Z", "Nasdaq"],
+        [1617640, "Zillow Group, Inc.", "ZG", "Nasdaq"],
+    ],
+}
+namesdata = (
+    "APPLE COMPUTER INC:0000320193:\n"
+    "APPLE HOSPITALITY REIT, INC.:0001418121:\n"
+    "APPLIED MATERIALS INC /DE:0000006951:\n"
+    "ZILLOW GROUP, INC.:0001617640:\n"
+    "A:B TRADING CO:0000000042:\n"
+)
+
+# %%
+
+def test_cik_index(stub_server, tmp_path):
+    stub_server.routes["/tickers.json"] = (200, {"ETag": '"t1"'}, json.dumps(tickersdata).encode())
+    stub_server.routes["/names.txt"] = lambda handler: (
+        (304, {}, b"") if handler.headers.get("If-None-Match") == '"n1"' else (200, {"ETag": '"n1"'}, namesdata.encode())
+    )
+    urls = {"tickers": stub_server.url + "/tickers.json", "names": stub_server.url + "/names.txt"}
+    indexpath = str(tmp_path / "cik_index.tsv.gz")
+
+    index = CikIndex(path=indexpath, urls=urls)
+    assert index.refresh() == ["tickers", "names"], "Both sources should be downloaded"
+    assert [cik for cik, _ in index.prefix("appl")] == [320193, 1418121, 320193, 6951], "Prefix matches should be sorted by name"
+    assert index.prefix("apple", limit=1) == [(320193, "APPLE COMPUTER INC")], "The limit should cap the matches"
+    assert {cik for cik, _ in index.contains("group")} == {1617640}, "Substring matches should be found anywhere in the name"
+    assert index.contains("A:B") == [(42, "A:B TRADING CO")], "Names holding colons should be kept whole"
+    assert index.ticker("msft") == (789019, "MICROSOFT CORP", "MSFT", "Nasdaq"), "Tickers should be case insensitive"
+    assert index.tickers_of(1617640) == ["Z", "ZG"], "Every share class ticker should be listed"
+
+    # A reloaded index answers the same lookups and only downloads the changed sources
+    reloaded = CikIndex(path=indexpath, urls=urls)
+    assert len(reloaded) == len(index), "The index should be read back from disk"
+    assert reloaded.refresh(["names"]) == [], "An unchanged source should be revalidated, not downloaded"
+    assert stub_server.count("/names.txt") == 2, "The revalidation should reach the server"
+
+    company_df = edgar_cik("ZILLOW", index=reloaded)
+    assert list(company_df.columns) == ["cik", "cik_str", "company", "state", "ticker"], "edgar_cik columns should be kept"
+    assert company_df.cik_str.tolist() == ["0001617640"], "CIKs should be zero padded to 10 digits"
+    assert company_df.company.tolist() == ["Zillow Group, Inc."], "A name listed in several cases should be kept once"
+    assert company_df.ticker.tolist() == ["Z,ZG"], "Tickers should be attached to the matches"
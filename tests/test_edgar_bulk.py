@@ -0,0 +1,71 @@
+# %%
+import sys
+import os
+import json
+import zipfile
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.tidyxbrl import edgar_bulk_load, edgar_bulk_read
+
+factspath = os.path.join(os.path.dirname(__file__), "fixtures", "companyfacts_sample.json")
+
+def write_companyfacts_zip(path, ciks, broken=(), brokenfirst=False):
+    with open(factspath, "r", encoding="utf-8") as file:
+        facts = json.load(file)
+    entries = [(f"CIK{cik:010d}.json", json.dumps(dict(facts, cik=cik))) for cik in ciks]
+    brokenentries = [(f"CIK{cik:010d}.json", "{not json") for cik in broken]
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zipdata:
+        for member, content in brokenentries + entries if brokenfirst else entries + brokenentries:
+            zipdata.writestr(member, content)
+    return path
+
+# %%
+
+@pytest.mark.parametrize("output_format", ["pickle", "csv"])
+def test_edgar_bulk_load_companyfacts(tmp_path, output_format):
+    archive = write_companyfacts_zip(str(tmp_path / "companyfacts.zip"), [320193, 789019, 1617640], broken=[42])
+    outputdirectory = str(tmp_path / "companyfacts")
+
+    summary = edgar_bulk_load(archive, outputdirectory, workers=2, batch_size=2, output_format=output_format)
+    assert summary.members.sum() == 3, "Every valid member should be loaded"
+    assert summary.rows.sum() == 48, "Every fact of every member should be written"
+    assert list(summary.attrs["failures"]) == ["CIK0000000042.json"], "A broken member should be reported"
+
+    facts = edgar_bulk_read(outputdirectory)
+    assert sorted(facts.cik.unique().tolist()) == [320193, 789019, 1617640], "Every company should be read back"
+    if output_format == "pickle":
+        assert facts.concept.dtype == "category", "Categorical columns should stay categorical"
+
+    # A second call only retries the member that failed
+    summary = edgar_bulk_load(archive, outputdirectory, workers=1, output_format=output_format)
+    assert summary.attrs["skipped"] == 3, "Loaded members should be skipped"
+    assert list(summary.attrs["failures"]) == ["CIK0000000042.json"], "Failed members should be retried"
+
+def test_edgar_bulk_load_broken_first(tmp_path):
+    archive = write_companyfacts_zip(str(tmp_path / "companyfacts.zip"), [320193, 789019], broken=[42], brokenfirst=True)
+    outputdirectory = str(tmp_path / "companyfacts")
+
+    summary = edgar_bulk_load(archive, outputdirectory, workers=1, output_format="pickle")
+    assert summary.members.sum() == 2, "The kind should be read from the first member that decodes"
+    assert list(summary.attrs["failures"]) == ["CIK0000000042.json"], "A broken first member should be reported"
+    summary = edgar_bulk_load(archive, outputdirectory, workers=1, output_format="pickle", members=["CIK0000000042.json"])
+    assert list(summary.attrs["failures"]) == ["CIK0000000042.json"], "A resumed load should keep the recorded kind"
+
+def test_edgar_bulk_load_submissions(tmp_path):
+    recent = {
+        "accessionNumber": ["0000320193-20-000096"], "filingDate": ["2020-10-30"], "reportDate": ["2020-09-26"],
+        "acceptanceDateTime": ["2020-10-29T18:06:25.000Z"], "act": ["34"], "form": ["10-K"],
+        "fileNumber": ["001-36743"], "filmNumber": ["201273977"], "items": [""], "size": [12345],
+        "isXBRL": [1], "isInlineXBRL": [1], "primaryDocument": ["aapl-20200926.htm"], "primaryDocDescription": ["10-K"],
+    }
+    page = dict(recent, accessionNumber=["0000320193-05-000001"], filingDate=["2005-01-05"], form=["8-K"])
+    archive = str(tmp_path / "submissions.zip")
+    with zipfile.ZipFile(archive, "w") as zipdata:
+        zipdata.writestr("CIK0000320193.json", json.dumps({"cik": "320193", "name": "Apple Inc.", "filings": {"recent": recent, "files": []}}))
+        zipdata.writestr("CIK0000320193-submissions-001.json", json.dumps(page))
+
+    edgar_bulk_load(archive, str(tmp_path / "submissions"), workers=1, output_format="pickle")
+    filings = edgar_bulk_read(str(tmp_path / "submissions"))
+    assert sorted(filings.accessionNumber) == ["0000320193-05-000001", "0000320193-20-000096"], "Recent & paged filings should be loaded"
+    assert (filings.cik == 320193).all(), "Paged members should take their CIK from the member name"
@@ -6,9 +6,57 @@
 import sys
 import os
 import pytest
+import json
 import pandas as pd 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.tidyxbrl import edgar_frames
+from src.tidyxbrl import edgar_frames, edgar_frames_many, CachedResponse
+
+def frame_document(period, ciks):
+    return {
+        "taxonomy": "us-gaap", "tag": "Revenues", "ccp": period, "uom": "USD",
+        "label": "Revenues", "description": "Revenue recognized.", "pts": len(ciks),
+        "data": [
+            {"accn": f"{cik:010d}-{period[2:6]}-000001", "cik": cik, "entityName": f"Company {cik}", "loc": "US-CA",
+             "start": f"{period[2:6]}-01-01", "end": f"{period[2:6]}-12-31", "val": cik * 1000}
+            for cik in ciks
+        ],
+    }
+
+class FramesClient:
+    """
+    Client answering frames requests from in memory documents, and 404 otherwise.
+    """
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def request(self, method, url, headers=None, data=None, timeout=15):
+        period = url.rsplit("/", 1)[-1].replace(".json", "")
+        if period not in self.documents:
+            return CachedResponse(url, 404, {}, b"not found")
+        return CachedResponse(url, 200, {}, json.dumps(self.documents[period]).encode())
+
+
+def test_edgar_frames_tidy():
+    client = FramesClient({"CY2020": frame_document("CY2020", [320193, 789019])})
+    result = edgar_frames(urldescriptor='us-gaap/Revenues/USD/CY2020', tidy=True, client=client)
+    assert list(result.columns) == ["accn", "cik", "entityName", "loc", "start", "end", "val"], "Tidy columns should be in order"
+    assert result.cik.tolist() == [320193, 789019], "There should be one row per entity"
+    assert result.val.dtype == "float64" and str(result.end.dtype) == "datetime64[ns]", "Columns should be typed"
+    assert result.entityName.dtype == "category", "Entity names should be categorical"
+    assert result.attrs["ccp"] == "CY2020" and result.attrs["pts"] == 2, "The frame header should be kept in attrs"
+
+def test_edgar_frames_many():
+    client = FramesClient({
+        "CY2020": frame_document("CY2020", [320193, 789019]),
+        "CY2021": frame_document("CY2021", [320193]),
+    })
+    result = edgar_frames_many('us-gaap/Revenues/USD', ['CY2020', 'CY2021', 'CY2022'], client=client)
+    assert result.frame.tolist() == ["CY2020", "CY2020", "CY2021"], "Periods should be concatenated in order"
+    assert result.frame.dtype == "category", "The period should be categorical"
+    assert result.attrs["frames"] == {"CY2020": 2, "CY2021": 1}, "The pts of every period should be kept"
+    assert list(result.attrs["failures"]) == ["CY2022"], "A missing period should be listed in the failures"
+
 
 # %%
 def test_edgar_frames():
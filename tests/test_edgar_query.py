@@ -4,7 +4,22 @@ import pytest
 import pandas as pd
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.tidyxbrl import edgar_cik, edgar_query
+from src.tidyxbrl import edgar_cik, edgar_query, CachedResponse
+
+factspath = os.path.join(os.path.dirname(__file__), "fixtures", "companyfacts_sample.json")
+
+class FixtureClient:
+    """
+    Client answering every request with the sample companyfacts document.
+    """
+
+    def __init__(self):
+        self.urls = []
+
+    def request(self, method, url, headers=None, data=None, timeout=15):
+        self.urls.append(url)
+        with open(factspath, "rb") as file:
+            return CachedResponse(url, 200, {}, file.read())
 
 @pytest.fixture
 def setup_cik():
@@ -47,4 +62,22 @@ def test_edgar_query_zillow_companyfacts(setup_cik):
     zillow_facts = edgar_query(desiredcorp, query_type='companyfacts')
     assert zillow_facts is not None, "Zillow company facts result should not be None"
     assert isinstance(zillow_facts,  pd.DataFrame), "Zillow company facts result should be a dataframe"
-    assert 'value' in zillow_facts, "Zillow company facts result should contain 'value'"
\ No newline at end of file
+    assert 'value' in zillow_facts, "Zillow company facts result should contain 'value'"
+
+def test_edgar_query_tidy():
+    client = FixtureClient()
+    facts = edgar_query('0000320193', query_type='companyfacts', tidy=True, client=client)
+    assert client.urls == ["https://data.sec.gov/api/xbrl/companyfacts/CIK0000320193.json"], "The companyfacts url should be requested"
+    assert list(facts.columns) == ["cik", "taxonomy", "concept", "unit", "start", "end", "val", "accn", "fy", "fp", "form", "filed", "frame"], "Tidy columns should be in order"
+    assert len(facts) == 16, "There should be one row per fact"
+    assert facts.attrs["entityName"] == "Apple Inc.", "The entity name should be kept in attrs"
+    for column in ["taxonomy", "concept", "unit", "accn", "fp", "form", "frame"]:
+        assert facts[column].dtype == "category", f"{column} should be categorical"
+    assert str(facts["end"].dtype) == "datetime64[ns]", "Dates should be parsed"
+    revenue = facts[(facts.concept == "Revenues") & (facts.end == "2020-09-26")]
+    assert revenue.val.tolist() == [274515000000.0], "Values should line up with their concept and period"
+    assert facts[facts.unit == "shares"].start.isna().all(), "Instant facts should have no start date"
+    assert facts.frame.isna().sum() == 4, "Facts without a frame should be missing"
+
+    with pytest.raises(ValueError):
+        edgar_query('0000320193', query_type='submissions', tidy=True, client=client)
@@ -0,0 +1,74 @@
+# %%
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.tidyxbrl import SubmissionsSync, CachedResponse
+
+def filing_arrays(accessions):
+    # accessions are "YYYY-MM-DD-n" labels, newest first
+    return {
+        "accessionNumber": [f"0000320193-{label}" for label in accessions],
+        "filingDate": [label[:10] for label in accessions],
+        "reportDate": ["" for _ in accessions],
+        "acceptanceDateTime": [f"{label[:10]}T16:30:{int(label[11:]):02d}.000Z" for label in accessions],
+        "act": ["34" for _ in accessions],
+        "form": ["8-K" for _ in accessions],
+        "fileNumber": ["001-36743" for _ in accessions],
+        "filmNumber": ["" for _ in accessions],
+        "items": ["" for _ in accessions],
+        "size": [1000 for _ in accessions],
+        "isXBRL": [0 for _ in accessions],
+        "isInlineXBRL": [0 for _ in accessions],
+        "primaryDocument": ["d8k.htm" for _ in accessions],
+        "primaryDocDescription": ["8-K" for _ in accessions],
+    }
+
+class SubmissionsClient:
+    """
+    Client answering submissions requests from in memory documents.
+    """
+
+    def __init__(self):
+        self.documents = {}
+        self.urls = []
+
+    def request(self, method, url, headers=None, data=None, timeout=15):
+        self.urls.append(url)
+        name = url.rsplit("/", 1)[-1]
+        return CachedResponse(url, 200, {}, json.dumps(self.documents[name]).encode())
+
+    def publish(self, recent, pages):
+        self.documents["CIK0000320193.json"] = {
+            "cik": "320193", "name": "Apple Inc.",
+            "filings": {
+                "recent": filing_arrays(recent),
+                "files": [{"name": name, "filingCount": len(page), "filingFrom": page[-1][:10], "filingTo": page[0][:10]} for name, page in pages.items()],
+            },
+        }
+        for name, page in pages.items():
+            self.documents[name] = filing_arrays(page)
+
+# %%
+
+def test_submissions_sync(tmp_path):
+    client = SubmissionsClient()
+    client.publish(["2020-03-01-2", "2020-02-01-1"], {"CIK0000320193-submissions-001.json": ["2010-05-01-1", "2010-01-01-1"]})
+    statepath = str(tmp_path / "state.json")
+
+    filings = SubmissionsSync(statepath).sync([320193], client=client)
+    assert len(filings) == 4, "The first sync should pull the recent block & the backfill pages"
+    assert filings.accessionNumber.iloc[0] == "0000320193-2020-03-01-2", "Filings should be listed newest first"
+    assert len(client.urls) == 2, "The backfill page should be requested"
+
+    client.urls.clear()
+    filings = SubmissionsSync(statepath).sync(["0000320193"], client=client)
+    assert len(filings) == 0, "An unchanged CIK should return no filings"
+    assert len(client.urls) == 1, "The backfill pages should only be followed once"
+
+    client.publish(["2020-04-01-1", "2020-03-15-1", "2020-03-01-2", "2020-02-01-1"], {"CIK0000320193-submissions-001.json": ["2010-05-01-1", "2010-01-01-1"]})
+    sync = SubmissionsSync(statepath)
+    filings = sync.sync([320193], client=client)
+    assert filings.accessionNumber.tolist() == ["0000320193-2020-04-01-1", "0000320193-2020-03-15-1"], "Only the new filings should be returned"
+    assert sync.state["320193"]["last_accession"] == "0000320193-2020-04-01-1", "The state should advance to the newest filing"
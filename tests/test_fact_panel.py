@@ -0,0 +1,59 @@
+# %%
+import sys
+import os
+import numpy as np
+import pytest
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.tidyxbrl import fact_panel, xbrl_parse
+
+samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+
+# %%
+
+def test_fact_panel_matches_pivot(tidy_facts):
+    facts = pd.concat([tidy_facts(320193), tidy_facts(789019)], ignore_index=True)
+    panel = fact_panel(facts)
+    assert panel.values.shape == (2, 6, 5), "The panel should hold every company, quarter & concept"
+    assert list(panel.ciks) == [320193, 789019] and str(panel.periods[0]) == "2019Q3"
+
+    # Instants & quarter long durations, the most recently filed fact of every cell
+    length = (facts["end"] - facts["start"]).dt.days
+    direct = facts[facts["start"].isna() | length.between(70, 112)].copy()
+    direct["period"] = (direct["end"] - pd.Timedelta(days=45)).dt.to_period("Q")
+    direct = direct.sort_values("filed", kind="stable").drop_duplicates(["cik", "period", "concept"], keep="last")
+    expected = direct.pivot_table(index=["cik", "period"], columns="concept", values="val", aggfunc="first")
+    wide = panel.to_frame(list(expected.columns)).loc[expected.index]
+    assert np.allclose(wide.to_numpy(), expected.to_numpy(), equal_nan=True), "The panel should match a pivot of the latest facts"
+    assert not panel.derived.any(), "Nothing should be derived unless quarterly is set"
+    assert list(panel.to_frame(["Revenues"], dropna=False).columns) == ["Revenues"]
+    with pytest.raises(ValueError):
+        panel.to_frame(["Missing"])
+
+def test_fact_panel_quarterly_and_keep(tidy_facts):
+    facts = tidy_facts(320193)
+    panel = fact_panel(facts, concepts=["Revenues", "NetIncomeLoss"], quarterly=True)
+    revenues = panel.to_frame(["Revenues"])["Revenues"].loc[320193]
+    assert revenues.loc[pd.Period("2020Q3")] == 274515000000 - 209817000000, "Q4 should be FY - 9M"
+    assert revenues.loc[pd.Period("2019Q4")] == 91819000000, "Reported quarters should be kept"
+    assert panel.derived.sum() == 1, "Only the Q4 should be derived"
+    assert np.isnan(panel.values[0, :, 1]).all(), "Annual values without a 9M value derive nothing"
+
+    restated = pd.DataFrame({
+        "cik": [1, 1, 1], "concept": ["Revenues"] * 3, "unit": ["USD", "USD", "EUR"],
+        "start": pd.to_datetime(["2020-01-01"] * 3), "end": pd.to_datetime(["2020-03-31"] * 3),
+        "val": [10.0, 12.0, 99.0], "filed": pd.to_datetime(["2020-05-01", "2021-05-01", "2022-05-01"]),
+    })
+    assert fact_panel(restated, unit="USD").values[0, 0, 0] == 12, "last should keep the restated value"
+    assert fact_panel(restated, unit="USD", keep="first").values[0, 0, 0] == 10, "first should keep the original value"
+    assert fact_panel(restated, start="2019Q4", end="2020Q2").values.shape == (1, 3, 1), "start & end should bound the quarters"
+    with pytest.raises(ValueError):
+        fact_panel(restated, keep="mean")
+    with pytest.raises(ValueError):
+        fact_panel(restated.drop(columns=["val"]))
+
+def test_fact_panel_xbrl_parse():
+    panel = fact_panel(xbrl_parse(samplepath), concepts=["CashAndCashEquivalentsAtCarryingValue"])
+    assert list(panel.ciks) == [320193], "The CIK should be read from the identifier"
+    assert list(panel.values[0, :, 0]) == [38016000000, 36010000000], "Instants should fill their quarter"
@@ -0,0 +1,80 @@
+# %%
+import sys
+import os
+import pytest
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.tidyxbrl import FactStore, xbrl_parse
+
+samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+
+def sorted_rows(frame):
+    frame = frame[["cik", "concept", "end", "val", "accn"]].astype({"concept": str, "accn": str})
+    return frame.sort_values(["cik", "concept", "end", "accn"]).reset_index(drop=True)
+
+# %%
+
+def test_fact_store_matches_masks(tidy_facts):
+    first, second = tidy_facts(320193), tidy_facts(789019)
+    store = FactStore()
+    assert store.add(first) == len(first), "Every fact should be added"
+    # A query between adds rebuilds the indexes
+    assert len(store.lookup(320193, "Revenues")) == (first["concept"] == "Revenues").sum()
+    store.add(second)
+    facts = pd.concat([first, second], ignore_index=True)
+
+    assert len(store) == len(facts), "The store should hold both companies"
+    expected = facts[(facts["cik"] == 789019) & (facts["concept"] == "Revenues")]
+    assert sorted_rows(store.lookup(789019, "Revenues")).equals(sorted_rows(expected)), "lookup should match a mask"
+    assert store.lookup(789019, "Revenues")["end"].is_monotonic_increasing, "lookup should order the facts by period end"
+
+    expected = facts[(facts["concept"] == "Revenues") & (facts["end"] >= "2020-01-01") & (facts["end"] <= "2020-06-30")]
+    scanned = store.scan(concepts=["Revenues"], start="2020-01-01", end="2020-06-30")
+    assert sorted_rows(scanned).equals(sorted_rows(expected)), "A cross section scan should match a mask"
+    expected = facts[(facts["cik"] == 320193) & (facts["end"] == "2020-09-26")]
+    assert sorted_rows(store.scan(ciks=[320193], start="2020-09-26", end="2020-09-26")).equals(sorted_rows(expected)), \
+        "A company scan should match a mask"
+    assert list(store.to_frame().columns) == list(facts.columns), "The store should return the tidy columns"
+    assert len(store.lookup(1, "Revenues")) == 0 and len(store.lookup(320193, "Missing")) == 0, "Unknown keys return no rows"
+    assert list(store.lookup(320193, "Revenues", columns=["end", "val"]).columns) == ["end", "val"], "columns should be kept"
+
+def test_fact_store_latest_and_aggregate(tidy_facts):
+    facts = tidy_facts(320193)
+    store = FactStore()
+    store.add(facts)
+    store.add(tidy_facts(789019))
+
+    revenues = facts[facts["concept"] == "Revenues"]
+    latest = store.lookup(320193, "Revenues", latest=True)
+    assert len(latest) == len(revenues.drop_duplicates(["start", "end"])), "latest should keep one fact per period"
+    expected = revenues.sort_values("filed").drop_duplicates(["start", "end"], keep="last")
+    assert sorted_rows(latest).equals(sorted_rows(expected)), "latest should keep the most recent filing"
+
+    counts = store.aggregate("Revenues", by="cik", how="count", latest=False)
+    assert counts.to_dict() == {320193: len(revenues), 789019: len(revenues)}, "count should count every filing"
+    sums = store.aggregate("Revenues", by="end", how="sum")
+    assert sums.loc[pd.Timestamp("2020-09-26")] == 2 * expected[expected["end"] == "2020-09-26"]["val"].sum(), \
+        "sum should add the latest value of every company"
+    lastvalues = store.aggregate("Revenues", by="fy", how="last", ciks=[320193], latest=False)
+    assert lastvalues.loc[2020] == revenues[revenues["fy"] == 2020].sort_values("filed")["val"].iloc[-1], \
+        "last should return the most recently filed value"
+    with pytest.raises(ValueError):
+        store.aggregate("Revenues", by="concept")
+
+def test_fact_store_xbrl_parse():
+    filing = xbrl_parse(samplepath)
+    store = FactStore()
+    added = store.add(filing, accn="0000320193-21-000010", taxonomy="us-gaap")
+    numeric = pd.to_numeric(filing["datavalue"], errors="coerce").notna() & filing["segment"].isna()
+    assert added == numeric.sum(), "Only the numeric facts without a segment should be added"
+    stored = store.to_frame()
+    assert set(stored["cik"]) == {320193}, "The CIK should be read from the identifier"
+    assert set(stored["accn"].astype(str)) == {"0000320193-21-000010"}, "The accession should be kept"
+    assert stored["end"].notna().all(), "Instant facts should end on their instant"
+    dimensionstore = FactStore()
+    dimensionstore.add(xbrl_parse(samplepath, dimensions=True), accn="0000320193-21-000010", taxonomy="us-gaap")
+    assert len(dimensionstore) == added, "Facts with dimension members should be left out too"
+    bare = FactStore()
+    assert bare.add(filing) == added, "accn & taxonomy should be optional"
+    assert bare.to_frame()["accn"].isna().all(), "A missing accession should be stored as missing"
@@ -0,0 +1,91 @@
+# %%
+import sys
+import os
+import time
+import pytest
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.tidyxbrl import ResponseCache, SQLiteCacheBackend, FileCacheBackend, cached_request, xbrl_parse
+
+samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+
+def etag_route(body, etag='"v1"'):
+    def route(handler):
+        if handler.headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag, "Content-Type": "application/json"}, body
+    return route
+
+@pytest.fixture(params=["sqlite", "file"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteCacheBackend(str(tmp_path / "cache.sqlite"))
+    return FileCacheBackend(str(tmp_path / "cache"))
+
+# %%
+
+def test_cache_hit_and_revalidation(stub_server, backend):
+    stub_server.routes["/doc.json"] = etag_route(b'{"cik": 320193}')
+    cache = ResponseCache(backend, ttl={stub_server.url: 3600})
+    url = stub_server.url + "/doc.json"
+
+    first = cached_request("GET", url, cache=cache)
+    second = cached_request("GET", url, cache=cache)
+    assert first.json() == second.json() == {"cik": 320193}, "Cached response should match the original"
+    assert getattr(second, "from_cache", False), "Second response should be served from the cache"
+    assert stub_server.count("/doc.json") == 1, "A fresh entry should not reach the server"
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1, "Stats should count the hit & miss"
+
+    # Once stale the entry is revalidated with its ETag & answered by a 304
+    cache.ttl[stub_server.url] = 0
+    third = cached_request("GET", url, cache=cache)
+    assert third.json() == {"cik": 320193}, "Revalidated response should keep the cached body"
+    assert stub_server.requests[-1][2].get("If-None-Match") == '"v1"', "Stale request should send the ETag"
+    assert cache.stats["revalidated"] == 1, "Stats should count the revalidation"
+
+def test_cache_lru_eviction(stub_server, backend):
+    for name in ["a", "b", "c"]:
+        stub_server.routes[f"/{name}"] = (200, {}, name.encode() * 100)
+    backend.max_bytes = 250
+    cache = ResponseCache(backend)
+
+    cached_request("GET", stub_server.url + "/a", cache=cache)
+    time.sleep(0.01)
+    cached_request("GET", stub_server.url + "/b", cache=cache)
+    time.sleep(0.01)
+    cached_request("GET", stub_server.url + "/a", cache=cache)
+    time.sleep(0.01)
+    cached_request("GET", stub_server.url + "/c", cache=cache)
+
+    assert cache.stats["evicted"] == 1, "One entry should be evicted to fit max_bytes"
+    assert len(backend) == 2, "Two entries should remain"
+    cached_request("GET", stub_server.url + "/a", cache=cache)
+    assert stub_server.count("/a") == 1, "The recently used entry should be kept"
+    cached_request("GET", stub_server.url + "/b", cache=cache)
+    assert stub_server.count("/b") == 2, "The least recently used entry should be evicted"
+
+def test_cache_size(stub_server, backend):
+    stub_server.routes["/a"] = (200, {}, b"a" * 100)
+    stub_server.routes["/b"] = (200, {}, b"b" * 50)
+    cache = ResponseCache(backend, ttl={stub_server.url: 0})
+
+    for name in ["a", "b", "a"]:
+        cached_request("GET", stub_server.url + "/" + name, cache=cache)
+        time.sleep(0.01)
+    assert backend.size == 150, "A stored response should replace the size of the entry it overwrites"
+    backend.max_bytes = 120
+    assert backend.evict() == 1 and backend.size == 100, "Eviction should update the size"
+    assert type(backend)(getattr(backend, "path", None) or backend.directory).size == 100, "The size should be measured on open"
+    backend.clear()
+    assert backend.size == 0, "Clearing should reset the size"
+
+def test_cache_xbrl_parse(stub_server, tmp_path):
+    with open(samplepath, "rb") as file:
+        stub_server.routes["/aapl_htm.xml"] = (200, {}, file.read())
+    cache = ResponseCache(SQLiteCacheBackend(str(tmp_path / "cache.sqlite")))
+
+    firstdata = xbrl_parse(stub_server.url + "/aapl_htm.xml", cache=cache)
+    seconddata = xbrl_parse(stub_server.url + "/aapl_htm.xml", cache=cache)
+    pd.testing.assert_frame_equal(firstdata, seconddata)
+    assert stub_server.count("/aapl_htm.xml") == 1, "The second parse should read the cached document"
@@ -0,0 +1,52 @@
+# %%
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.tidyxbrl import HttpClient, RateLimiter, xbrl_parse
+
+samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+
+# %%
+
+def test_rate_limiter():
+    limiter = RateLimiter(rate=20, burst=1)
+    starttime = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    elapsed = time.monotonic() - starttime
+    assert elapsed >= 0.18, "Five requests at 20 per second should take at least 0.2 seconds"
+
+    # The default bucket holds one request, so no second holds more than rate requests
+    limiter = RateLimiter(rate=10)
+    delays = [limiter.reserve() for _ in range(11)]
+    assert delays[0] == 0 and delays[10] >= 0.99, "The 11th request at 10 per second should wait a full second"
+
+def test_http_client_retry(stub_server):
+    attempts = []
+    def flaky(handler):
+        attempts.append(handler.path)
+        if len(attempts) < 3:
+            return 503, {}, b"unavailable"
+        return 200, {}, b"ok"
+    stub_server.routes["/flaky"] = flaky
+    stub_server.routes["/throttled"] = (429, {"Retry-After": "0"}, b"slow down")
+
+    with HttpClient(rate_limit=None, max_retries=3, backoff_factor=0.01) as client:
+        response = client.get(stub_server.url + "/flaky")
+        assert response.status_code == 200, "The request should succeed after retrying"
+        assert client.stats["retries"] == 2, "Two failed attempts should be retried"
+
+        response = client.get(stub_server.url + "/throttled")
+        assert response.status_code == 429, "The last response should be returned once retries run out"
+        assert stub_server.count("/throttled") == 4, "The request should be sent once plus max_retries"
+
+def test_http_client_fetchers(stub_server):
+    with open(samplepath, "rb") as file:
+        stub_server.routes["/aapl_htm.xml"] = (200, {}, file.read())
+
+    with HttpClient(rate_limit=50) as client:
+        sampledata = xbrl_parse(stub_server.url + "/aapl_htm.xml", client=client)
+        assert len(sampledata) == 13, "The document should be fetched through the client"
+        assert client.stats["requests"] == 1, "The client should count the request"
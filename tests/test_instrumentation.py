@@ -0,0 +1,115 @@
+# %%
+import sys
+import os
+import asyncio
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.tidyxbrl import (
+    Profiler, HttpClient, AsyncHttpClient, ResponseCache, SQLiteCacheBackend, add_instrument_hook,
+    remove_instrument_hook, instrument_stage, instrumented, axbrl_parse, xbrl_parse, xbrl_iter_facts
+)
+
+samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+
+# %%
+
+def test_profiler_xbrl_parse(stub_server, tmp_path):
+    with open(samplepath, "rb") as file:
+        sampledocument = file.read()
+    stub_server.routes["/aapl_htm.xml"] = (200, {}, sampledocument)
+    cache = ResponseCache(SQLiteCacheBackend(str(tmp_path / "cache.sqlite")), ttl={stub_server.url: 3600})
+
+    with Profiler(keep_records=True) as profiler:
+        sampledata = xbrl_parse(stub_server.url + "/aapl_htm.xml", cache=cache)
+        xbrl_parse(stub_server.url + "/aapl_htm.xml", cache=cache)
+    report = profiler.report()
+
+    for stagename in ["xbrl_parse", "xbrl_parse.soup", "xbrl_parse.join", "xbrl_parse.tidy", "http.send"]:
+        assert stagename in report.index, "Every stage should be reported: " + stagename
+    assert report.loc["xbrl_parse", "calls"] == 2, "Both calls should be counted"
+    assert report.loc["xbrl_parse", "rows"] == 2 * len(sampledata), "The rows returned should be recorded"
+    assert report.loc["xbrl_parse", "requests"] == 1, "Only the cache miss should reach the server"
+    assert report.loc["xbrl_parse", "bytes"] == len(sampledocument), "The bytes received should be recorded"
+    assert report.loc["xbrl_parse", "cache_hits"] == 1, "The second call should be a cache hit"
+    assert report.loc["http.send", "requests"] == 1, "The transport stage should count its request"
+    assert report.index[0] == "xbrl_parse", "The report should list the slowest stage first"
+    parents = {record["stage"]: record["parent"] for record in profiler.records}
+    assert parents["xbrl_parse.join"] == "xbrl_parse", "Sub-stages should name their parent"
+    assert parents["xbrl_parse"] is None, "The outer stage should have no parent"
+    assert "xbrl_parse" in profiler.summary(), "The summary should list the stages"
+
+def test_profiler_retries(stub_server):
+    attempts = []
+    def flaky(handler):
+        attempts.append(handler.path)
+        if len(attempts) < 3:
+            return 503, {}, b"unavailable"
+        with open(samplepath, "rb") as file:
+            return 200, {}, file.read()
+    stub_server.routes["/aapl_htm.xml"] = flaky
+
+    with Profiler() as profiler, HttpClient(rate_limit=None, max_retries=3, backoff_factor=0.01) as client:
+        xbrl_parse(stub_server.url + "/aapl_htm.xml", client=client)
+    assert profiler.report().loc["xbrl_parse", "retries"] == 2, "Both retried attempts should be counted"
+
+def test_profiler_async(stub_server):
+    with open(samplepath, "rb") as file:
+        stub_server.routes["/aapl_htm.xml"] = (200, {}, file.read())
+
+    async def parse_all():
+        async with AsyncHttpClient(rate_limit=None) as client:
+            return await asyncio.gather(
+                axbrl_parse(stub_server.url + "/aapl_htm.xml", client=client),
+                axbrl_parse(stub_server.url + "/aapl_htm.xml", client=client),
+            )
+
+    with Profiler(keep_records=True) as profiler:
+        asyncio.run(parse_all())
+    report = profiler.report()
+    assert report.loc["axbrl_parse", "calls"] == 2, "Both coroutines should be reported"
+    assert report.loc["axbrl_parse", "requests"] == 2, "Each coroutine should count its own request"
+    assert all(
+        record["parent"] == "axbrl_parse" for record in profiler.records if record["stage"] == "http.send"
+    ), "Concurrent requests should be added to the coroutine that sent them"
+
+def test_profiler_generators():
+    sampledata = xbrl_parse(samplepath)
+
+    with Profiler(keep_records=True) as profiler:
+        for chunk in xbrl_iter_facts(samplepath, chunksize=50):
+            with instrument_stage("consumer"):
+                pass
+        firstfacts = xbrl_iter_facts(samplepath)
+        next(firstfacts)
+        firstfacts.close()
+    records = [record for record in profiler.records if record["stage"] == "xbrl_iter_facts"]
+    assert len(records) == 2, "Every iteration should be reported, including one stopped early"
+    assert records[0]["rows"] == len(sampledata), "The rows yielded should be recorded"
+    assert records[1]["rows"] == 1 and records[1]["error"] is None, "Stopping early should not be an error"
+    assert all(
+        record["parent"] is None for record in profiler.records if record["stage"] == "consumer"
+    ), "The stages run by the caller between items should not be children of the generator"
+
+def test_instrumentation_disabled():
+    records = []
+
+    @instrumented
+    def failing():
+        raise KeyError("missing")
+
+    with instrument_stage("idle") as record:
+        record["rows"] = 10
+    assert record.get("rows") is None, "Without hooks the stage record should drop every write"
+
+    add_instrument_hook(records.append)
+    try:
+        with pytest.raises(KeyError):
+            failing()
+    finally:
+        remove_instrument_hook(records.append)
+    with instrument_stage("idle"):
+        pass
+    assert [record["stage"] for record in records] == ["test_instrumentation_disabled.<locals>.failing"], \
+        "Only stages finished while the hook was installed should be reported"
+    assert records[0]["error"] == "KeyError", "The exception ending a stage should be recorded"
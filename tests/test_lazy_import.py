@@ -0,0 +1,50 @@
+# %%
+import sys
+import os
+import importlib
+import json
+import re
+import subprocess
+import types
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import src.tidyxbrl as tidyxbrl
+
+rootpath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# %%
+
+def test_import_loads_no_dependency():
+    program = (
+        "import json, sys; import tidyxbrl; "
+        "print(json.dumps([name for name in ['pandas', 'numpy', 'bs4', 'lxml', 'requests', 'httpx', 'tqdm'] if name in sys.modules]))"
+    )
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(rootpath, "src"), rootpath]))
+    completed = subprocess.run([sys.executable, "-c", program], capture_output=True, text=True, check=True, env=environment)
+    assert json.loads(completed.stdout) == [], "import tidyxbrl should not load any heavy dependency"
+
+def test_lazy_attributes_cover_submodules():
+    for modulename in sorted(set(tidyxbrl._LAZY_ATTRIBUTES.values())):
+        module = importlib.import_module("tidyxbrl." + modulename)
+        with open(module.__file__, "r", encoding="utf-8") as file:
+            source = file.read()
+        public = [
+            name for name, value in vars(module).items()
+            if not name.startswith("_") and not isinstance(value, types.ModuleType)
+            and (getattr(value, "__module__", None) == module.__name__ if callable(value) else re.search("^" + name + r"\s*=", source, re.M))
+        ]
+        for name in public:
+            assert tidyxbrl._LAZY_ATTRIBUTES.get(name) == modulename, f"{modulename}.{name} should be listed in _LAZY_ATTRIBUTES"
+            assert getattr(tidyxbrl, name) is getattr(module, name), f"tidyxbrl.{name} should resolve to {modulename}.{name}"
+
+def test_functions_named_like_submodules():
+    importlib.import_module("src.tidyxbrl.edgar_frames")
+    assert callable(tidyxbrl.edgar_frames), "Importing a submodule should not replace the function of the same name"
+    assert callable(tidyxbrl.xbrl_parse) and callable(tidyxbrl.edgar_query), "Functions should win over submodules"
+    assert "xbrl_parse_many" in dir(tidyxbrl), "dir should list the names not loaded yet"
+    try:
+        tidyxbrl.not_a_function
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("Unknown names should raise AttributeError")
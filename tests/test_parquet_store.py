@@ -0,0 +1,67 @@
+# %%
+import sys
+import os
+import json
+import pytest
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.tidyxbrl import ParquetStore, xbrl_parse
+from src.tidyxbrl.edgar_query import _edgar_query_tidy
+from src.tidyxbrl.edgar_frames import _edgar_frames_tidy
+
+pytest.importorskip("pyarrow")
+
+factspath = os.path.join(os.path.dirname(__file__), "fixtures", "companyfacts_sample.json")
+samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+
+def sample_facts(cik=320193):
+    with open(factspath, "r", encoding="utf-8") as file:
+        return _edgar_query_tidy(dict(json.load(file), cik=cik))
+
+# %%
+
+def test_parquet_store_facts(tmp_path):
+    store = ParquetStore(str(tmp_path))
+    assert store.write_facts(sample_facts()) == 16, "Every fact should be written"
+    assert store.write_facts(sample_facts()) == 0, "Stored accessions should be skipped"
+    assert store.write_facts(sample_facts(789019)) == 16, "The same accessions of another CIK should be written"
+    assert os.path.isdir(tmp_path / "facts" / "cik=320193" / "taxonomy=us-gaap" / "fy=2020"), "Facts should be partitioned by CIK, taxonomy & year"
+
+    reopened = ParquetStore(str(tmp_path))
+    assert reopened.write_facts(sample_facts()) == 0, "Stored accessions should be found on disk"
+    revenue = reopened.read("facts", ciks=[320193], concepts=["Revenues"], start="2020-01-01", end="2020-12-31")
+    assert len(revenue) == 5, "Filters should select the concept, CIK & period"
+    assert list(revenue.columns) == list(sample_facts().columns), "Columns should be read back in order"
+    assert revenue.concept.dtype == "category", "Strings should be read back as categoricals"
+    assert len(reopened.read("facts", taxonomy="dei", fy=(2020, 2021))) == 4, "Partition filters should be pushed down"
+
+def test_parquet_store_frames_and_filings(tmp_path):
+    store = ParquetStore(str(tmp_path))
+    framedocument = {
+        "taxonomy": "us-gaap", "tag": "Revenues", "ccp": "CY2020", "uom": "USD", "pts": 1,
+        "data": [{"accn": "0000320193-20-000096", "cik": 320193, "entityName": "Apple Inc.", "loc": "US-CA",
+                  "start": "2019-09-29", "end": "2020-09-26", "val": 274515000000}],
+    }
+    frames = _edgar_frames_tidy([framedocument])
+    assert store.write_frames(frames) == 1, "The frame should be written"
+    assert store.write_frames(frames) == 0, "A stored period should be skipped"
+    assert store.read("frames", concepts=["Revenues"]).val.tolist() == [274515000000.0], "The frame should be read back"
+
+    filing = store.xbrl_parse(samplepath, accn="0000320193-21-000010")
+    assert len(filing) == len(xbrl_parse(samplepath)), "The filing should be parsed & stored"
+    assert store.has_accession("filings", "0000320193-21-000010", 320193), "The filing accession should be recorded"
+    assert store.missing_accessions("filings", ["0000320193-21-000010", "0000320193-21-000020"], 320193) == ["0000320193-21-000020"], "Only new accessions should be missing"
+    assert len(store.xbrl_parse("missing.xml", accn="0000320193-21-000010", cik=320193)) == len(filing), "A stored filing should not be parsed again"
+
+    typedfiling = xbrl_parse(samplepath, typed=True, numeric="decimal")
+    assert store.write_filing(typedfiling, accn="0000320193-21-000011") == len(typedfiling), "A typed filing should be written"
+    floatfiling = xbrl_parse(samplepath, typed=True)
+    assert store.write_filing(floatfiling, accn="0000320193-21-000012") == len(floatfiling), "A float typed filing should be written"
+    stringrows, typedrows, floatrows = [
+        store.read("filings", accessions=[accn]).drop(columns="accn").reset_index(drop=True).astype(str)
+        for accn in ["0000320193-21-000010", "0000320193-21-000011", "0000320193-21-000012"]
+    ]
+    pd.testing.assert_frame_equal(typedrows, stringrows, obj="A typed filing should be stored as the string one")
+    assert pd.to_numeric(floatrows["datavalue"], errors="coerce").equals(pd.to_numeric(stringrows["datavalue"], errors="coerce")), \
+        "Float values should be stored as the same numbers"
@@ -0,0 +1,57 @@
+# %%
+import sys
+import os
+import numpy as np
+import pytest
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.tidyxbrl import PointInTimeIndex
+
+# %%
+
+def test_point_in_time_restatements(tidy_facts):
+    index = PointInTimeIndex(pd.concat([tidy_facts(320193), tidy_facts(789019)], ignore_index=True))
+    dates = ["2020-01-01", "2020-01-29", "2020-06-01", "2020-12-31"]
+    revenues = index.asof([320193] * 4, dates, "Revenues", quarters=1)
+    assert revenues["cik"].tolist() == [320193] * 4 and revenues["date"].tolist() == list(pd.to_datetime(dates))
+    assert np.isnan(revenues["val"].iloc[0]), "Nothing should be known before the first quarter is filed"
+    assert revenues["val"].iloc[1:].tolist() == [91819000000, 58313000000, 59685000000], \
+        "A quarter should be known from the day it is filed"
+
+    netincome = index.asof([320193, 320193], ["2020-01-01", "2020-12-31"], "NetIncomeLoss", end="2019-09-28")
+    assert netincome["val"].tolist() == [55256000000, 55250000000], "The restatement should apply from its filed date"
+    assert netincome["form"].tolist() == ["10-K", "10-K/A"]
+    latest = index.asof([320193], ["2020-12-31"], "NetIncomeLoss")
+    assert latest["val"].tolist() == [57411000000], "The latest period should win over a restated older period"
+    anyduration = index.asof([789019, 789019], ["2020-06-01", "2020-12-31"], "Revenues")
+    assert anyduration["val"].tolist() == [58313000000, 274515000000], "Any duration should return the latest period end"
+    unknown = index.asof([1, 320193], ["2020-12-31", "2020-12-31"], ["Revenues", "Missing"])
+    assert unknown["val"].isna().all(), "Unknown companies & concepts should return missing rows"
+    with pytest.raises(ValueError):
+        index.asof([320193], ["2020-12-31"], "Revenues", quarters=7)
+    with pytest.raises(ValueError):
+        PointInTimeIndex(tidy_facts(320193).drop(columns=["filed"]))
+
+def test_point_in_time_matches_scan():
+    generator = np.random.default_rng(0)
+    rowcount = 400
+    end = pd.to_datetime("2015-03-31") + pd.to_timedelta(generator.integers(0, 8, rowcount) * 91, unit="D")
+    facts = pd.DataFrame({
+        "cik": generator.integers(1, 4, rowcount),
+        "concept": generator.choice(["Revenues", "CostOfRevenue"], rowcount),
+        "start": end - pd.Timedelta(days=90),
+        "end": end,
+        "val": np.arange(rowcount, dtype=float),
+        "filed": end + pd.to_timedelta(generator.integers(20, 900, rowcount), unit="D"),
+    })
+    index = PointInTimeIndex(facts)
+    ciks = generator.integers(1, 5, 300)
+    dates = pd.to_datetime("2015-01-01") + pd.to_timedelta(generator.integers(0, 1800, 300), unit="D")
+    result = index.asof(ciks, dates, "Revenues", quarters=1)
+
+    for cik, date, value in zip(ciks, dates, result["val"]):
+        known = facts[(facts["cik"] == cik) & (facts["concept"] == "Revenues") & (facts["filed"] <= date)]
+        known = known.sort_values(["end", "filed"], kind="stable")
+        expected = known["val"].iloc[-1] if len(known) else np.nan
+        assert value == expected or (np.isnan(value) and np.isnan(expected)), f"{cik} on {date} should match a scan"
@@ -3,9 +3,10 @@ import sys
 import os
 import pytest
 import pandas as pd
+from lxml import etree
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.tidyxbrl import xbrl_parse
+from src.tidyxbrl import xbrl_parse, xbrl_iter_facts, xbrl_dimension_filter
 
  # %%
 
@@ -38,3 +39,185 @@ def test_xbrl_parse():
         assert 'segment' in data, f"{company} data should contain 'segment'"
         
 # %%
+
+def test_xbrl_parse_local_file():
+    samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+    sampledata = xbrl_parse(samplepath)
+
+    assert isinstance(sampledata, pd.DataFrame), "Sample data should be a dataframe"
+    assert len(sampledata) == 13, "Sample data should contain one row per fact"
+    assert list(sampledata.columns[-2:]) == ['datacode', 'datavalue'], "datacode & datavalue should be the rightmost columns"
+
+    # Every fact carries the period & entity of the context it references
+    cash = sampledata[sampledata.context == "i3f2a_I20200926"]
+    assert cash.datacode.tolist() == ['CashAndCashEquivalentsAtCarryingValue'], "Context i3f2a should hold one fact"
+    assert cash.instant.tolist() == ['2020-09-26'], "Fact should inherit the context instant"
+    assert cash.identifier.tolist() == ['0000320193'], "Fact should inherit the context identifier"
+    assert cash.unitRef.tolist() == ['usd'], "Fact attributes should be kept as columns"
+    products = sampledata[sampledata.context == "i4d7e_D20200927-20201226_Products"]
+    assert products.segment.tolist() == ['us-gaap:ProductMember'], "Fact should inherit the context segment"
+
+def test_xbrl_parse_iterparse():
+    samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+    soupdata = xbrl_parse(samplepath)
+    iterdata = xbrl_parse(samplepath, engine="iterparse")
+
+    pd.testing.assert_frame_equal(soupdata, iterdata)
+
+    with pytest.raises(ValueError):
+        xbrl_parse(samplepath, engine="unknown")
+
+def test_xbrl_iterparse_huge_tree(tmp_path):
+    deepdocument = b'<xbrl xmlns="http://www.xbrl.org/2003/instance">' + b"<a>" * 300 + b"</a>" * 300 + b"</xbrl>"
+    deeppath = tmp_path / "deep.xml"
+    deeppath.write_bytes(deepdocument)
+
+    assert list(xbrl_iter_facts(str(deeppath))) == [], "Local files should be parsed without the libxml2 limits"
+    with pytest.raises(etree.XMLSyntaxError, match="depth"):
+        list(xbrl_iter_facts(deepdocument))
+
+def test_xbrl_parse_ixbrl():
+    samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+    inlinepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_ixbrl.htm")
+    sampledata = xbrl_parse(samplepath)
+    inlinedata = xbrl_parse(inlinepath, engine="ixbrl")
+
+    # The inline document lists the hidden facts first, compare the facts in a fixed order
+    sortcolumns = ["context", "datacode", "datavalue"]
+    pd.testing.assert_frame_equal(
+        sampledata.sort_values(sortcolumns).reset_index(drop=True),
+        inlinedata.sort_values(sortcolumns).reset_index(drop=True),
+    )
+
+def test_xbrl_parse_ixbrl_transforms():
+    inlinedocument = b"""<?xml version="1.0" encoding="utf-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:ix="http://www.xbrl.org/2013/inlineXBRL" xmlns:ixt="http://www.xbrl.org/inlineXBRL/transformation/2020-02-12" xmlns:ixt-sec="http://www.sec.gov/inlineXBRL/transformation/2015-08-31" xmlns:xbrli="http://www.xbrl.org/2003/instance" xmlns:us-gaap="http://fasb.org/us-gaap/2020" xmlns:dei="http://xbrl.sec.gov/dei/2020">
+<body>
+<ix:header><ix:resources>
+<xbrli:context id="FY2020"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">0000320193</xbrli:identifier></xbrli:entity>
+<xbrli:period><xbrli:startDate>2019-09-29</xbrli:startDate><xbrli:endDate>2020-09-26</xbrli:endDate></xbrli:period></xbrli:context>
+<xbrli:unit id="usd"><xbrli:measure>iso4217:USD</xbrli:measure></xbrli:unit>
+</ix:resources></ix:header>
+<p><ix:nonFraction name="us-gaap:OtherNonoperatingIncomeExpense" contextRef="FY2020" unitRef="usd" decimals="-6" scale="6" sign="-" format="ixt:num-dot-decimal">(1,234.5)</ix:nonFraction></p>
+<p><ix:nonFraction name="us-gaap:GoodwillImpairmentLoss" contextRef="FY2020" unitRef="usd" decimals="-6" scale="6" format="ixt:fixed-zero">&#8212;</ix:nonFraction></p>
+<p><ix:nonFraction name="us-gaap:Liabilities" contextRef="FY2020" unitRef="usd" decimals="-5" scale="6" format="ixt:num-comma-decimal">1.234,5</ix:nonFraction></p>
+<p><ix:nonFraction name="dei:EntityNumberOfEmployees" contextRef="FY2020" decimals="INF" format="ixt-sec:numwordsen">one hundred forty-seven thousand</ix:nonFraction></p>
+<p><ix:nonFraction name="us-gaap:EffectiveIncomeTaxRate" contextRef="FY2020" decimals="3" scale="-2" format="ixt:num-dot-decimal">14.4</ix:nonFraction>%</p>
+<p><ix:nonNumeric name="dei:DocumentPeriodEndDate" contextRef="FY2020" format="ixt:date-monthname-day-year-en">September 26, 2020</ix:nonNumeric></p>
+<p><ix:nonNumeric name="dei:CurrentFiscalYearEndDate" contextRef="FY2020" format="ixt:date-monthname-day-en">Sept. 26</ix:nonNumeric></p>
+<p><ix:nonNumeric name="dei:EntityShellCompany" contextRef="FY2020" format="ixt:fixed-false">No</ix:nonNumeric></p>
+<p><ix:nonNumeric name="dei:EntityWellKnownSeasonedIssuer" contextRef="FY2020" format="ixt-sec:boolballotbox">&#9746;</ix:nonNumeric></p>
+<p><ix:nonNumeric name="dei:SecurityExchangeName" contextRef="FY2020">The <ix:exclude>(footnote)</ix:exclude>Nasdaq
+   Stock Market LLC</ix:nonNumeric></p>
+<p><ix:nonNumeric name="us-gaap:SignificantAccountingPoliciesTextBlock" contextRef="FY2020" continuedAt="c1">Basis of
+presentation. </ix:nonNumeric></p>
+<p>Unrelated text.</p>
+<ix:continuation id="c1" continuedAt="c2"><p>Fiscal years end in September.</p></ix:continuation>
+<ix:continuation id="c2"><p>Amounts are in millions.</p></ix:continuation>
+<ix:nonNumeric name="us-gaap:IncomeTaxDisclosureTextBlock" contextRef="FY2020" escape="true"><p>Tax rate was <ix:nonFraction name="us-gaap:EffectiveIncomeTaxRate" contextRef="FY2020" unitRef="usd" decimals="3">14.4</ix:nonFraction>%.</p></ix:nonNumeric>
+</body>
+</html>"""
+    inlinedata = xbrl_parse(inlinedocument, engine="ixbrl")
+    datavalues = dict(zip(inlinedata.datacode, inlinedata.datavalue))
+
+    assert datavalues["OtherNonoperatingIncomeExpense"] == "-1234500000", "sign & scale should be applied"
+    assert datavalues["GoodwillImpairmentLoss"] == "0", "fixed-zero should read as 0"
+    assert datavalues["Liabilities"] == "1234500000", "num-comma-decimal should read the comma as the decimal mark"
+    assert datavalues["EntityNumberOfEmployees"] == "147000", "numwordsen should read the number in words"
+    assert sorted(inlinedata[inlinedata.datacode == "EffectiveIncomeTaxRate"].datavalue) == ["0.144", "14.4"], "A negative scale should divide"
+    assert datavalues["DocumentPeriodEndDate"] == "2020-09-26", "Dates should be read into xs:date"
+    assert datavalues["CurrentFiscalYearEndDate"] == "--09-26", "Month & day should be read into xs:gMonthDay"
+    assert datavalues["EntityShellCompany"] == "false", "fixed-false should read as false"
+    assert datavalues["EntityWellKnownSeasonedIssuer"] == "true", "A checked ballot box should read as true"
+    assert datavalues["SecurityExchangeName"] == "The Nasdaq Stock Market LLC", "ix:exclude content should be dropped"
+    assert datavalues["SignificantAccountingPoliciesTextBlock"] == (
+        "Basis of presentation. Fiscal years end in September. Amounts are in millions."
+    ), "continuedAt chains should be joined in order"
+    assert datavalues["IncomeTaxDisclosureTextBlock"] == "<p>Tax rate was 14.4%.</p>", "Escaped facts should keep their markup"
+    assert inlinedata.decimals.tolist().count("INF") == 1, "Fact attributes should be kept as columns"
+
+def test_xbrl_parse_typed():
+    samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+    sampledata = xbrl_parse(samplepath)
+    typeddata = xbrl_parse(samplepath, typed=True)
+
+    assert len(typeddata) == len(sampledata), "Typing should keep every fact"
+    assert typeddata.datavalue.dtype == "float64", "datavalue should be float64"
+    assert typeddata.decimals.dtype == "float64", "decimals should be float64"
+    for name in ["startDate", "endDate", "instant"]:
+        assert pd.api.types.is_datetime64_any_dtype(typeddata[name]), f"{name} should be datetime64"
+    for name in ["context", "identifier", "unitRef", "datacode", "segment"]:
+        assert isinstance(typeddata[name].dtype, pd.CategoricalDtype), f"{name} should be categorical"
+    assert typeddata.memory_usage(deep=True).sum() < sampledata.memory_usage(deep=True).sum(), "Typed data should be smaller"
+
+    cash = typeddata[typeddata.context == "i3f2a_I20200926"]
+    assert cash.datavalue.tolist() == [38016000000.0], "Numeric facts should be converted"
+    assert cash.instant.tolist() == [pd.Timestamp("2020-09-26")], "instant should be a timestamp"
+    # Facts without a unitRef stay text, even when they look numeric
+    cik = typeddata[typeddata.datacode == "EntityCentralIndexKey"]
+    assert cik.datatext.tolist() == ["0000320193"], "Text facts should keep their value in datatext"
+    assert cik.datavalue.isna().all(), "Text facts should hold no datavalue"
+    nil = typeddata[typeddata.datacode == "IncomeTaxExpenseBenefit"]
+    assert nil.datavalue.isna().all() and nil.datatext.isna().all(), "Nil facts should stay missing"
+
+    decimaldata = xbrl_parse(samplepath, typed=True, numeric="decimal")
+    eps = decimaldata[decimaldata.datacode == "EarningsPerShareBasic"]
+    assert [str(value) for value in eps.datavalue] == ["1.70"], "Decimal values should keep their digits"
+    assert decimaldata[decimaldata.datacode == "IncomeTaxExpenseBenefit"].datavalue.tolist() == [None], "Nil facts should be None"
+
+    with pytest.raises(ValueError):
+        xbrl_parse(samplepath, typed=True, numeric="float32")
+
+def test_xbrl_iter_facts():
+    samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+    sampledata = xbrl_parse(samplepath)
+    records = list(xbrl_iter_facts(samplepath))
+
+    assert len(records) == len(sampledata), "There should be one record per fact"
+    assert all(isinstance(record, dict) for record in records), "Records should be dictionaries"
+    assert records[0]['datacode'] == 'DocumentType', "Records should follow the document order"
+    assert records[0]['startDate'] == '2020-09-27', "Records should carry their context columns"
+    assert 'instant' not in records[0], "Records should only hold the non blank columns"
+
+    chunks = list(xbrl_iter_facts(samplepath, chunksize=5))
+    assert [len(chunk) for chunk in chunks] == [5, 5, 3], "Chunks should hold up to chunksize facts"
+    for chunk in chunks:
+        assert list(chunk.columns[-2:]) == ['datacode', 'datavalue'], "datacode & datavalue should be the rightmost columns"
+    chunkdata = pd.concat(chunks, ignore_index=True)
+    assert sorted(chunkdata.datavalue.dropna()) == sorted(sampledata.datavalue.dropna()), "Chunks should hold every fact"
+
+    with pytest.raises(ValueError):
+        next(xbrl_iter_facts(samplepath, chunksize=0))
+
+def test_xbrl_parse_dimensions():
+    samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+    inlinepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_ixbrl.htm")
+    sampledata = xbrl_parse(samplepath)
+    dimensiondata = xbrl_parse(samplepath, dimensions=True)
+
+    assert "segment" not in dimensiondata, "The side table should replace the segment column"
+    assert isinstance(dimensiondata.context.dtype, pd.CategoricalDtype), "context should be categorical"
+    pd.testing.assert_frame_equal(dimensiondata.astype({"context": str}), sampledata.drop(columns=["segment"]))
+    dimensiontable = dimensiondata.attrs["dimensions"]
+    iphone = dimensiontable[dimensiontable.context == "i5b3c_D20200927-20201226_AmericasIPhone"]
+    assert dict(zip(iphone.axis, iphone.member)) == {
+        "us-gaap:StatementBusinessSegmentsAxis": "aapl:AmericasSegmentMember",
+        "srt:ProductOrServiceAxis": "aapl:IPhoneMember",
+    }, "Every member of a context should be kept, not only the first"
+    repurchase = dimensiontable[dimensiontable.typed]
+    assert repurchase.member.tolist() == ["2020-A"], "typedMember should hold the text of its value"
+    for engine, path in [("iterparse", samplepath), ("ixbrl", inlinepath)]:
+        enginetable = xbrl_parse(path, engine=engine, dimensions=True).attrs["dimensions"]
+        pd.testing.assert_frame_equal(dimensiontable, enginetable)
+
+    iphonefacts = xbrl_dimension_filter(dimensiondata, {"srt:ProductOrServiceAxis": "aapl:IPhoneMember"})
+    assert iphonefacts.context.tolist() == ["i5b3c_D20200927-20201226_AmericasIPhone"], "Facts should match their member"
+    productfacts = xbrl_dimension_filter(dimensiondata, {"srt:ProductOrServiceAxis": None})
+    assert len(productfacts) == 2, "A member of None should match any member of the axis"
+    both = {"srt:ProductOrServiceAxis": None, "us-gaap:StatementBusinessSegmentsAxis": "aapl:AmericasSegmentMember"}
+    assert len(xbrl_dimension_filter(dimensiondata, both)) == 1, "Every requested member should be held"
+    assert len(xbrl_dimension_filter(dimensiondata, {"srt:ProductOrServiceAxis": "us-gaap:Missing"})) == 0
+    totals = xbrl_dimension_filter(dimensiondata)
+    assert len(totals) == sampledata.segment.isna().sum(), "No members should select the facts without a segment"
+    with pytest.raises(ValueError):
+        xbrl_dimension_filter(sampledata)
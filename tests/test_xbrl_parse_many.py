@@ -0,0 +1,27 @@
+# %%
+import sys
+import os
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.tidyxbrl import xbrl_parse, xbrl_parse_many
+
+# %%
+
+def test_xbrl_parse_many():
+    samplepath = os.path.join(os.path.dirname(__file__), "fixtures", "sample_htm.xml")
+    missingpath = os.path.join(os.path.dirname(__file__), "fixtures", "missing_htm.xml")
+
+    manydata = xbrl_parse_many([samplepath, missingpath], workers=2)
+    assert isinstance(manydata, pd.DataFrame), "Combined data should be a dataframe"
+    assert manydata.filing.unique().tolist() == [samplepath], "Combined data should hold the parsed filing"
+    assert list(manydata.attrs["failures"]) == [missingpath], "The missing filing should be reported as a failure"
+    pd.testing.assert_frame_equal(
+        manydata.drop(columns="filing"),
+        xbrl_parse(samplepath).reset_index(drop=True),
+    )
+
+    manydict = xbrl_parse_many([samplepath, missingpath], workers=1, engine="iterparse", concat=False)
+    assert list(manydict) == [samplepath, missingpath], "Results should follow the order of paths"
+    assert isinstance(manydict[samplepath], pd.DataFrame), "Parsed filings should hold a dataframe"
+    assert isinstance(manydict[missingpath], Exception), "Failed filings should hold the exception"
@@ -33,3 +33,85 @@ from src.tidyxbrl import edgar_frames
 #                baseapiurl='https://api.xbrl.us/api/v1/fact/141024005?',
 #                queryparameters = {'fields': "fact.value,concept.local-name"
 #                         })
+
+# %%
+import json
+import urllib.parse
+from src.tidyxbrl import Profiler, xbrl_query, xbrl_query_pages
+
+
+def fact_search_route(factcount, serverlimit=100, maxlimit=None):
+    """
+    Serve factcount facts from a fact/search route, paged as the XBRL API does, capping
+    the page size at maxlimit.
+    """
+
+    def route(handler):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(handler.path).query)
+        fields = query["fields"][0]
+        limit = int(fields.split("fact.limit(")[1].split(")")[0]) if "fact.limit(" in fields else serverlimit
+        offset = int(fields.split("fact.offset(")[1].split(")")[0]) if "fact.offset(" in fields else 0
+        limit = min(limit, maxlimit) if maxlimit else limit
+        rows = [{"fact.id": i, "concept.local-name": query["concept.local-name"][0]} for i in range(offset, min(offset + limit, factcount))]
+        body = {"paging": {"limit": limit, "offset": offset, "count": len(rows)}, "data": rows}
+        return 200, {"Content-Type": "application/json"}, json.dumps(body).encode()
+
+    return route
+
+
+def test_xbrl_query_url_encoding(stub_server):
+    stub_server.routes["/api/v1/fact/search"] = fact_search_route(3)
+    queryparameters = {"concept.local-name": "Assets & Liabilities", "fields": "fact.id,concept.local-name"}
+    original = dict(queryparameters)
+
+    dataresponse = xbrl_query("token", queryparameters, baseapiurl=stub_server.url + "/api/v1/fact/search?")
+
+    assert queryparameters == original, "The query parameters should be left unchanged"
+    assert len(dataresponse) == 3, "The response rows should be returned"
+    assert dataresponse["concept.local-name"].unique().tolist() == ["Assets & Liabilities"], "Values should be url encoded"
+    method, path, headers = stub_server.requests[-1]
+    assert "Assets%20%26%20Liabilities" in path, "Reserved characters should be escaped"
+    assert "fields=fact.id,concept.local-name" in path, "The fields syntax should stay readable"
+    assert headers["Authorization"] == "Bearer token", "The access token should be sent"
+
+def test_xbrl_query_paginate(stub_server):
+    stub_server.routes["/api/v1/fact/search"] = fact_search_route(1050)
+    queryparameters = {"concept.local-name": "Assets", "fields": "fact.id,concept.local-name,fact.limit(20)"}
+    baseapiurl = stub_server.url + "/api/v1/fact/search?"
+
+    single = xbrl_query("token", queryparameters, baseapiurl=baseapiurl)
+    assert len(single) == 20, "Without paginate only the first page should be returned"
+
+    stub_server.requests.clear()
+    everything = xbrl_query("token", queryparameters, baseapiurl=baseapiurl, paginate=True, page_limit=100, workers=3)
+    assert everything["fact.id"].tolist() == list(range(1050)), "Every page should be returned in offset order"
+    assert stub_server.count("/api/v1/fact/search") <= 11 + 2, "Paging should stop after the last page"
+
+    defaultlimit = xbrl_query("token", {"concept.local-name": "Assets", "fields": "fact.id"}, baseapiurl=baseapiurl, paginate=True)
+    assert len(defaultlimit) == 1050, "The page limit should default to the limit reported by the API"
+
+    firstpages = xbrl_query("token", queryparameters, baseapiurl=baseapiurl, paginate=True, max_pages=3)
+    assert firstpages["fact.id"].tolist() == list(range(60)), "max_pages should cap the pages pulled"
+
+    pages = list(xbrl_query_pages("token", queryparameters, baseapiurl=baseapiurl, page_limit=500))
+    assert [len(page) for page in pages] == [500, 500, 50], "Pages should be yielded one at a time"
+
+def test_xbrl_query_paginate_capped(stub_server):
+    stub_server.routes["/api/v1/fact/search"] = fact_search_route(1050, maxlimit=100)
+    queryparameters = {"concept.local-name": "Assets", "fields": "fact.id,concept.local-name"}
+    baseapiurl = stub_server.url + "/api/v1/fact/search?"
+
+    with Profiler() as profiler:
+        everything = xbrl_query("token", queryparameters, baseapiurl=baseapiurl, paginate=True, page_limit=2000, workers=3)
+    assert everything["fact.id"].tolist() == list(range(1050)), "Paging should step by the page size the API serves"
+    assert profiler.report().loc["xbrl_query_pages", "rows"] == 1050, "The paging should be profiled as it is iterated"
+
+    capped = dict(queryparameters, fields="fact.id,concept.local-name,fact.limit(500)")
+    pages = list(xbrl_query_pages("token", capped, baseapiurl=baseapiurl))
+    assert [len(page) for page in pages] == [100] * 10 + [50], "The limit in fields should be capped by the API"
+
+def test_xbrl_query_error(stub_server):
+    stub_server.routes["/api/v1/fact/search"] = (401, {}, b'{"error": "invalid_token"}')
+
+    with pytest.raises(ValueError):
+        xbrl_query("token", {"fields": "fact.id"}, baseapiurl=stub_server.url + "/api/v1/fact/search?", paginate=True)
@@ -0,0 +1,110 @@
+# %%
+import sys
+import os
+import asyncio
+import json
+import threading
+import time
+import urllib.parse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.tidyxbrl import XbrlTokenManager, xbrl_query
+from src.tidyxbrl.http_cache import CachedResponse
+
+# %%
+
+class TokenClient:
+    """
+    Fake XBRL US API: issues numbered tokens at the oauth2 endpoint and answers fact
+    searches, rejecting revoked access tokens with 401.
+    """
+
+    def __init__(self, expires_in=3600):
+        self.expires_in = expires_in
+        self.grants = []
+        self.revoked = set()
+        self._lock = threading.Lock()
+
+    def request(self, method, url, headers=None, data=None, timeout=15):
+        if url.endswith("/oauth2/token"):
+            with self._lock:
+                self.grants.append(data["grant_type"])
+                number = len(self.grants)
+            time.sleep(0.05)
+            body = {
+                "access_token": f"access-{number}",
+                "refresh_token": f"refresh-{number}",
+                "expires_in": self.expires_in,
+                "refresh_token_expires_in": 86400,
+                "token_type": "bearer",
+                "platform": data["platform"],
+            }
+            if data["grant_type"] == "refresh_token" and data["refresh_token"] in self.revoked:
+                return CachedResponse(url, 400, {}, b'{"error": "invalid_grant"}')
+            return CachedResponse(url, 200, {}, json.dumps(body).encode())
+        token = headers["Authorization"].split(" ")[1]
+        if token in self.revoked:
+            return CachedResponse(url, 401, {}, b'{"error": "invalid_token"}')
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        body = {"paging": {"limit": 100, "offset": 0, "count": 1}, "data": [{"fact.id": 1, "token": token, "fields": query["fields"][0]}]}
+        return CachedResponse(url, 200, {}, json.dumps(body).encode())
+
+
+def test_xbrl_token_manager_cache(tmp_path):
+    client = TokenClient()
+    tokenpath = str(tmp_path / "xbrl_token.json")
+    tokens = XbrlTokenManager("user", "password", "id", "secret", path=tokenpath, client=client)
+
+    assert tokens.get_token() == "access-1", "The first token should come from the password grant"
+    assert tokens.get_token() == "access-1", "A valid token should be reused"
+    assert client.grants == ["password"], "A valid token should not be requested again"
+    assert oct(os.stat(tokenpath).st_mode & 0o777) == "0o600", "The token file should be private"
+
+    reloaded = XbrlTokenManager("user", "password", "id", "secret", path=tokenpath, client=client)
+    assert reloaded.get_token() == "access-1", "The token should be read from the file"
+    other = XbrlTokenManager("other", "password", "id", "secret", path=tokenpath, client=client)
+    assert other.get_token() == "access-2", "The token of another account should be ignored"
+
+def test_xbrl_token_manager_refresh():
+    client = TokenClient(expires_in=30)
+    tokens = XbrlTokenManager("user", "password", "id", "secret", refresh_margin=60, client=client)
+
+    assert tokens.get_token() == "access-1", "The first token should come from the password grant"
+    assert tokens.get_token() == "access-2", "A token expiring within the margin should be renewed"
+    assert client.grants == ["password", "refresh_token"], "Renewal should use the refresh token"
+
+    client.revoked.add("refresh-2")
+    assert tokens.get_token() == "access-4", "A revoked refresh token should fall back to the password"
+    assert client.grants[-2:] == ["refresh_token", "password"], "The password grant should follow the failed refresh"
+
+def test_xbrl_token_manager_concurrent():
+    client = TokenClient()
+    tokens = XbrlTokenManager("user", "password", "id", "secret", client=client)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tokens.get_token())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["access-1"] * 8, "Threads should share one token"
+
+    async def gather():
+        tokens.invalidate()
+        return await asyncio.gather(*[tokens.aget_token() for _ in range(8)])
+
+    assert asyncio.run(gather()) == ["access-2"] * 8, "Coroutines should share one renewed token"
+    assert len(client.grants) == 2, "Concurrent callers should send a single token request"
+
+def test_xbrl_query_token_manager():
+    client = TokenClient()
+    tokens = XbrlTokenManager("user", "password", "id", "secret", client=client)
+    baseapiurl = "https://api.xbrl.us/api/v1/fact/search?"
+
+    dataresponse = xbrl_query(tokens, {"fields": "fact.id"}, baseapiurl=baseapiurl, client=client)
+    assert dataresponse.token.tolist() == ["access-1"], "xbrl_query should send the managed token"
+
+    client.revoked.add("access-1")
+    dataresponse = xbrl_query(tokens, {"fields": "fact.id"}, baseapiurl=baseapiurl, client=client, paginate=True)
+    assert dataresponse.token.tolist() == ["access-2"], "A rejected token should be renewed & the request repeated"
+    assert client.grants == ["password", "refresh_token"], "The token should be renewed once"